@@ -13,7 +13,11 @@ const inferenceService = InferenceService.getInstance();
  * @param {Request} req - The Express request object containing
  *                            the name of the dataset to infer from
  *                            the id of the model to use
- *                            the version of the model to use and
+ *                            the version of the model to use,
+ *                            the optional latency budget of the job in seconds,
+ *                            the optional models to compare with on the same dataset,
+ *                            the optional format of video results, per frame or per track,
+ *                            the optional cascade flag, predicting with the smaller model version first and
  *                            the user's email address.
  * @param {Response} res - The Express response object used for sending back the HTTP response.
  * @returns {Promise<void>} A promise that resolves when the response is sent.
@@ -23,11 +27,11 @@ const inferenceService = InferenceService.getInstance();
 const makeInference = async (req: Request, res: Response, next: NextFunction): Promise<void> => {
   try {
     //Request parameters extraction
-    const { modelId, modelVersion, datasetName } = req.body;
+    const { modelId, modelVersion, datasetName, latencyBudget, compareModels, resultFormat, cascade, annotationMode, clipClasses } = req.body;
     const userEmail = req.user!.userEmail;
 
     //Adds the job to the queue and receives the Id 
-    const jobId = await inferenceService.requestDatasetInference(datasetName, userEmail, modelId, modelVersion);
+    const jobId = await inferenceService.requestDatasetInference(datasetName, userEmail, modelId, modelVersion, latencyBudget, compareModels, resultFormat, cascade, annotationMode, clipClasses);
     res.status(HTTPStatus.OK).send({ message: "Process added successfully to the queue", jobId: jobId });
   } catch (error) {
     next(error);
@@ -60,7 +64,8 @@ const checkState = async (req: Request, res: Response, next: NextFunction): Prom
 /** 
  * Gets the result of the specified job (by ID) if it's completed.
  * @param {Request} req - The Express request object containing:
- *                            the job whose status is to be retrieved and
+ *                            the job whose status is to be retrieved,
+ *                            whether to reconstruct the frames of track-compressed video results and
  *                            the user's email address.
  * @param {Response} res - The Express response object used for sending back the HTTP response.
  * @returns {Promise<void>} A promise that resolves when the response is sent.
@@ -68,15 +73,65 @@ const checkState = async (req: Request, res: Response, next: NextFunction): Prom
  *                          to the location where are stored the annotated contents                      
  */
 const getResult = async (req: Request, res: Response, next: NextFunction): Promise<void> => {
-  const jobId = req.body.jobId;
+  const { jobId, expandTracks } = req.body;
   const userEmail = req.user!.userEmail;
 
   try {
-    const jobData:IResult = await inferenceService.getJobResult(jobId, userEmail);
+    const jobData:IResult = await inferenceService.getJobResult(jobId, userEmail, expandTracks);
     res.status(HTTPStatus.OK).send(jobData);
   } catch (error) {
     next(error);
   }
 };
 
-export { makeInference, checkState, getResult };
\ No newline at end of file
+/** 
+ * Gets a slice of the result of the specified job (by ID) if it's completed, read from its indexed result file
+ * without loading the whole result.
+ * @param {Request} req - The Express request object containing:
+ *                            the job whose result slice is to be retrieved,
+ *                            the optional name of the file, first and last frame numbers, classes and minimum
+ *                            confidence of the detections of the slice,
+ *                            the optional model and version of a compared model whose results are sliced and
+ *                            the user's email address.
+ * @param {Response} res - The Express response object used for sending back the HTTP response.
+ * @returns {Promise<void>} A promise that resolves when the response is sent.
+ *                          The response contains the results of the slice in json format.
+ */
+const getResultSlice = async (req: Request, res: Response, next: NextFunction): Promise<void> => {
+  const { jobId, filename, startFrame, endFrame, classes, minConfidence, modelId, modelVersion } = req.body;
+  const userEmail = req.user!.userEmail;
+
+  try {
+    const slice = await inferenceService.getJobResultSlice(jobId, userEmail, { filename, startFrame, endFrame, classes, minConfidence, modelId, modelVersion });
+    res.status(HTTPStatus.OK).send(slice);
+  } catch (error) {
+    next(error);
+  }
+};
+
+/** 
+ * Gets the aggregates of the result of the specified job (by ID) if it's completed: class counts, time series,
+ * confidence histograms and busiest frames, maintained while the job ran.
+ * @param {Request} req - The Express request object containing:
+ *                            the job whose aggregates are to be retrieved,
+ *                            the optional name of the file, kinds of aggregates, classes and time series interval
+ *                            in seconds,
+ *                            the optional model and version of a compared model whose aggregates are queried and
+ *                            the user's email address.
+ * @param {Response} res - The Express response object used for sending back the HTTP response.
+ * @returns {Promise<void>} A promise that resolves when the response is sent.
+ *                          The response contains the aggregates in json format.
+ */
+const getResultAggregates = async (req: Request, res: Response, next: NextFunction): Promise<void> => {
+  const { jobId, filename, kinds, classes, interval, modelId, modelVersion } = req.body;
+  const userEmail = req.user!.userEmail;
+
+  try {
+    const aggregates = await inferenceService.getJobResultAggregates(jobId, userEmail, { filename, kinds, classes, interval, modelId, modelVersion });
+    res.status(HTTPStatus.OK).send(aggregates);
+  } catch (error) {
+    next(error);
+  }
+};
+
+export { makeInference, checkState, getResult, getResultSlice, getResultAggregates };
\ No newline at end of file
@@ -4,7 +4,7 @@
  *               such as creating a new user, updating user information, and retrieving user details based on email or credentials.
  */
 import { User } from "../models/sequelize_model/User";
-import { Transaction } from "sequelize";                            // Import Sequelize's Transaction model to handle transactions.
+import { Transaction, Op, literal } from "sequelize";               // Import Sequelize's Transaction model to handle transactions.
 import { ErrorFactory, ErrorType } from "../utils/errorFactory";    // Error handling utilities.
 
 const UserDAO = {
@@ -40,6 +40,32 @@ const UserDAO = {
         }
     },
 
+    /**
+     * Adds an amount to the token balance of a specified user in a single conditional update, so that concurrent
+     * updates of the balance are not lost. A negative amount is only deducted if the balance covers it.
+     * @param userEmail The email of the user whose token balance is to be updated.
+     * @param amount The amount to add to the token balance, or to deduct if negative.
+     * @param transaction An optional Sequelize transaction object to perform the update as part of a transaction.
+     * @returns A Promise that resolves to true if the balance was updated, false if the user is not found or the
+     *          balance does not cover the deduction.
+     */
+    async addTokensByEmail(userEmail: string, amount: number, transaction: Transaction | null = null) {
+        try {
+            // The balance is updated and checked by the database, not from a previously read balance.
+            const [affectedCount] = await User.update(
+                { tokens: literal(`tokens + ${Number(amount)}`) },
+                {
+                    where: amount < 0 ? { email: userEmail, tokens: { [Op.gte]: -amount } } : { email: userEmail },
+                    transaction
+                }
+            );
+            return affectedCount > 0;
+        } catch (error) {
+            // Handle errors by throwing a database error.
+            throw ErrorFactory.createError(ErrorType.DatabaseError);
+        }
+    },
+
     /**
      * Retrieves a user's information by their email.
      * @param userEmail The email of the user to retrieve.
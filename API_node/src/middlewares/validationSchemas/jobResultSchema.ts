@@ -39,46 +39,115 @@ const ObjectSchema = Joi.object({
 /**
  * Schema for validating frame data in video inference results.
  *
- * This schema ensures that each frame has a frame number, a list of detected objects, and a timestamp.
+ * This schema ensures that each frame has a frame number, a list of detected objects, and a timestamp,
+ * the motion gate decision of the frame when video frames are gated on motion, and its cascade decision when the
+ * job is cascaded.
  */
 const FrameSchema = Joi.object({
     frame_number: Joi.number().required(),
     objects: Joi.array().items(ObjectSchema).required(),
     time: Joi.number().required(),
+    motion_gate: Joi.string().valid('reused', 'region', 'full').optional(),
+    cascade: Joi.string().valid('accepted', 'escalated').optional(),
+});
+
+/**
+ * Schema for validating a tracked object in track-compressed video inference results.
+ *
+ * This schema ensures that each track has an id, a class, a mean confidence score, start and end frames, and segments
+ * of keyframes as [frame_number, x1, y1, x2, y2].
+ */
+const TrackSchema = Joi.object({
+    track_id: Joi.number().integer().required(),
+    name: Joi.string().required(),
+    class: Joi.number().required(),
+    confidence: Joi.number().required(),
+    start_frame: Joi.number().integer().required(),
+    end_frame: Joi.number().integer().required(),
+    segments: Joi.array().items(Joi.array().items(Joi.array().items(Joi.number()).length(5))).required(),
 });
 
 /**
  * Schema for validating the inference results.
  *
- * This schema ensures that each inference result includes a filename, content type, and either objects or frames data.
+ * This schema ensures that each inference result includes a filename, content type, and either objects, frames or
+ * tracks data. Track-compressed video results also include the frame rate, frame stride and number of predicted frames,
+ * and image results of cascaded jobs the cascade decision of the image.
  */
 const InferenceResultSchema = Joi.object({
     filename: Joi.string().required(),
     type: Joi.string().valid(...content_types).required(),
     objects: Joi.array().items(ObjectSchema).optional(),
     frames: Joi.array().items(FrameSchema).optional(),
-}).or('objects', 'frames'); // At least one of 'objects' or 'frames' should be present
+    tracks: Joi.array().items(TrackSchema).optional(),
+    fps: Joi.number().optional(),
+    vid_stride: Joi.number().integer().min(1).optional(),
+    predicted_frames: Joi.number().integer().min(0).optional(),
+    cascade: Joi.string().valid('accepted', 'escalated').optional(),
+}).or('objects', 'frames', 'tracks'); // At least one of 'objects', 'frames' or 'tracks' should be present
+
+/**
+ * Schema for validating the quality degradation applied to fit the latency budget of an inference.
+ *
+ * This schema ensures that the degradation level and the settings it applied are provided.
+ */
+const DegradationSchema = Joi.object({
+    latency_budget_s: Joi.number().allow(null).required(),
+    level: Joi.number().integer().min(0).required(),
+    model_version: Joi.string().required(),
+    imgsz: Joi.number().integer().required(),
+    vid_stride: Joi.number().integer().min(1).required(),
+});
+
+/**
+ * Schema for validating the cascade applied to an inference.
+ *
+ * This schema ensures that the model versions of the cascade and the number of frames predicted and escalated are
+ * provided.
+ */
+const CascadeSchema = Joi.object({
+    small_model_version: Joi.string().required(),
+    model_version: Joi.string().required(),
+    frames: Joi.number().integer().min(0).required(),
+    escalated_frames: Joi.number().integer().min(0).required(),
+});
 
 /**
  * Schema for validating inference-related metadata.
  *
  * This schema ensures that the metadata associated with an inference, such as CO2 emissions, energy consumption, 
- * dataset ID, and inference time, are correctly provided.
+ * dataset ID, inference time, quality degradation, cascade and scheduling priority class, are correctly provided.
  */
 const InferenceInformationSchema = Joi.object({
     CO2_emissions_kg: Joi.number().required(),
     consumed_energy_kWh: Joi.number().required(),
     dataset_id: Joi.number().required(),
     inference_time_s: Joi.number().required(),
+    degradation: DegradationSchema.optional(),
+    cascade: CascadeSchema.optional(),
+    priority: Joi.string().valid('high', 'normal', 'low').optional(),
+});
+
+/**
+ * Schema for validating the inference results of a model compared with the requested one.
+ *
+ * This schema ensures that the results of each compared model include its ID, version and list of inference results.
+ */
+const ModelResultSchema = Joi.object({
+    model_id: Joi.string().required(),
+    model_version: Joi.string().required(),
+    inference_results: Joi.array().items(InferenceResultSchema).required(),
 });
 
 /**
  * Main schema for validating the entire inference result data structure.
  *
- * This schema ensures that the inference result contains valid inference information and a list of inference results.
+ * This schema ensures that the inference result contains valid inference information, a list of inference results
+ * and, for jobs comparing several models, the inference results of each compared model.
  */
 export const ResultSchema = Joi.object({
     inference_information: InferenceInformationSchema.required(),
     inference_results: Joi.array().items(InferenceResultSchema).required(),
+    model_results: Joi.array().items(ModelResultSchema).optional(),
 });
 
@@ -45,7 +45,16 @@ export const tokensTopUpSchema = Joi.object({
 export const makeInferenceSchema = Joi.object({
     modelId: Joi.string().valid(...modelIds).required(),
     modelVersion: Joi.string().valid(...yolov8Versions).required(),
-    datasetName: Joi.string().min(VP.MIN_DATASET_NAME_LENGTH).max(VP.MAX_DATASET_NAME_LENGTH).required()
+    datasetName: Joi.string().min(VP.MIN_DATASET_NAME_LENGTH).max(VP.MAX_DATASET_NAME_LENGTH).required(),
+    latencyBudget: Joi.number().positive().optional(),
+    compareModels: Joi.array().items(Joi.object({
+        modelId: Joi.string().valid(...modelIds).required(),
+        modelVersion: Joi.string().valid(...yolov8Versions).required()
+    })).optional(),
+    resultFormat: Joi.string().valid('frames', 'tracks').optional(),
+    cascade: Joi.boolean().optional(),
+    annotationMode: Joi.string().valid('video', 'clips').optional(),
+    clipClasses: Joi.array().items(Joi.number().integer().min(0)).optional()
 });
 
 // Validation schema for the route that consents to get the status of a specified job
@@ -55,9 +64,33 @@ export const getJobStatusSchema = Joi.object({
 
 // Validation schema for the route that allows to get result of a specified job
 export const getJobResultSchema = Joi.object({
-    jobId: Joi.number().integer().required()
+    jobId: Joi.number().integer().required(),
+    expandTracks: Joi.boolean().optional()
 });
 
+// Validation schema for the route that allows to get a slice of the result of a specified job
+export const getJobResultSliceSchema = Joi.object({
+    jobId: Joi.number().integer().required(),
+    filename: Joi.string().optional(),
+    startFrame: Joi.number().integer().min(0).optional(),
+    endFrame: Joi.number().integer().min(0).optional(),
+    classes: Joi.array().items(Joi.number().integer().min(0)).optional(),
+    minConfidence: Joi.number().min(0).max(1).optional(),
+    modelId: Joi.string().valid(...modelIds).optional(),
+    modelVersion: Joi.string().valid(...yolov8Versions).optional()
+}).and('modelId', 'modelVersion');
+
+// Validation schema for the route that allows to query the aggregates of the result of a specified job
+export const getJobResultAggregatesSchema = Joi.object({
+    jobId: Joi.number().integer().required(),
+    filename: Joi.string().optional(),
+    kinds: Joi.array().items(Joi.string().valid('counts', 'timeseries', 'histograms', 'top_frames')).optional(),
+    classes: Joi.array().items(Joi.number().integer().min(0)).optional(),
+    interval: Joi.number().integer().min(1).optional(),
+    modelId: Joi.string().valid(...modelIds).optional(),
+    modelVersion: Joi.string().valid(...yolov8Versions).optional()
+}).and('modelId', 'modelVersion');
+
 // Validation scheme that allows a user to register
 export const loginSchema = Joi.object({
     email: Joi.string().email().required(),
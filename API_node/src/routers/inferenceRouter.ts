@@ -21,6 +21,8 @@ const userAuthorization = new AuthorizationMiddleware([Role.Admin, Role.User]);
 const inferenceValidation = new ValidationMiddleware(schema.makeInferenceSchema);
 const getStatusValidation = new ValidationMiddleware(schema.getJobStatusSchema);
 const getResultValidation = new ValidationMiddleware(schema.getJobResultSchema);
+const getResultSliceValidation = new ValidationMiddleware(schema.getJobResultSliceSchema);
+const getResultAggregatesValidation = new ValidationMiddleware(schema.getJobResultAggregatesSchema);
 
 /**
  * Default middlewares for all routes in this router. Each request first goes through the
@@ -38,4 +40,10 @@ router.get('/state', (req : Request, res : Response, next : NextFunction) => get
 //GET route to retrieve the result of an inference job
 router.get('/result', (req : Request, res : Response, next : NextFunction) => getResultValidation.handle(req, res, next), controller.getResult);
 
+//GET route to retrieve a slice of the result of an inference job, by file, frame range, classes or confidence
+router.get('/result/slice', (req : Request, res : Response, next : NextFunction) => getResultSliceValidation.handle(req, res, next), controller.getResultSlice);
+
+//GET route to query the aggregates of the result of an inference job: class counts, time series, histograms, top frames
+router.get('/result/aggregates', (req : Request, res : Response, next : NextFunction) => getResultAggregatesValidation.handle(req, res, next), controller.getResultAggregates);
+
 export default router;
\ No newline at end of file
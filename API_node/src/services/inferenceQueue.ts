@@ -5,10 +5,9 @@ import { Job, Queue, Worker, QueueEvents } from 'bullmq';  // Import classes for
 import RedisConnection from '../utils/redisConnection';    // Utility for managing Redis connections.
 import DatasetDAO from "../dao/datasetDao";                // Data access object for datasets.
 import { Dataset } from "../models/sequelize_model/Dataset";  // Sequelize model for datasets.
-import { checkTokenAvailability, updateTokenBalance } from "./tokenManagementService";  // Service functions for token management.
+import { deductTokensIfAvailable, refundTokens } from "./tokenManagementService";  // Service functions for token management.
 import ResultDAO from "../dao/resultDao";                  // Data access object for job results.
 import { BullJobStatus, JobStatus } from "../models/jobStatus";  // Types and enums for job status management.
-import { sequelize } from '../config/sequelize';           // Sequelize configuration and management.
 import { ApplicationError, ErrorFactory, ErrorType, InsufficientTokensError } from "../utils/errorFactory";  // Error handling utilities.
 import { sendUserMessage, MessageType } from '../websocket/websocketMessages';  // WebSocket messaging utilities.
 import { ModelId } from '../models/aiModels';  // Type definition for AI model identifiers.
@@ -28,7 +27,9 @@ import { ResultSchema } from '../middlewares/validationSchemas/jobResultSchema';
  *   and rollback in case of failures.
  *
  * It also provides:
- * - A method to add jobs to the queue, ensuring that they are processed in order (a FIFO policy is used).
+ * - A method to add jobs to the queue, which are started in order (a FIFO policy is used). Up to
+ *   INFERENCE_CONCURRENCY jobs run at a time, so that the Flask service can interleave their inference work in fair
+ *   share order across users instead of running them one after the other.
  * - Event listeners that update the job status in the database and inform users connected via websockets 
  *   about status changes of their jobs.
  *
@@ -46,7 +47,10 @@ class InferenceQueueService {
 
         // Initialize the queue, worker, and events for managing and processing jobs.
         this.inferenceQueue = new Queue('inferenceQueue', { connection: redisConnection });
-        this.worker = new Worker('inferenceQueue', this.processContents.bind(this), { connection: redisConnection });
+        this.worker = new Worker('inferenceQueue', this.processContents.bind(this), {
+            connection: redisConnection,
+            concurrency: Number(process.env.INFERENCE_CONCURRENCY) || 4  // Jobs sent to Flask at a time.
+        });
         this.setupEventListeners();  // Setup event listeners for job lifecycle management.
     }
 
@@ -66,52 +70,64 @@ class InferenceQueueService {
             throw ErrorFactory.createError(ErrorType.DatasetNotFound);  // Error if dataset is not found.
         }
 
-        // Validate if sufficient tokens are available to process the job.
-        if (!await checkTokenAvailability(job.data.userEmail, dataset.token_cost)) {
+        // Jobs comparing models run each distinct model on the dataset, and are charged its token cost per model.
+        const models = new Set([`${job.data.modelId}/${job.data.modelVersion}`, ...(job.data.compareModels ?? []).map(
+            (compared: { modelId: ModelId, modelVersion: string }) => `${compared.modelId}/${compared.modelVersion}`)]);
+        const tokenCost: number = Number(dataset.token_cost) * models.size;
+
+        // Deduct the tokens of the job with a single conditional update: up to INFERENCE_CONCURRENCY jobs of the same
+        // user run at a time, and each of them could spend a balance checked before it is deducted. The deduction is
+        // not held in a transaction for the duration of the job, which would lock the user row and run the jobs of a
+        // user one after the other; the tokens are refunded if the job fails instead.
+        if (!await deductTokensIfAvailable(job.data.userEmail, tokenCost)) {
             throw new InsufficientTokensError(`Insufficient tokens to process job ${job.id}`);
         }
 
-        // Perform token update and job processing inside a transaction.
-        await sequelize.transaction(async (transaction) => {
-
-            await updateTokenBalance(job.data.userEmail, -dataset.token_cost, transaction);  // Deduct tokens.
-
-            try {
-                // External API call to a Flask server for processing.
-                const response = await fetch(process.env.FLASK_PREDICTION_URL || "http://flask:5000/predict", {
-                    method: "POST",
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        dataset_id: dataset.dataset_id,
-                        job_id: job.id,
-                        model_id: job.data.modelId,
-                        model_version: job.data.modelVersion
-                    }),
-                });
-
-                // Check if the API call was successful.
-                if (!response.ok) {
-                    throw Error
-                }
-
-                // Update the job result in the database after successful processing.
-                const responseData = await response.json();
-
-                // Checks if the json structure is as expected
-                const { error } = ResultSchema.validate(responseData);
-                if (error) {
-                    throw Error
-                }
-                ResultDAO.updateJobResult(job.id!, JSON.stringify(responseData));
-
-            } catch (error) {
-                if (error instanceof ApplicationError) {
-                    throw error;
-                } else {
-                    throw ErrorFactory.createError(ErrorType.Generic, "An error occurred while processing the job");
-                }
+        try {
+            // External API call to a Flask server for processing.
+            const response = await fetch(process.env.FLASK_PREDICTION_URL || "http://flask:5000/predict", {
+                method: "POST",
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    dataset_id: dataset.dataset_id,
+                    job_id: job.id,
+                    model_id: job.data.modelId,
+                    model_version: job.data.modelVersion,
+                    latency_budget_s: job.data.latencyBudget,
+                    compare_models: job.data.compareModels?.map((compared: { modelId: ModelId, modelVersion: string }) => ({
+                        model_id: compared.modelId,
+                        model_version: compared.modelVersion
+                    })),
+                    result_format: job.data.resultFormat,
+                    cascade: job.data.cascade,
+                    annotation_mode: job.data.annotationMode,
+                    clip_classes: job.data.clipClasses
+                }),
+            });
+
+            // Check if the API call was successful.
+            if (!response.ok) {
+                throw Error
             }
-        });
+
+            // Update the job result in the database after successful processing.
+            const responseData = await response.json();
+
+            // Checks if the json structure is as expected
+            const { error } = ResultSchema.validate(responseData);
+            if (error) {
+                throw Error
+            }
+            ResultDAO.updateJobResult(job.id!, JSON.stringify(responseData));
+
+        } catch (error) {
+            await refundTokens(job.data.userEmail, tokenCost);  // Refund the tokens of the failed job.
+            if (error instanceof ApplicationError) {
+                throw error;
+            } else {
+                throw ErrorFactory.createError(ErrorType.Generic, "An error occurred while processing the job");
+            }
+        }
     }
 
     // Setup BullMQ worker event listeners to manage job status and notifications.
@@ -138,8 +154,8 @@ class InferenceQueueService {
     }
 
     // Add a job to the inference queue.
-    public async addJobToQueue(datasetName: string, userEmail: string, modelId: ModelId, modelVersion: string): Promise<Job> {
-        const job: Job = await this.inferenceQueue.add('processRequest', { datasetName, userEmail, modelId, modelVersion });
+    public async addJobToQueue(datasetName: string, userEmail: string, modelId: ModelId, modelVersion: string, latencyBudget?: number, compareModels?: { modelId: ModelId, modelVersion: string }[], resultFormat?: string, cascade?: boolean, annotationMode?: string, clipClasses?: number[]): Promise<Job> {
+        const job: Job = await this.inferenceQueue.add('processRequest', { datasetName, userEmail, modelId, modelVersion, latencyBudget, compareModels, resultFormat, cascade, annotationMode, clipClasses });
         return job;
     }
 }
@@ -13,6 +13,7 @@ import ResultDAO from "../dao/resultDao";               // Data access object fo
 import { ModelId } from "../models/aiModels";           // Type definition for AI model IDs.
 import { Result } from "../models/sequelize_model/Result";      // Sequelize model for results.
 import { ApplicationError, ErrorFactory, ErrorType } from "../utils/errorFactory";  // Utilities for error handling.
+import { expandJobTracks } from "../utils/trackFrames";      // Reconstruction of the frames of track-compressed video results.
 import InferenceQueueService from "./inferenceQueue";   // Service for managing inference jobs in a queue.
 
 /**
@@ -49,13 +50,29 @@ class InferenceService {
      * @param userEmail The email of the user requesting the inference.
      * @param modelId The ID of the model to use for inference.
      * @param modelVersion The version of the model to use for inference.
+     * @param latencyBudget The optional latency budget of the job in seconds, the inference quality is degraded to fit it.
+     * @param compareModels The optional models run on the same decoded dataset, with results returned per model. The job
+     *                      is charged the token cost of the dataset once per distinct model.
+     * @param resultFormat The optional format of video results, 'frames' for the objects of each frame or 'tracks'
+     *                     for the tracked objects with their keyframed trajectories.
+     * @param cascade The optional cascade flag, the smaller model version predicts every file first and only the
+     *                uncertain images and frames are predicted again by the requested version.
+     * @param annotationMode The optional annotated output of videos, 'video' for the full annotated videos or 'clips'
+     *                       for annotated clips around the frames with detections, indexed by time range.
+     * @param clipClasses The optional classes of the detections starting clips, any class if not provided.
      * @returns The job ID.
      */
     public async requestDatasetInference(
         datasetName: string,
         userEmail: string,
         modelId: ModelId,
-        modelVersion: string
+        modelVersion: string,
+        latencyBudget?: number,
+        compareModels?: { modelId: ModelId, modelVersion: string }[],
+        resultFormat?: string,
+        cascade?: boolean,
+        annotationMode?: string,
+        clipClasses?: number[]
     ): Promise<string | undefined> {
         
         // Retrieve dataset by name and user email.
@@ -66,7 +83,7 @@ class InferenceService {
 
         try {
             // Add the inference job to the queue.
-            const job: Job = await this.inferenceQueue.addJobToQueue(datasetName, userEmail, modelId, modelVersion);
+            const job: Job = await this.inferenceQueue.addJobToQueue(datasetName, userEmail, modelId, modelVersion, latencyBudget, compareModels, resultFormat, cascade, annotationMode, clipClasses);
             // Create a job entry in the database.
             ResultDAO.createJob(job.id!, JobStatus.Pending, modelId, modelVersion, dataset.dataset_id);
             return job.id;
@@ -97,20 +114,99 @@ class InferenceService {
      * Retrieves the result of a completed job.
      * @param jobId The ID of the job whose result is to be retrieved.
      * @param userEmail The email of the user who made the request.
+     * @param expandTracks Whether to reconstruct the frames of track-compressed video results.
      * @returns The result of the job.
      */
-    public async getJobResult(jobId: string, userEmail: string): Promise<IResult> {
+    public async getJobResult(jobId: string, userEmail: string, expandTracks?: boolean): Promise<IResult> {
         const job: Result | null = await this.getUserJob(jobId, userEmail);
         if (job.state !== JobStatus.Completed || !job.result) {
             throw ErrorFactory.createError(ErrorType.JobNotCompletedError);
         }
 
         // Parse the result JSON and construct the URI for the content.
-        const jsonResult = JSON.parse(job.result);
+        const jsonResult = expandTracks ? expandJobTracks(JSON.parse(job.result)) : JSON.parse(job.result);
         const uri = `user/uploads/${job.dataset_id}/annotated_files/${job.job_id}`;
         return { jsonResult: jsonResult, contentURI: uri } as IResult;
     }
 
+    /**
+     * Retrieves a slice of the result of a completed job from the Flask service, which reads it from the indexed
+     * result file of the job without loading the whole result.
+     * @param jobId The ID of the job whose result slice is to be retrieved.
+     * @param userEmail The email of the user who made the request.
+     * @param slice The optional name of the file, first and last frame numbers (included), classes and minimum
+     *              confidence of the detections of the slice, and the model and version of a compared model whose
+     *              results are sliced instead of those of the requested model.
+     * @returns The results of each file of the slice.
+     */
+    public async getJobResultSlice(
+        jobId: string,
+        userEmail: string,
+        slice: { filename?: string, startFrame?: number, endFrame?: number, classes?: number[], minConfidence?: number, modelId?: ModelId, modelVersion?: string }
+    ): Promise<any> {
+        const job: Result | null = await this.getUserJob(jobId, userEmail);
+        if (job.state !== JobStatus.Completed) {
+            throw ErrorFactory.createError(ErrorType.JobNotCompletedError);
+        }
+
+        // Query parameters of the slice, only those provided.
+        const params = new URLSearchParams();
+        if (slice.filename !== undefined) params.set('filename', slice.filename);
+        if (slice.startFrame !== undefined) params.set('start_frame', String(slice.startFrame));
+        if (slice.endFrame !== undefined) params.set('end_frame', String(slice.endFrame));
+        if (slice.classes !== undefined) params.set('classes', slice.classes.join(','));
+        if (slice.minConfidence !== undefined) params.set('min_confidence', String(slice.minConfidence));
+        if (slice.modelId !== undefined) params.set('model_id', slice.modelId);
+        if (slice.modelVersion !== undefined) params.set('model_version', slice.modelVersion);
+
+        const response = await fetch(`${process.env.FLASK_RESULTS_URL || "http://flask:5000/results"}/${job.job_id}?${params}`);
+        if (response.status === 404) {
+            throw ErrorFactory.createError(ErrorType.JobNotFoundError, "No results found for the requested slice");
+        }
+        if (!response.ok) {
+            throw ErrorFactory.createError(ErrorType.Generic, "An error occurred while retrieving the result slice");
+        }
+        return await response.json();
+    }
+
+    /**
+     * Retrieves the aggregates of the result of a completed job from the Flask service, which answers the query from
+     * the aggregates maintained while the job ran, without rescanning its detections.
+     * @param jobId The ID of the job whose aggregates are to be retrieved.
+     * @param userEmail The email of the user who made the request.
+     * @param query The optional name of the file, kinds of aggregates, classes and time series interval in seconds,
+     *              and the model and version of a compared model whose aggregates are queried.
+     * @returns The requested aggregates of the job or file.
+     */
+    public async getJobResultAggregates(
+        jobId: string,
+        userEmail: string,
+        query: { filename?: string, kinds?: string[], classes?: number[], interval?: number, modelId?: ModelId, modelVersion?: string }
+    ): Promise<any> {
+        const job: Result | null = await this.getUserJob(jobId, userEmail);
+        if (job.state !== JobStatus.Completed) {
+            throw ErrorFactory.createError(ErrorType.JobNotCompletedError);
+        }
+
+        // Query parameters of the aggregation, only those provided.
+        const params = new URLSearchParams();
+        if (query.filename !== undefined) params.set('filename', query.filename);
+        if (query.kinds !== undefined) params.set('kinds', query.kinds.join(','));
+        if (query.classes !== undefined) params.set('classes', query.classes.join(','));
+        if (query.interval !== undefined) params.set('interval', String(query.interval));
+        if (query.modelId !== undefined) params.set('model_id', query.modelId);
+        if (query.modelVersion !== undefined) params.set('model_version', query.modelVersion);
+
+        const response = await fetch(`${process.env.FLASK_RESULTS_URL || "http://flask:5000/results"}/${job.job_id}/aggregates?${params}`);
+        if (response.status === 404) {
+            throw ErrorFactory.createError(ErrorType.JobNotFoundError, "No aggregates found for the requested job");
+        }
+        if (!response.ok) {
+            throw ErrorFactory.createError(ErrorType.Generic, "An error occurred while retrieving the result aggregates");
+        }
+        return await response.json();
+    }
+
     /**
      * Retrieves the job state along with the result if the job is completed.
      * @param jobId The ID of the job whose state is to be retrieved.
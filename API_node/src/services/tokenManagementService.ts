@@ -46,6 +46,38 @@ const updateTokenBalance = async (userEmail: string, tokenFlowAmount: number, tr
     return updatedUser.tokens;
 };
 
+/**
+ * Deducts a cost from the token balance of a user if the balance covers it, checked and updated atomically so that
+ * concurrent jobs of the same user can not be charged from the same tokens.
+ * @param userEmail The email of the user to charge.
+ * @param token_cost The cost in tokens to deduct.
+ * @returns A Promise that resolves to a boolean indicating if the tokens were deducted.
+ * @throws Will throw an error if the user cannot be found.
+ */
+const deductTokensIfAvailable = async (userEmail: string, token_cost: number): Promise<boolean> => {
+    if (await userDao.addTokensByEmail(userEmail, -token_cost)) {
+        return true;
+    }
+    const user: User | null = await userDao.getUserByEmail(userEmail);
+    if (!user) {
+        throw ErrorFactory.createError(ErrorType.UserNotFound);
+    }
+    return false;
+};
+
+/**
+ * Refunds tokens previously deducted from the token balance of a user, atomically.
+ * @param userEmail The email of the user to refund.
+ * @param token_cost The cost in tokens to refund.
+ * @returns A Promise that resolves once the tokens are refunded.
+ * @throws Will throw an error if the user cannot be found.
+ */
+const refundTokens = async (userEmail: string, token_cost: number): Promise<void> => {
+    if (!await userDao.addTokensByEmail(userEmail, token_cost)) {
+        throw ErrorFactory.createError(ErrorType.UserNotFound);
+    }
+};
+
 /**
  * Retrieves the current token balance of a user.
  * @param userEmail The email of the user whose token balance is to be retrieved.
@@ -60,4 +92,4 @@ const getTokenBalance = async (userEmail: string): Promise<number> => {
     return user.tokens;
 };
 
-export { checkTokenAvailability, updateTokenBalance, getTokenBalance };
+export { checkTokenAvailability, updateTokenBalance, deductTokensIfAvailable, refundTokens, getTokenBalance };
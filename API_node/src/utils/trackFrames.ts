@@ -0,0 +1,88 @@
+/**
+ * @fileoverview This file reconstructs the per-frame view of track-compressed video results.
+ *
+ * Video results requested with the `tracks` result format store each tracked object once, with a keyframed box
+ * trajectory split into segments where the object was not lost. Boxes between two keyframes of a segment are
+ * linearly interpolated, as done by the inference service when compressing the tracks.
+ */
+
+// A keyframe of a track segment, as [frame_number, x1, y1, x2, y2]
+type Keyframe = [number, number, number, number, number];
+
+interface Track {
+    track_id: number;
+    name: string;
+    class: number;
+    confidence: number;
+    start_frame: number;
+    end_frame: number;
+    segments: Keyframe[][];
+}
+
+/**
+ * Interpolates the box of a track segment at a frame between its two surrounding keyframes.
+ * @param segment The keyframes of the segment, ordered by frame number.
+ * @param frameNumber The frame number, between the first and last keyframes of the segment.
+ * @returns The interpolated box.
+ */
+function interpolateBox(segment: Keyframe[], frameNumber: number) {
+    let i = 0;
+    while (i < segment.length - 2 && segment[i + 1][0] < frameNumber) {
+        i++;
+    }
+    const start = segment[i];
+    const end = segment[Math.min(i + 1, segment.length - 1)];
+    const t = end[0] === start[0] ? 0 : (frameNumber - start[0]) / (end[0] - start[0]);
+    const [x1, y1, x2, y2] = [1, 2, 3, 4].map((k) => start[k] + t * (end[k] - start[k]));
+    return { x1, y1, x2, y2 };
+}
+
+/**
+ * Reconstructs the frames of a track-compressed video result, in the format of per-frame video results.
+ * @param videoResult The video result with its tracks.
+ * @returns The video result with all predicted frames and the objects of each frame, with their track id.
+ */
+function expandTracks(videoResult: any) {
+    const { fps, vid_stride: vidStride, predicted_frames: predictedFrames } = videoResult;
+    const frames = Array.from({ length: predictedFrames }, (_, i) => ({
+        frame_number: i * vidStride,
+        time: Math.round(i * vidStride / fps * 100) / 100,
+        objects: [] as object[]
+    }));
+    for (const track of videoResult.tracks as Track[]) {
+        for (const segment of track.segments) {
+            for (let frameNumber = segment[0][0]; frameNumber <= segment[segment.length - 1][0]; frameNumber += vidStride) {
+                frames[frameNumber / vidStride]?.objects.push({
+                    name: track.name,
+                    class: track.class,
+                    confidence: track.confidence,
+                    box: interpolateBox(segment, frameNumber),
+                    track_id: track.track_id
+                });
+            }
+        }
+    }
+    return { type: videoResult.type, filename: videoResult.filename, frames: frames };
+}
+
+/**
+ * Reconstructs the per-frame view of all track-compressed video results of a job result, including the results of
+ * compared models. Other results are returned unchanged.
+ * @param jsonResult The job result, as returned by the inference service.
+ * @returns The job result with per-frame video results.
+ */
+function expandJobTracks(jsonResult: any) {
+    const expand = (results: any[]) => results.map((result) => result.tracks ? expandTracks(result) : result);
+    return {
+        ...jsonResult,
+        inference_results: expand(jsonResult.inference_results || []),
+        ...(jsonResult.model_results && {
+            model_results: jsonResult.model_results.map((modelResult: any) => ({
+                ...modelResult,
+                inference_results: expand(modelResult.inference_results)
+            }))
+        })
+    };
+}
+
+export { expandTracks, expandJobTracks };
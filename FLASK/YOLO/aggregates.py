@@ -0,0 +1,211 @@
+"""
+This module maintains streaming aggregates of the detections of a job, updated as each image and frame is predicted,
+and answers aggregation queries from them without rescanning the detections.
+
+For the job and for each of its files, the aggregates hold the number of frames and of frames with detections, the
+number of detections of each class and a histogram of their confidences with Config.AGGREGATE_HISTOGRAM_BINS bins
+over [0, 1]. Videos also hold the number of detections of each class per second of video, and the job and each file
+the Config.AGGREGATE_TOP_FRAMES frames with the most detections. The aggregates of a job are saved next to its result
+file, in `/user/uploads/<dataset_id>/results/<job_id>/aggregates.json`, and those of each compared model next to its
+result file. Aggregates count the detections of each frame as predicted: for track-compressed videos, they include
+the detections the tracker does not confirm as tracks.
+
+Constants:
+    AGGREGATE_KINDS (tuple): Kinds of aggregates answered by queries.
+
+Classes:
+    JobAggregates: Streaming aggregates of the detections of a job and of each of its files.
+
+Functions:
+    - save_aggregates(directory, aggregates): Saves the aggregates of a job.
+    - query_aggregates(directory, filename, kinds, classes, interval): Answers an aggregation query on a job.
+"""
+
+import heapq
+import json
+import os
+
+import numpy as np
+from config import Config, logger
+
+# Kinds of aggregates answered by queries
+AGGREGATE_KINDS = ('counts', 'timeseries', 'histograms', 'top_frames')
+
+
+class _Aggregates:
+    """Streaming aggregates of the detections of a file or a job."""
+
+    def __init__(self, nc, bins):
+        """Initialize empty aggregates for `nc` classes and confidence histograms of `bins` bins."""
+        self.frames = 0
+        self.frames_with_detections = 0
+        self.counts = np.zeros(nc, dtype=np.int64)
+        self.histograms = np.zeros((nc, bins), dtype=np.int64)
+        self.series = np.zeros((0, nc), dtype=np.int64)  # detections of each class per second, videos only
+        self.top = []  # min-heap of the frames with the most detections, as (detections, -order, frame)
+
+    def update(self, counts, bins, second, frame, top_k):
+        """Adds the class counts and confidence bins of the detections of a frame."""
+        self.frames += 1
+        self.frames_with_detections += bool(len(bins[0]))
+        self.counts += counts
+        np.add.at(self.histograms, bins, 1)
+        if second is not None:
+            if second >= len(self.series):
+                padding = np.zeros((second + 1 - len(self.series), self.series.shape[1]), dtype=np.int64)
+                self.series = np.concatenate((self.series, padding))
+            self.series[second] += counts
+        item = (int(counts.sum()), -self.frames, frame)
+        if len(self.top) < top_k:
+            heapq.heappush(self.top, item)
+        elif top_k:
+            heapq.heappushpop(self.top, item)
+
+    def todict(self):
+        """Returns the aggregates as a JSON serializable dict, with the series and histograms of detected classes."""
+        detected = np.flatnonzero(self.counts).tolist()
+        return {
+            'frames': self.frames,
+            'frames_with_detections': self.frames_with_detections,
+            'counts': {c: int(self.counts[c]) for c in detected},
+            'histograms': {c: self.histograms[c].tolist() for c in detected},
+            'series': {c: self.series[:, c].tolist() for c in detected} if len(self.series) else None,
+            'top_frames': [frame for *_, frame in sorted(self.top, reverse=True)],
+        }
+
+
+class JobAggregates:
+    """
+    Streaming aggregates of the detections of a job and of each of its files, updated frame by frame.
+
+    Attributes:
+        names (dict): Class names of the model.
+        bins (int): Number of bins of the confidence histograms.
+        top_k (int): Number of frames with the most detections kept.
+        job (_Aggregates): Aggregates of the whole job.
+        files (dict): Aggregates of each file, by file name.
+    """
+
+    def __init__(self, names, bins=None, top_k=None):
+        """
+        Initialize the empty aggregates of a job.
+
+        Args:
+            names (dict): Class names of the model.
+            bins (int, optional): Number of bins of the confidence histograms, Config.AGGREGATE_HISTOGRAM_BINS if None.
+            top_k (int, optional): Number of frames with the most detections kept, Config.AGGREGATE_TOP_FRAMES if None.
+        """
+        self.names = names
+        self.bins = Config.AGGREGATE_HISTOGRAM_BINS if bins is None else bins
+        self.top_k = Config.AGGREGATE_TOP_FRAMES if top_k is None else top_k
+        self.job = _Aggregates(len(names), self.bins)
+        self.files = {}
+
+    def update(self, filename, result, frame_number=0, time=None):
+        """
+        Adds the detections of an image or frame.
+
+        Args:
+            filename (str): Name of the file of the frame.
+            result (Results): Results of the frame.
+            frame_number (int): Number of the frame in the video, 0 for an image.
+            time (float, optional): Time of the frame in seconds, None for an image.
+        """
+        boxes = result.boxes
+        cls = boxes.cls.cpu().numpy().astype(np.int64) if boxes is not None else np.zeros(0, dtype=np.int64)
+        conf = boxes.conf.cpu().numpy() if boxes is not None else np.zeros(0)
+        counts = np.bincount(cls, minlength=len(self.names))
+        bins = (cls, np.clip((conf * self.bins).astype(np.int64), 0, self.bins - 1))
+        second = int(time) if time is not None else None
+        file = self.files.get(filename)
+        if file is None:
+            file = self.files[filename] = _Aggregates(len(self.names), self.bins)
+        frame = {'filename': filename, 'frame_number': frame_number, 'time': time, 'detections': len(cls)}
+        file.update(counts, bins, second, frame, self.top_k)
+        self.job.update(counts, bins, None, frame, self.top_k)
+
+    def todict(self):
+        """Returns the aggregates of the job and of each file as a JSON serializable dict."""
+        return {
+            'names': {int(k): v for k, v in self.names.items()},
+            'bins': self.bins,
+            'job': self.job.todict(),
+            'files': {filename: file.todict() for filename, file in self.files.items()},
+        }
+
+
+def save_aggregates(directory, aggregates):
+    """
+    Saves the aggregates of a job, replacing any previous ones.
+
+    Args:
+        directory (str): Directory of the result file of the job or compared model, from `result_files.get_results_dir`.
+        aggregates (JobAggregates): Aggregates of the job.
+
+    Returns:
+        None
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, f'aggregates.{os.getpid()}.tmp.json')
+        with open(tmp, 'w') as f:
+            json.dump(aggregates.todict(), f)
+        os.replace(tmp, os.path.join(directory, 'aggregates.json'))
+    except Exception as e:
+        logger.error("Failed to save the aggregates in %s: %s", directory, str(e))
+
+
+def query_aggregates(directory, filename=None, kinds=None, classes=None, interval=1):
+    """
+    Answers an aggregation query on a job, from its saved aggregates.
+
+    Args:
+        directory (str): Directory of the result file of the job or compared model, from `result_files.get_results_dir`.
+        filename (str, optional): Name of the file to aggregate, the whole job if None.
+        kinds (Iterable[str], optional): Kinds of aggregates returned, from AGGREGATE_KINDS, all kinds if None.
+        classes (Iterable[int], optional): Classes aggregated, all classes if None.
+        interval (int): Number of seconds per step of the time series.
+
+    Returns:
+        dict: For each kind, 'counts' the number of frames, frames with detections and detections of each class,
+        'timeseries' the detections of each class per interval of a video file, None for images and the whole job,
+        'histograms' the confidence histogram of each class with its bin edges and 'top_frames' the frames with the
+        most detections.
+
+    Raises:
+        FileNotFoundError: If the job has no aggregates, or no file of that name.
+    """
+    with open(os.path.join(directory, 'aggregates.json')) as f:
+        saved = json.load(f)
+    if filename is not None and filename not in saved['files']:
+        raise FileNotFoundError(f'No aggregates for file {filename}')
+    aggregates = saved['job'] if filename is None else saved['files'][filename]
+    names = {int(k): v for k, v in saved['names'].items()}
+    selected = [int(c) for c in aggregates['counts'] if classes is None or int(c) in classes]
+
+    answer = {}
+    for kind in kinds or AGGREGATE_KINDS:
+        if kind == 'counts':
+            answer[kind] = {
+                'frames': aggregates['frames'],
+                'frames_with_detections': aggregates['frames_with_detections'],
+                'detections': sum(aggregates['counts'][str(c)] for c in selected),
+                'classes': [{'class': c, 'name': names[c], 'count': aggregates['counts'][str(c)]} for c in selected],
+            }
+        elif kind == 'timeseries':
+            series = aggregates['series']
+            steps = None if series is None else range(0, len(next(iter(series.values()), [])), interval)
+            answer[kind] = None if series is None else {
+                'interval_s': interval,
+                'classes': [{'class': c, 'name': names[c], 'counts': np.add.reduceat(series[str(c)], steps).tolist()}
+                            for c in selected],
+            }
+        elif kind == 'histograms':
+            answer[kind] = {
+                'bin_edges': np.linspace(0, 1, saved['bins'] + 1).round(6).tolist(),
+                'classes': [{'class': c, 'name': names[c], 'counts': aggregates['histograms'][str(c)]}
+                            for c in selected],
+            }
+        elif kind == 'top_frames':
+            answer[kind] = aggregates['top_frames']
+    return answer
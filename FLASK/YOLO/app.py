@@ -18,6 +18,10 @@ Key Components:
     and applying the appropriate model to generate predictions and annotations.
   - Saves annotated media and returns a comprehensive response that includes prediction results, as well as 
     environmental impact metrics.
+- **Results Slice Endpoint**: Defines a `/results/<job_id>` route that handles GET requests for a slice of the
+  saved results of a job.
+- **Aggregates Endpoint**: Defines a `/results/<job_id>/aggregates` route that handles GET requests for aggregation
+  queries on the saved results of a job.
 """
 import os
 
@@ -28,9 +32,15 @@ from codecarbon import EmissionsTracker
 from config import Config, logger
 from models import db
 from processing import (get_annotated_image, get_annotated_video, 
-                        get_image_text_result, get_video_text_result)
-from utils import get_file_category
-from validation import validate_request_params
+                        get_image_text_result, get_video_text_result, get_multi_model_result)
+from aggregates import JobAggregates, query_aggregates, save_aggregates
+from cascade import Cascade
+from degradation import DegradationPolicy
+from result_files import get_results_dir, read_results, save_results
+from scheduler import Job, job_context, priority_class
+from utils import get_file_category, get_frame_count
+from video_chunks import get_chunked_video_result, is_chunked_video
+from validation import validate_aggregate_params, validate_request_params, validate_slice_params
 
 
 # Load environment variables from .env file
@@ -51,6 +61,15 @@ def predict():
     """
     Handles the POST request for predictions. Validates parameters, 
     generates, save and load results.
+
+    The inference work of the job is scheduled in weighted fair share order with the jobs of other users, with a
+    priority class set by the token cost of its dataset. Each file is degraded if needed to fit the optional latency
+    budget of the job, and predicted in one pass with the optional compared models. With `cascade: true`, the
+    smaller version of the model predicts each file first and the requested version only the uncertain images and
+    frames. Videos are returned as the objects of each frame or, with `result_format: tracks`, as keyframed tracks,
+    and annotated as full videos or, with `annotation_mode: clips`, as clips around their detections. The results
+    and aggregates of the job and of each compared model are saved in indexed result files, see `result_files` and
+    `aggregates`. Emissions are measured for the whole machine, so they include the jobs running concurrently.
     """
     logger.debug("Received POST request at /predict.")
 
@@ -60,7 +79,8 @@ def predict():
     if validation_response['error']:
         return jsonify({'error': validation_response['error']}), validation_response['status_code']
 
-    # Start tracking emissions and energy consumption for the prediction process
+    # Start tracking emissions and energy consumption for the prediction process. The tracker measures the whole
+    # machine: the figures of jobs running concurrently each include the consumption of the others while they run
     tracker = EmissionsTracker()
     tracker.start()
 
@@ -69,13 +89,19 @@ def predict():
     model_id = validation_response['model_id']
     model_version = validation_response['model_version']
     dataset_id = validation_response['dataset_id']
-    model = validation_response['model']
+    model_category = validation_response['model_category']
+    latency_budget = validation_response['latency_budget']
+    compare_models = validation_response['compare_models']
+    result_format = validation_response['result_format']
+    cascade = Cascade(model_category, model_version) if validation_response['cascade'] else None
+    annotation_mode = validation_response['annotation_mode']
+    clip_classes = validation_response['clip_classes']
 
-    logger.debug("Job ID: %s, Model ID: %s, Model Version: %s, Dataset ID: %s"
-                 , job_id, model_id, model_version, dataset_id)
+    logger.debug("Job ID: %s, Model ID: %s, Model Version: %s, Dataset ID: %s, Latency budget: %s"
+                 , job_id, model_id, model_version, dataset_id, latency_budget)
 
     # Define the path to the original images directory for the specified dataset
-    directory_path = os.path.join('/user/uploads', str(dataset_id), 'original_files')
+    directory_path = os.path.join(Config.UPLOADS_BASE_DIR, str(dataset_id), 'original_files')
     logger.debug("Original images to directory path : %s", directory_path)
 
     # Check if the directory with original images exists
@@ -86,38 +112,90 @@ def predict():
     # List to store results
     results_list = []
 
+    # Lists to store the results of each compared model
+    model_results = [{'model_id': compared_id, 'model_version': compared_version, 'inference_results': []}
+                     for compared_id, compared_version, _ in compare_models]
+
     # Define the path to save annotated images and videos
-    annotated_images_dir = os.path.join('/user/uploads', str(dataset_id), 
+    annotated_images_dir = os.path.join(Config.UPLOADS_BASE_DIR, str(dataset_id), 
                                         'annotated_files', str(job_id))
     
     # Create the annotated images directory if it does not exist
     os.makedirs(annotated_images_dir, exist_ok=True)
 
-    # Process each file in the original images directory
+    # List the files of the original images directory with their category (image or video)
+    files = []
     for file in os.listdir(directory_path):
         file_path = os.path.join(directory_path, file)
-        logger.debug("Processing file: %s", file_path)
 
         # Check if the current path is a file
         if os.path.isfile(file_path):
-            logger.debug("File found: %s", file_path)
-
-            # Get the file category (image or video)
             category = get_file_category(file_path)
-            logger.debug("File category: %s", category)
+            logger.debug("File found: %s, category: %s", file_path, category)
+            files.append((file_path, category, get_frame_count(file_path, category)))
+
+    # Aggregates of the detections of the job and of each compared model, updated as each image and frame is predicted
+    aggregates = JobAggregates(model_category[model_version].names)
+    model_aggregates = [JobAggregates(compared.names) for _, _, compared in compare_models]
+
+    # Policy selecting the model and quality of each file to fit the latency budget of the job
+    policy = DegradationPolicy(model_category, model_version, latency_budget, sum(n for _, _, n in files))
+
+    # Process each file, the work units of the job are scheduled under its user and priority class
+    job = Job(job_id, validation_response['user'], priority_class(validation_response['token_cost']))
+    with job_context(job):
+        for file_path, category, frame_count in files:
+            logger.debug("Processing file: %s", file_path)
+            if category not in ('image', 'video'):
+                continue
+            model, imgsz, vid_stride = policy.select(frame_count)
+
+            # Files degraded to the smaller model version are not cascaded
+            file_cascade = cascade if cascade is not None and cascade.applies(model) else None
 
-            if category == 'image':
-                results_list.extend(get_image_text_result(file_path, model))
-                get_annotated_image(file_path, model, dataset_id, job_id)
+            if compare_models:
+                # The file is decoded once for all models, annotated files of compared models are saved in a
+                # subdirectory named after the model
+                models = [(model, annotated_images_dir)] + [
+                    (compared, os.path.join(annotated_images_dir, f'{compared_id}_{compared_version}'))
+                    for compared_id, compared_version, compared in compare_models]
+                file_results = get_multi_model_result(file_path, category, models, imgsz, vid_stride,
+                                                      [aggregates] + model_aggregates)
+                results_list.extend(file_results[0])
+                for compared_results, results in zip(model_results, file_results[1:]):
+                    compared_results['inference_results'].extend(results)
 
-            elif category == 'video':
-                video_result = get_video_text_result(file_path, model)
+            elif category == 'image':
+                results_list.extend(get_image_text_result(file_path, model, imgsz, file_cascade, aggregates))
+                get_annotated_image(file_path, model, dataset_id, job_id, imgsz, file_cascade)
+
+            elif file_cascade is None and is_chunked_video(file_path):
+                # Long videos are predicted in parallel segments, annotated in the same pass, cascaded videos are
+                # predicted by the batch predictors of both model versions instead
+                results_list.extend(get_chunked_video_result(file_path, model, dataset_id, job_id, imgsz, vid_stride,
+                                                             result_format, aggregates, annotation_mode, clip_classes))
+
+            else:
+                video_result = get_video_text_result(file_path, model, imgsz, vid_stride, result_format, file_cascade,
+                                                     aggregates)
                 if video_result and isinstance(video_result, list):
                     results_list.extend(video_result)  
                 else:
                     logger.error(f"Failed to process video: {file_path}")
-                get_annotated_video(file_path, model, dataset_id, job_id)
+                get_annotated_video(file_path, model, dataset_id, job_id, imgsz, vid_stride, file_cascade,
+                                    annotation_mode, clip_classes)
    
+    # Save the results of the job in its indexed result file, read by slices with /results/<job_id>, and its
+    # aggregates, queried with /results/<job_id>/aggregates
+    save_results(get_results_dir(dataset_id, job_id), results_list, model_category[model_version].names)
+    save_aggregates(get_results_dir(dataset_id, job_id), aggregates)
+    for (compared_id, compared_version, compared), compared_results, compared_aggregates in zip(
+            compare_models, model_results, model_aggregates):
+        # The results of compared models are read with their model_id and model_version
+        directory = get_results_dir(dataset_id, job_id, f'{compared_id}_{compared_version}')
+        save_results(directory, compared_results['inference_results'], compared.names)
+        save_aggregates(directory, compared_aggregates)
+
     tracker.stop()
 
     emissions_data = tracker.final_emissions_data
@@ -130,13 +208,61 @@ def predict():
             'CO2_emissions_kg': emissions_data.emissions,  
             'consumed_energy_kWh': emissions_data.energy_consumed, 
             'inference_time_s': emissions_data.duration,  
+            'degradation': policy.report(),
+            'priority': job.priority,
         },
         'inference_results': results_list
     }
+    if cascade is not None:
+        results_with_emissions['inference_information']['cascade'] = cascade.report()
+    if compare_models:
+        results_with_emissions['model_results'] = model_results
 
     results_json = jsonify(results_with_emissions)
     
     return results_json, 200
 
+
+@app.route('/results/<job_id>', methods=['GET'])
+def results_slice(job_id):
+    """
+    Handles the GET request for a slice of the results of a job. Validates the query parameters, then reads the
+    slice from the memory-mapped result file of the job, or of a compared model selected with `model_id` and
+    `model_version`, without loading the rest of the results.
+    """
+    validation_response = validate_slice_params(request, job_id)
+    if validation_response['error']:
+        return jsonify({'error': validation_response['error']}), validation_response['status_code']
+
+    directory = get_results_dir(validation_response['dataset_id'], job_id, validation_response['model'])
+    try:
+        results = read_results(directory, validation_response['filename'], validation_response['start_frame'],
+                               validation_response['end_frame'], validation_response['classes'],
+                               validation_response['min_confidence'])
+    except FileNotFoundError as e:
+        return jsonify({'error': f'Results not found: {str(e)}'}), 404
+
+    return jsonify({'job_id': job_id, 'inference_results': results}), 200
+
+
+@app.route('/results/<job_id>/aggregates', methods=['GET'])
+def results_aggregates(job_id):
+    """
+    Handles the GET request for an aggregation query on a job. Validates the query parameters, then answers the query
+    from the saved aggregates of the job, or of a compared model, without rescanning its detections.
+    """
+    validation_response = validate_aggregate_params(request, job_id)
+    if validation_response['error']:
+        return jsonify({'error': validation_response['error']}), validation_response['status_code']
+
+    directory = get_results_dir(validation_response['dataset_id'], job_id, validation_response['model'])
+    try:
+        answer = query_aggregates(directory, validation_response['filename'], validation_response['kinds'],
+                                  validation_response['classes'], validation_response['interval'])
+    except FileNotFoundError as e:
+        return jsonify({'error': f'Aggregates not found: {str(e)}'}), 404
+
+    return jsonify({'job_id': job_id, 'filename': validation_response['filename'], **answer}), 200
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
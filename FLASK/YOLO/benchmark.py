@@ -0,0 +1,277 @@
+"""
+This module benchmarks the `/predict` endpoint end to end, so that serving performance can be compared across commits.
+
+A synthetic dataset of images of several sizes and of videos with moving shapes is generated in a temporary uploads
+directory, and registered in a local SQLite database standing in for PostgreSQL. For each combination of model
+version, micro-batch size and concurrency, jobs are posted to `/predict` through the Flask test client from
+concurrent threads, after warm-up jobs that build the derivative cache and load the models. Throughput, latency
+percentiles and peak resident memory of each combination are written to a JSON report, and compared with a previous
+report if one is given.
+
+Usage:
+    Run from the FLASK directory, as the service, e.g.
+    `python YOLO/benchmark.py --versions YOLO8s_FSR --batch-sizes 1 8 --concurrency 1 4 --output report.json`.
+
+Functions:
+    - make_dataset(directory): Generates the synthetic images and videos of a benchmark dataset.
+    - run_benchmark(args): Runs the benchmark sweep and returns its report.
+    - compare_reports(report, baseline): Returns the relative change of each measure from a baseline report.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import count
+
+import cv2
+import numpy as np
+import psutil
+import torch
+
+# Measures compared across reports, with whether higher is better
+MEASURES = {'throughput_rps': True, 'throughput_fps': True, 'latency_p50_s': False, 'latency_p95_s': False,
+            'latency_p99_s': False, 'peak_rss_mb': False}
+
+
+def _draw_shapes(im, rng, n=8, offset=0):
+    """Draws filled rectangles and circles on an image, shifted by `offset` pixels to simulate motion."""
+    h, w = im.shape[:2]
+    for i in range(n):
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        x, y = int(rng.integers(0, w)), int(rng.integers(0, h))
+        x = (x + offset * (i + 1)) % w
+        s = max(int(min(h, w) * rng.uniform(0.03, 0.15)), 2)
+        if i % 2:
+            cv2.circle(im, (x, y), s, color, -1)
+        else:
+            cv2.rectangle(im, (x, y), (x + s, y + s), color, -1)
+    return im
+
+
+def make_dataset(directory, image_sizes=((640, 480), (1280, 720), (1920, 1080)), video_count=1,
+                 video_size=(1280, 720), video_frames=60, seed=0):
+    """
+    Generates the synthetic images and videos of a benchmark dataset.
+
+    Args:
+        directory (str): Directory of the original files of the dataset, created if needed.
+        image_sizes (Iterable[tuple]): Size (width, height) of each image.
+        video_count (int): Number of videos.
+        video_size (tuple): Size (width, height) of the videos.
+        video_frames (int): Number of frames of each video, at 30 FPS.
+        seed (int): Seed of the generated content, so datasets are identical across runs.
+
+    Returns:
+        dict: The content of the dataset, as the number of images, videos and frames.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for i, (w, h) in enumerate(image_sizes):
+        rng = np.random.default_rng(seed + i)
+        im = rng.integers(0, 64, (h, w, 3), dtype=np.uint8)
+        cv2.imwrite(os.path.join(directory, f'image_{i}_{w}x{h}.jpg'), _draw_shapes(im, rng))
+    for i in range(video_count):
+        w, h = video_size
+        writer = cv2.VideoWriter(os.path.join(directory, f'video_{i}_{w}x{h}.mp4'),
+                                 cv2.VideoWriter_fourcc(*'mp4v'), 30, (w, h))
+        background = np.random.default_rng(seed + 1000 + i).integers(0, 64, (h, w, 3), dtype=np.uint8)
+        for frame in range(video_frames):
+            writer.write(_draw_shapes(background.copy(), np.random.default_rng(seed + 1000 + i), offset=frame * 4))
+        writer.release()
+    return {'images': len(image_sizes), 'videos': video_count, 'frames': len(image_sizes) + video_count * video_frames}
+
+
+class _PeakMemory:
+    """Samples the resident memory of the process in a background thread, keeping its peak."""
+
+    def __init__(self, interval=0.01):
+        """Initialize the sampler, started and stopped as a context manager."""
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        """Samples the resident memory until stopped."""
+        while not self.stopped.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self.stopped.wait(self.interval)
+
+    def __enter__(self):
+        """Start sampling."""
+        self.peak = self.process.memory_info().rss
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        """Stop sampling."""
+        self.stopped.set()
+        self.thread.join()
+
+
+def _commit():
+    """Returns the current git commit of the repository, None if it is not available."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(args):
+    """
+    Runs the benchmark sweep over model versions, micro-batch sizes and concurrency.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: The report, with the environment of the run and the measures of each combination.
+    """
+    uploads_dir = args.uploads_dir or tempfile.mkdtemp(prefix='benchmark_uploads_')
+
+    # The application is configured before it is imported, with uploads and database in the temporary directory
+    from config import Config
+    Config.UPLOADS_BASE_DIR = uploads_dir
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(uploads_dir, 'benchmark.sqlite')}"
+    from app import app
+    from inference import get_batch_predictor
+    from models import Dataset, User, db
+    from utils import model_dict
+
+    dataset_id = 1
+    content = make_dataset(os.path.join(uploads_dir, str(dataset_id), 'original_files'),
+                           [tuple(map(int, s.split('x'))) for s in args.image_sizes], args.videos,
+                           tuple(map(int, args.video_size.split('x'))), args.video_frames)
+    with app.app_context():
+        db.create_all()
+        if not db.session.get(Dataset, dataset_id):
+            db.session.add(User(email='benchmark@example.com'))
+            db.session.add(Dataset(dataset_id=dataset_id, email='benchmark@example.com', dataset_name='benchmark',
+                                   file_path=os.path.join(uploads_dir, str(dataset_id)), token_cost=0))
+            db.session.commit()
+
+    model_category = model_dict[args.model_id]
+    versions = args.versions or list(model_category)
+    job_ids = count(1)
+    client = app.test_client()
+
+    def post(version):
+        """Posts a job to /predict and returns its latency, or None if it failed."""
+        body = {'job_id': next(job_ids), 'model_id': args.model_id, 'model_version': version,
+                'dataset_id': dataset_id}
+        start = time.perf_counter()
+        response = client.post('/predict', json=body)
+        return time.perf_counter() - start if response.status_code == 200 else None
+
+    results = []
+    for version in versions:
+        predictor = get_batch_predictor(model_category[version])
+        for batch_size in args.batch_sizes:
+            predictor.max_batch = batch_size
+            for concurrency in args.concurrency:
+                for _ in range(args.warmup):
+                    post(version)
+                with _PeakMemory() as memory, ThreadPoolExecutor(concurrency) as executor:
+                    start = time.perf_counter()
+                    latencies = list(executor.map(lambda _: post(version), range(args.requests)))
+                    elapsed = time.perf_counter() - start
+                completed = np.array([t for t in latencies if t is not None])
+                p50, p95, p99 = np.percentile(completed, (50, 95, 99)).tolist() if len(completed) else (None,) * 3
+                results.append({
+                    'model_version': version,
+                    'batch_size': batch_size,
+                    'concurrency': concurrency,
+                    'requests': args.requests,
+                    'errors': args.requests - len(completed),
+                    'throughput_rps': len(completed) / elapsed,
+                    'throughput_fps': len(completed) * content['frames'] / elapsed,
+                    'latency_p50_s': p50,
+                    'latency_p95_s': p95,
+                    'latency_p99_s': p99,
+                    'peak_rss_mb': memory.peak / 2 ** 20,
+                })
+                print(json.dumps(results[-1]), flush=True)
+
+    if not args.uploads_dir:
+        shutil.rmtree(uploads_dir, ignore_errors=True)
+    return {
+        'commit': _commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'environment': {'python': platform.python_version(), 'torch': torch.__version__,
+                        'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+                        'torch_threads': torch.get_num_threads()},
+        'dataset': {**content, 'image_sizes': args.image_sizes, 'video_size': args.video_size},
+        'results': results,
+    }
+
+
+def compare_reports(report, baseline):
+    """
+    Returns the relative change of each measure from a baseline report, for the combinations found in both.
+
+    Args:
+        report (dict): Report of the current run.
+        baseline (dict): Report of a previous run, e.g. on another commit.
+
+    Returns:
+        list: For each combination, its model version, batch size and concurrency, and the relative change of each
+        measure, positive when the measure improved.
+    """
+    key = lambda r: (r['model_version'], r['batch_size'], r['concurrency'])
+    previous = {key(r): r for r in baseline['results']}
+    changes = []
+    for r in report['results']:
+        b = previous.get(key(r))
+        if b is None:
+            continue
+        change = dict(zip(('model_version', 'batch_size', 'concurrency'), key(r)))
+        for measure, higher_is_better in MEASURES.items():
+            if r[measure] is not None and b[measure]:
+                delta = (r[measure] - b[measure]) / b[measure]
+                change[measure] = round(delta if higher_is_better else -delta, 4)
+        changes.append(change)
+    return changes
+
+
+def parse_args(argv=None):
+    """Parses the command line arguments of the benchmark."""
+    parser = argparse.ArgumentParser(description='End-to-end benchmark of the /predict endpoint.')
+    parser.add_argument('--model-id', default='YOLO8', help='model id, as in model_dict')
+    parser.add_argument('--versions', nargs='+', help='model versions to benchmark, all versions if not set')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8], help='micro-batch sizes')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4], help='concurrent requests')
+    parser.add_argument('--requests', type=int, default=8, help='requests per combination')
+    parser.add_argument('--warmup', type=int, default=1, help='warm-up requests per combination, not measured')
+    parser.add_argument('--image-sizes', nargs='+', default=['640x480', '1280x720', '1920x1080'],
+                        help='sizes of the synthetic images, as WIDTHxHEIGHT')
+    parser.add_argument('--videos', type=int, default=1, help='number of synthetic videos')
+    parser.add_argument('--video-size', default='1280x720', help='size of the synthetic videos, as WIDTHxHEIGHT')
+    parser.add_argument('--video-frames', type=int, default=60, help='number of frames of each synthetic video')
+    parser.add_argument('--uploads-dir', help='uploads directory to keep the dataset in, a temporary one if not set')
+    parser.add_argument('--output', default='benchmark.json', help='path of the JSON report')
+    parser.add_argument('--baseline', help='path of a previous JSON report to compare with')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = run_benchmark(args)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['comparison'] = {'baseline_commit': baseline.get('commit'), 'changes': compare_reports(report, baseline)}
+        for change in report['comparison']['changes']:
+            print(json.dumps(change))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    sys.exit(0 if all(r['errors'] == 0 for r in report['results']) else 1)
@@ -0,0 +1,191 @@
+"""
+This module runs cascade inference, requested with `cascade: true`: the smaller version of the requested model
+predicts every image and frame first, and only the uncertain ones are predicted again by the requested version.
+
+The smaller version is the fallback of the requested version in `model_fallbacks`. A frame is uncertain when the
+small model is unsure of its detections or when it is crowded with small objects, which the larger model detects
+better. Its uncertainty mass sums, over its detections, how close the confidence of each detection is to the
+confidence threshold, from 1 at the threshold to 0 at Config.CASCADE_CONFIDENCE and above. The frame is escalated
+when its mass reaches Config.CASCADE_UNCERTAIN_MASS or when it holds at least Config.CASCADE_SMALL_OBJECTS
+detections smaller than Config.CASCADE_SMALL_AREA of the image area. Escalated frames take the detections of the
+requested version, the others keep those of the smaller version, so most frames are predicted at the cost of the
+smaller version.
+
+Constants:
+    CASCADE_ACCEPTED, CASCADE_ESCALATED: Cascade decisions, reported for each image and frame.
+
+Classes:
+    Cascade: Predicts the images and frames of a job with the smaller model version, escalating uncertain ones.
+"""
+
+from collections import deque
+
+from config import Config, logger
+from inference import get_batch_predictor, result_or_error
+from utils import model_fallbacks
+
+# Cascade decisions
+CASCADE_ACCEPTED = 'accepted'  # detections of the smaller model version kept
+CASCADE_ESCALATED = 'escalated'  # predicted again by the requested model version
+
+
+class Cascade:
+    """
+    Predicts the images and frames of a job with the smaller version of the requested model, and predicts them again
+    with the requested version when the detections of the smaller version are uncertain.
+
+    Attributes:
+        model_version (str): Requested model version, predicting escalated frames.
+        small_version (str): Smaller model version, predicting every frame first.
+        model (YOLO): Model of the requested version.
+        small (BatchPredictor): Batch predictor of the smaller version.
+        large (BatchPredictor): Batch predictor of the requested version.
+        confidence (float): Confidence at and above which a detection is certain.
+        uncertain_mass (float): Uncertainty mass from which a frame is escalated.
+        small_area (float): Area fraction of the image under which a detection is a small object.
+        small_objects (int): Number of small objects from which a frame is escalated.
+        frames (int): Number of frames predicted so far, counting one per image.
+        escalated (int): Number of frames escalated so far.
+    """
+
+    def __init__(self, model_category, model_version, confidence=None, uncertain_mass=None, small_area=None,
+                 small_objects=None):
+        """
+        Start the cascade of a job.
+
+        Args:
+            model_category (dict): Versions of the requested model, from `model_dict`.
+            model_version (str): Requested model version, which must have a smaller version in `model_fallbacks`.
+            confidence (float, optional): Confidence of certain detections, Config.CASCADE_CONFIDENCE if None.
+            uncertain_mass (float, optional): Escalated uncertainty mass, Config.CASCADE_UNCERTAIN_MASS if None.
+            small_area (float, optional): Area fraction of small objects, Config.CASCADE_SMALL_AREA if None.
+            small_objects (int, optional): Escalated number of small objects, Config.CASCADE_SMALL_OBJECTS if None.
+        """
+        self.model_version = model_version
+        self.small_version = model_fallbacks[model_version]
+        self.model = model_category[model_version]
+        self.small = get_batch_predictor(model_category[self.small_version])
+        self.large = get_batch_predictor(self.model)
+        self.confidence = Config.CASCADE_CONFIDENCE if confidence is None else confidence
+        self.uncertain_mass = Config.CASCADE_UNCERTAIN_MASS if uncertain_mass is None else uncertain_mass
+        self.small_area = Config.CASCADE_SMALL_AREA if small_area is None else small_area
+        self.small_objects = Config.CASCADE_SMALL_OBJECTS if small_objects is None else small_objects
+        self.frames = 0
+        self.escalated = 0
+
+    def applies(self, model):
+        """Returns whether a file predicted with a model is cascaded, i.e. the model is the requested version."""
+        return model is self.model
+
+    def escalates(self, result):
+        """
+        Returns whether a frame is escalated, from the detections of the smaller model version.
+
+        Args:
+            result (Results): Results of the frame predicted by the smaller model version.
+
+        Returns:
+            bool: True if the frame is uncertain or crowded with small objects.
+        """
+        boxes = result.boxes
+        if boxes is None or not len(boxes):
+            return False
+        threshold = self.small.model.predictor.args.conf  # set up by the prediction of the frame
+        mass = ((self.confidence - boxes.conf) / max(self.confidence - threshold, 1e-6)).clamp(0, 1).sum()
+        if mass >= self.uncertain_mass:
+            return True
+        area = boxes.xywhn[:, 2] * boxes.xywhn[:, 3]
+        return int((area < self.small_area).sum()) >= self.small_objects
+
+    def _decide(self, im, result, counted, orig_shape, imgsz):
+        """Decides whether a frame is escalated, returning its decision and the future of its escalated results."""
+        escalated = self.escalates(result)
+        if counted:
+            self.frames += 1
+            self.escalated += escalated
+        if not escalated:
+            return CASCADE_ACCEPTED, None
+        return CASCADE_ESCALATED, self.large.submit(im, orig_shape, imgsz)
+
+    def predict(self, im, orig_shape=None, imgsz=None, counted=True):
+        """
+        Predict a single image, blocking until it has been predicted and escalated if needed.
+
+        Args:
+            im (np.ndarray): BGR image.
+            orig_shape (tuple, optional): Original (height, width) the results are rescaled to.
+            imgsz (int, optional): Inference size of the image, the default inference size of each model if None.
+            counted (bool): Whether the image is counted in the report, False for another pass over it, e.g. to
+                annotate it.
+
+        Returns:
+            result (Results): Results of the image.
+            decision (str): CASCADE_ACCEPTED or CASCADE_ESCALATED.
+        """
+        result = self.small.predict(im, orig_shape, imgsz)
+        decision, future = self._decide(im, result, counted, orig_shape, imgsz)
+        return (result if future is None else future.result()), decision
+
+    def map(self, frames, window=None, imgsz=None, orig_shape=None, counted=True):
+        """
+        Predict an iterable of frames, yielding their results in order.
+
+        Frames are predicted by the smaller model version as they are decoded, and uncertain frames are submitted to
+        the requested version as soon as their first results are available, so both models predict concurrently with
+        up to `window` frames in flight each.
+
+        Args:
+            frames (Iterable[np.ndarray]): BGR frames, e.g. decoded from a video.
+            window (int, optional): Maximum number of frames in flight per model, the smallest `max_batch` if None.
+            imgsz (int, optional): Inference size of the frames, the default inference size of each model if None.
+            orig_shape (tuple, optional): Original (height, width) the results are rescaled to, for frames of a
+                video proxy.
+            counted (bool): Whether the frames are counted in the report, False for another pass over the same
+                frames, e.g. to annotate them.
+
+        Yields:
+            result (Results | Exception): Results of each frame, or the exception raised by its prediction.
+            decision (str): CASCADE_ACCEPTED or CASCADE_ESCALATED, None if the smaller version failed to predict it.
+        """
+        window = max(window or min(self.small.max_batch, self.large.max_batch), 1)
+        predicted, decided = deque(), deque()  # frames in flight in the smaller and the requested version
+
+        def decide():
+            """Decides whether the oldest frame predicted by the smaller version is escalated."""
+            im, future = predicted.popleft()
+            result = result_or_error(future)
+            if isinstance(result, Exception):
+                decided.append((result, None, None))
+            else:
+                decided.append((result, *self._decide(im, result, counted, orig_shape, imgsz)))
+
+        def resolve():
+            """Returns the results and decision of the oldest decided frame."""
+            result, decision, future = decided.popleft()
+            return (result if future is None else result_or_error(future)), decision
+
+        for im in frames:
+            predicted.append((im, self.small.submit(im, orig_shape, imgsz)))
+            if len(predicted) >= window:
+                decide()
+            while decided and (decided[0][2] is None or len(decided) >= window):
+                yield resolve()
+        while predicted:
+            decide()
+        while decided:
+            yield resolve()
+
+    def report(self):
+        """
+        Returns the cascade applied to the job, reported in `inference_information`.
+
+        Returns:
+            dict: The model versions of the cascade and the number of frames predicted and escalated.
+        """
+        logger.debug("Cascade escalated %d of %d frames", self.escalated, self.frames)
+        return {
+            'small_model_version': self.small_version,
+            'model_version': self.model_version,
+            'frames': self.frames,
+            'escalated_frames': self.escalated,
+        }
@@ -0,0 +1,156 @@
+"""
+This module writes the annotated output of a video as event clips, requested with `annotation_mode: clips`: only the
+frames around frames with detections are annotated and encoded, so the cost of annotated videos is proportional to
+the activity in the video rather than to its duration.
+
+A frame is an event when it has detections, of the requested classes if any. Each clip starts
+Config.CLIP_PRE_SECONDS before its first event and ends Config.CLIP_POST_SECONDS after its last event; events closer
+than the padding are merged into the same clip. The frames before a clip are kept in a buffer of the pre-padding
+length until they are written or dropped, and are plotted only if written, on the frames read from `frames` if given,
+e.g. the original frames of a video proxy. Clips are saved next to where the full
+annotated video would be, as `annotated_<video name>_clip<n>`, and indexed in `annotated_<video name>_clips.json`
+with the frame and time range of each clip.
+
+Classes:
+    ClipWriter: Writes the annotated clips of a video around its frames with detections, and their index.
+"""
+
+import json
+import os
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+from ultralytics.utils.video import VideoWriter
+from config import Config, logger
+
+
+class ClipWriter:
+    """
+    Writes the annotated clips of a video around its frames with detections, from the results of its frames in order,
+    and the index of the clips when released.
+
+    Attributes:
+        path (Path): Path of the index of the clips.
+        fps (float): Frame rate of the annotated frames.
+        size (tuple): (width, height) of the annotated frames.
+        renderer (BoxRenderer): Renderer of the annotated frames, the default plotting if None.
+        frames (callable): Returns the frame to plot a frame on from its frame number, the frame of its results if
+            None.
+        classes (np.ndarray): Classes of the events, any class if None.
+        padding (tuple): Padding in seconds before the first and after the last event of a clip.
+        pre (int): Number of frames written before the first event of a clip.
+        post (int): Number of frames written after the last event of a clip.
+        clips (list): Frame and time ranges of the clips written.
+    """
+
+    def __init__(self, output_path, fps, size, renderer=None, classes=None, pre=None, post=None, frames=None):
+        """
+        Initialize the clip writer of a video.
+
+        Args:
+            output_path (str): Path of the full annotated video, the clips and their index are named after it.
+            fps (float): Frame rate of the annotated frames, i.e. of the predicted frames of the video.
+            size (tuple): (width, height) of the annotated frames.
+            renderer (BoxRenderer, optional): Renderer of the annotated frames, the default plotting if None.
+            classes (Iterable[int], optional): Classes of the events, any class if None.
+            pre (float, optional): Padding in seconds before the first event of a clip, Config.CLIP_PRE_SECONDS if
+                None.
+            post (float, optional): Padding in seconds after the last event of a clip, Config.CLIP_POST_SECONDS if
+                None.
+            frames (callable, optional): Returns the frame to plot a frame on from its frame number, e.g.
+                `derivatives.FrameReader.read`, the frame of its results if None.
+        """
+        output_path = Path(output_path)
+        self.base = output_path.with_suffix('')
+        self.suffix = output_path.suffix
+        self.path = output_path.with_name(f'{self.base.name}_clips.json')
+        self.fps = fps
+        self.size = size
+        self.renderer = renderer
+        self.frames = frames
+        self.classes = None if classes is None else np.array(list(classes))
+        self.padding = (Config.CLIP_PRE_SECONDS if pre is None else pre,
+                        Config.CLIP_POST_SECONDS if post is None else post)
+        self.pre, self.post = (round(seconds * fps) for seconds in self.padding)
+        self.buffer = deque(maxlen=self.pre)  # frames since the last clip, written if an event follows
+        self.writer = None  # writer of the current clip
+        self.remaining = 0  # frames of the current clip still written after its last event
+        self.clips = []
+
+    def is_event(self, result):
+        """Returns whether a frame is an event, i.e. has detections of the requested classes."""
+        boxes = result.boxes
+        if boxes is None or not len(boxes):
+            return False
+        return self.classes is None or bool(np.isin(boxes.cls.cpu().numpy().astype(int), self.classes).any())
+
+    def write(self, result, frame_number, time):
+        """
+        Adds the next frame of the video, written to a clip if it is within the padding of an event.
+
+        Args:
+            result (Results): Results of the frame.
+            frame_number (int): Number of the frame in the source video.
+            time (float): Time of the frame in seconds.
+        """
+        if self.is_event(result):
+            if self.writer is None:
+                self._open()
+            while self.buffer:  # frames before the event, or between the event and the end of the previous one
+                self._write(*self.buffer.popleft())
+            self._write(result, frame_number, time)
+            self.remaining = self.post
+        elif self.writer is not None and self.remaining:
+            self._write(result, frame_number, time)
+            self.remaining -= 1
+        else:
+            # After its post-padding, the clip is closed once another event can no longer join it
+            if self.writer is not None and len(self.buffer) == self.pre:
+                self._close()
+            self.buffer.append((result, frame_number, time))
+
+    def _open(self):
+        """Starts a new clip."""
+        self.writer = VideoWriter(f'{self.base}_clip{len(self.clips) + 1}{self.suffix}', fps=self.fps,
+                                  size=self.size, codec=Config.ANNOTATED_VIDEO_CODEC,
+                                  quality=Config.ANNOTATED_VIDEO_QUALITY, max_size=Config.ANNOTATED_VIDEO_MAX_SIZE,
+                                  queue_size=Config.ANNOTATED_VIDEO_QUEUE_SIZE)
+        self.clips.append({'filename': self.writer.path.name, 'start_frame': None, 'end_frame': None,
+                           'start_time': None, 'end_time': None, 'frames': 0})
+
+    def _write(self, result, frame_number, time):
+        """Plots a frame and queues it to the writer of the current clip."""
+        if self.frames is not None:
+            result.orig_img = self.frames(frame_number)
+        self.writer.write(result.plot(line_width=Config.ANNOTATION_LINE_WIDTH, labels=Config.ANNOTATION_LABELS,
+                                      renderer=self.renderer))
+        clip = self.clips[-1]
+        if clip['start_frame'] is None:
+            clip['start_frame'], clip['start_time'] = frame_number, time
+        clip['end_frame'], clip['end_time'] = frame_number, time
+        clip['frames'] += 1
+
+    def _close(self):
+        """Finishes the current clip."""
+        self.writer.release()
+        self.writer = None
+        logger.debug("Clip %s saved", self.clips[-1])
+
+    def release(self):
+        """Finishes the current clip, if any, and saves the index of the clips."""
+        if self.writer is not None:
+            self._close()
+        self.buffer.clear()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f'{self.path.stem}.{os.getpid()}.tmp.json')
+        with open(tmp, 'w') as f:
+            json.dump({'fps': self.fps, 'pre_s': self.padding[0], 'post_s': self.padding[1],
+                       'classes': None if self.classes is None else self.classes.tolist(), 'clips': self.clips}, f)
+        os.replace(tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -27,9 +27,47 @@ class Config:
     Attributes:
         SQLALCHEMY_DATABASE_URI (str): Database URI for SQLAlchemy, built from environment variables.
         SQLALCHEMY_TRACK_MODIFICATIONS (bool): Disables SQLAlchemy event system to save resources.
-        UPLOADS_BASE_DIR (str): The base directory for storing uploaded files, taken from environment variables.
+        UPLOADS_BASE_DIR (str): The base directory for storing uploaded files, taken from environment variables. Defaults to /user/uploads.
         SECRET_KEY (str): Secret key for the application, used for session management. Defaults to 'default_secret_key'.
         DEBUG (bool): Enables debug mode for the application, set to True for development.
+        ANNOTATED_VIDEO_CODEC (str): Fourcc codec of annotated videos (e.g. 'mp4v', 'avc1', 'VP90'). Defaults to 'mp4v'.
+        ANNOTATED_VIDEO_QUALITY (int): Encoder quality 0-100 of annotated videos, if supported by the codec.
+        ANNOTATED_VIDEO_MAX_SIZE (int): Longest side in pixels of annotated videos, source size if not set.
+        ANNOTATED_VIDEO_QUEUE_SIZE (int): Maximum number of frames waiting for the background encoder. Defaults to 32.
+        FAST_ANNOTATION (bool): Draw annotated images and videos with the bulk BoxRenderer. Defaults to True.
+        ANNOTATION_LABELS (bool): Draw class labels on annotated outputs, False for box-only outputs. Defaults to True.
+        ANNOTATION_LINE_WIDTH (int): Box line width of annotated outputs (1 for thin lines), scaled to the image if not set.
+        INFERENCE_MAX_BATCH (int): Maximum number of frames, from all concurrent requests, predicted in one forward pass. Defaults to 8.
+        INFERENCE_MAX_WAIT_MS (float): Maximum time in milliseconds a frame waits for its micro-batch to fill. Defaults to 10.
+        VIDEO_WORKERS (int): Number of worker processes, each with its own model replica, predicting segments of long videos in parallel. Defaults to 1, which disables segmenting.
+        VIDEO_CHUNK_FRAMES (int): Number of frames per video segment, videos shorter than two segments are not split. Defaults to 300.
+        DERIVATIVE_CACHE (bool): Cache uploads decoded and resized to the inference size, images as arrays and videos as proxies, next to the originals, used for inference only. Defaults to True.
+        MOTION_GATE (bool): Whether video frames are gated on motion, reusing the detections of static frames and only predicting the changed region of frames with localized motion. Defaults to False.
+        MOTION_PIXEL_THRESHOLD (int): Minimum difference of a low resolution grayscale pixel, 0-255, to count as changed. Defaults to 25.
+        MOTION_STATIC_FRACTION (float): Fraction of changed pixels under which a frame reuses the previous detections. Defaults to 0.002.
+        MOTION_REGION_FRACTION (float): Area fraction of the changed region under which only the region is predicted. Defaults to 0.25.
+        MOTION_MAX_REUSED (int): Maximum number of consecutive frames reusing all or part of the previous detections before a full prediction. Defaults to 30.
+        TRACKER (str): Tracker configuration of track-compressed video results. Defaults to 'bytetrack.yaml'.
+        TRACK_KEYFRAME_TOLERANCE (float): Maximum error in pixels of the boxes interpolated between the keyframes of a track. Defaults to 2.0.
+        INFERENCE_ARTIFACTS (bool): Load models from fused, memory-mapped inference artifacts exported next to their checkpoints on first load. Defaults to True.
+        INFERENCE_UINT8_INPUT (bool): Fold the 1/255 input scale and BGR channel order into the first convolution of the loaded models, which then take uint8 frames. Defaults to True.
+        CASCADE_CONFIDENCE (float): Confidence at and above which a detection of the smaller model version of a cascade is certain. Defaults to 0.5.
+        CASCADE_UNCERTAIN_MASS (float): Uncertainty mass of the detections of a frame, each weighted from 1 at the confidence threshold to 0 at CASCADE_CONFIDENCE, from which the frame is escalated to the requested model version. Defaults to 2.0.
+        CASCADE_SMALL_AREA (float): Area fraction of the image under which a detection is a small object. Defaults to 0.001.
+        CASCADE_SMALL_OBJECTS (int): Number of small objects detected by the smaller model version from which a frame is escalated. Defaults to 10.
+        SCHEDULER_USER_WEIGHTS (dict): Fair share weight of users, from 'email:weight' pairs separated by commas, 1 for users not listed. Defaults to no weights.
+        SCHEDULER_PRIORITY_TOKENS (tuple): Token cost bounds under which jobs are in the 'high' then 'normal' priority class, jobs above are in the 'low' class. Defaults to '10,100'.
+        SCHEDULER_PRIORITY_WEIGHTS (tuple): Fair share weight of jobs in the 'high', 'normal' and 'low' priority classes, among the jobs of a user. Defaults to '4,2,1'.
+        AGGREGATE_HISTOGRAM_BINS (int): Number of bins over [0, 1] of the confidence histograms of the job aggregates. Defaults to 10.
+        AGGREGATE_TOP_FRAMES (int): Number of frames with the most detections kept in the job aggregates, for the job and each file. Defaults to 10.
+        ANNOTATION_MODE (str): Annotated output of videos when the request does not set `annotation_mode`, 'video' for the full annotated video or 'clips' for annotated clips around frames with detections. Defaults to 'video'.
+        CLIP_PRE_SECONDS (float): Padding in seconds of annotated clips before their first frame with detections. Defaults to 2.0.
+        CLIP_POST_SECONDS (float): Padding in seconds of annotated clips after their last frame with detections. Defaults to 2.0.
+        ANNOTATE_AT_INFERENCE_SIZE (bool): Draw annotated images and videos on the derivatives at the inference size instead of the original images and frames, smaller and faster to write. Defaults to False.
+        SERVING_REPLICAS (int): Number of model replicas of the gunicorn serving mode, one per SERVING_THREADS_PER_REPLICA cores if not set.
+        SERVING_THREADS_PER_REPLICA (int): Number of cores each replica is pinned to when sizing replicas to the machine, used as its torch thread budget. Defaults to 4.
+        SERVING_REQUEST_THREADS (int): Number of concurrent requests served by each replica, sharing its micro-batching predictors. Defaults to 4.
+        SERVING_OPENCV_THREADS (int): Number of OpenCV threads of each replica, decoding and drawing run per request thread. Defaults to 1.
     """
     SQLALCHEMY_DATABASE_URI = f"postgresql://{os.environ.get('POSTGRES_USER')}:" \
                               f"{os.environ.get('POSTGRES_PASSWORD')}@" \
@@ -37,6 +75,46 @@ class Config:
                               f"{os.environ.get('POSTGRES_PORT')}/" \
                               f"{os.environ.get('POSTGRES_DB')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    UPLOADS_BASE_DIR = os.environ.get('UPLOADS_BASE_DIR')
+    UPLOADS_BASE_DIR = os.environ.get('UPLOADS_BASE_DIR', '/user/uploads')
     SECRET_KEY = os.environ.get('SECRET_KEY', 'default_secret_key')  
-    DEBUG = True  
\ No newline at end of file
+    DEBUG = True
+    ANNOTATED_VIDEO_CODEC = os.environ.get('ANNOTATED_VIDEO_CODEC', 'mp4v')
+    ANNOTATED_VIDEO_QUALITY = int(os.environ['ANNOTATED_VIDEO_QUALITY']) if os.environ.get('ANNOTATED_VIDEO_QUALITY') else None
+    ANNOTATED_VIDEO_MAX_SIZE = int(os.environ['ANNOTATED_VIDEO_MAX_SIZE']) if os.environ.get('ANNOTATED_VIDEO_MAX_SIZE') else None
+    ANNOTATED_VIDEO_QUEUE_SIZE = int(os.environ.get('ANNOTATED_VIDEO_QUEUE_SIZE', 32))
+    FAST_ANNOTATION = os.environ.get('FAST_ANNOTATION', 'true').lower() == 'true'
+    ANNOTATION_LABELS = os.environ.get('ANNOTATION_LABELS', 'true').lower() == 'true'
+    ANNOTATION_LINE_WIDTH = int(os.environ['ANNOTATION_LINE_WIDTH']) if os.environ.get('ANNOTATION_LINE_WIDTH') else None
+    INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', 8))
+    INFERENCE_MAX_WAIT_MS = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 10))
+    VIDEO_WORKERS = int(os.environ.get('VIDEO_WORKERS', 1))
+    VIDEO_CHUNK_FRAMES = int(os.environ.get('VIDEO_CHUNK_FRAMES', 300))
+    SERVING_REPLICAS = int(os.environ['SERVING_REPLICAS']) if os.environ.get('SERVING_REPLICAS') else None
+    SERVING_THREADS_PER_REPLICA = int(os.environ.get('SERVING_THREADS_PER_REPLICA', 4))
+    SERVING_REQUEST_THREADS = int(os.environ.get('SERVING_REQUEST_THREADS', 4))
+    SERVING_OPENCV_THREADS = int(os.environ.get('SERVING_OPENCV_THREADS', 1))
+    DERIVATIVE_CACHE = os.environ.get('DERIVATIVE_CACHE', 'true').lower() == 'true'
+    MOTION_GATE = os.environ.get('MOTION_GATE', 'false').lower() == 'true'
+    MOTION_PIXEL_THRESHOLD = int(os.environ.get('MOTION_PIXEL_THRESHOLD', 25))
+    MOTION_STATIC_FRACTION = float(os.environ.get('MOTION_STATIC_FRACTION', 0.002))
+    MOTION_REGION_FRACTION = float(os.environ.get('MOTION_REGION_FRACTION', 0.25))
+    MOTION_MAX_REUSED = int(os.environ.get('MOTION_MAX_REUSED', 30))
+    TRACKER = os.environ.get('TRACKER', 'bytetrack.yaml')
+    TRACK_KEYFRAME_TOLERANCE = float(os.environ.get('TRACK_KEYFRAME_TOLERANCE', 2.0))
+    INFERENCE_ARTIFACTS = os.environ.get('INFERENCE_ARTIFACTS', 'true').lower() == 'true'
+    INFERENCE_UINT8_INPUT = os.environ.get('INFERENCE_UINT8_INPUT', 'true').lower() == 'true'
+    CASCADE_CONFIDENCE = float(os.environ.get('CASCADE_CONFIDENCE', 0.5))
+    CASCADE_UNCERTAIN_MASS = float(os.environ.get('CASCADE_UNCERTAIN_MASS', 2.0))
+    CASCADE_SMALL_AREA = float(os.environ.get('CASCADE_SMALL_AREA', 0.001))
+    CASCADE_SMALL_OBJECTS = int(os.environ.get('CASCADE_SMALL_OBJECTS', 10))
+    SCHEDULER_USER_WEIGHTS = {email.strip(): float(weight) for email, weight in
+                              (entry.rsplit(':', 1) for entry in os.environ.get('SCHEDULER_USER_WEIGHTS', '').split(',')
+                               if entry.strip())}
+    SCHEDULER_PRIORITY_TOKENS = tuple(float(v) for v in os.environ.get('SCHEDULER_PRIORITY_TOKENS', '10,100').split(','))
+    SCHEDULER_PRIORITY_WEIGHTS = tuple(float(v) for v in os.environ.get('SCHEDULER_PRIORITY_WEIGHTS', '4,2,1').split(','))
+    AGGREGATE_HISTOGRAM_BINS = int(os.environ.get('AGGREGATE_HISTOGRAM_BINS', 10))
+    AGGREGATE_TOP_FRAMES = int(os.environ.get('AGGREGATE_TOP_FRAMES', 10))
+    ANNOTATION_MODE = os.environ.get('ANNOTATION_MODE', 'video')
+    CLIP_PRE_SECONDS = float(os.environ.get('CLIP_PRE_SECONDS', 2.0))
+    CLIP_POST_SECONDS = float(os.environ.get('CLIP_POST_SECONDS', 2.0))
+    ANNOTATE_AT_INFERENCE_SIZE = os.environ.get('ANNOTATE_AT_INFERENCE_SIZE', 'false').lower() == 'true'
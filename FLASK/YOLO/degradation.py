@@ -0,0 +1,111 @@
+"""
+This module degrades the inference quality of a job automatically, so that it fits an optional latency budget.
+
+Before each file of a job, the policy estimates the time left to process the remaining frames from the measured
+per-frame latency of the model and the backlog of frames queued by other jobs, then selects the lowest degradation
+level whose estimate fits the remaining budget. Levels trade accuracy for speed by lowering the inference size,
+predicting one video frame out of `vid_stride` and falling back to the smaller version of the model.
+
+Constants:
+    DEGRADATION_LEVELS (tuple): Degradation levels as (inference size scale, video frame stride, model fallback).
+
+Classes:
+    DegradationPolicy: Selects the degradation level of each file of a job from its latency budget.
+"""
+
+import time
+
+from config import logger
+from inference import get_batch_predictor
+from utils import model_fallbacks
+
+# Degradation levels from full quality, as (inference size scale, video frame stride, fall back to the smaller model)
+DEGRADATION_LEVELS = (
+    (1.0, 1, False),
+    (0.75, 1, False),
+    (0.75, 2, False),
+    (0.5, 2, True),
+    (0.5, 4, True),
+)
+
+
+class DegradationPolicy:
+    """
+    Selects the degradation level of each file of a job, driven by measured per-frame latency and queue depth.
+
+    Attributes:
+        model_category (dict): Versions of the requested model, from `model_dict`.
+        model_version (str): Requested model version.
+        latency_budget (float): Latency budget of the job in seconds, None to always run at full quality.
+        remaining_frames (int): Number of frames of the job not yet processed.
+        level (int): Highest degradation level applied to the job so far.
+    """
+
+    def __init__(self, model_category, model_version, latency_budget, frame_count):
+        """
+        Start the latency budget of a job.
+
+        Args:
+            model_category (dict): Versions of the requested model, from `model_dict`.
+            model_version (str): Requested model version.
+            latency_budget (float): Latency budget of the job in seconds, None to always run at full quality.
+            frame_count (int): Number of frames of the job, counting one per image.
+        """
+        self.model_category = model_category
+        self.model_version = model_version
+        self.latency_budget = latency_budget
+        self.remaining_frames = frame_count
+        self.level = 0
+        self.start = time.monotonic()
+
+    def _settings(self, level):
+        """Returns the model version, inference size and video frame stride of a degradation level."""
+        scale, vid_stride, fallback = DEGRADATION_LEVELS[level]
+        version = model_fallbacks.get(self.model_version, self.model_version) if fallback else self.model_version
+        imgsz = get_batch_predictor(self.model_category[version]).imgsz
+        return version, max(int(imgsz * scale) // 32 * 32, 32), vid_stride
+
+    def select(self, frame_count):
+        """
+        Selects the degradation level of the next file of the job.
+
+        Args:
+            frame_count (int): Number of frames of the file, 1 for an image.
+
+        Returns:
+            tuple: The model, inference size and video frame stride to process the file with.
+        """
+        level = 0
+        if self.latency_budget is not None:
+            remaining_time = self.latency_budget - (time.monotonic() - self.start)
+            requested = get_batch_predictor(self.model_category[self.model_version])
+            for level in range(len(DEGRADATION_LEVELS)):
+                version, imgsz, vid_stride = self._settings(level)
+                predictor = get_batch_predictor(self.model_category[version])
+                latency = predictor.frame_latency or requested.frame_latency
+                if latency is None:  # nothing measured yet, start at full quality
+                    break
+                frames = self.remaining_frames / vid_stride + predictor.backlog
+                if frames * latency * (imgsz / predictor.imgsz) ** 2 <= remaining_time:
+                    break
+            logger.debug("Degradation level %d selected with %d frames left", level, self.remaining_frames)
+        self.remaining_frames = max(self.remaining_frames - frame_count, 0)
+        self.level = max(self.level, level)
+        version, imgsz, vid_stride = self._settings(level)
+        return self.model_category[version], imgsz, vid_stride
+
+    def report(self):
+        """
+        Returns the degradation applied to the job, reported in `inference_information`.
+
+        Returns:
+            dict: The latency budget, the highest degradation level applied and its settings.
+        """
+        version, imgsz, vid_stride = self._settings(self.level)
+        return {
+            'latency_budget_s': self.latency_budget,
+            'level': self.level,
+            'model_version': version,
+            'imgsz': imgsz,
+            'vid_stride': vid_stride,
+        }
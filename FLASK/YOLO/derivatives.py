@@ -0,0 +1,254 @@
+"""
+This module maintains a cache of derivatives of the uploaded files, already decoded and resized to an inference size.
+
+Derivatives are built lazily, the first time a file is predicted at a given inference size, and stored next to the
+originals in `/user/uploads/<dataset_id>/derivatives/<imgsz>/`:
+    - images as uncompressed `.npz` arrays, resized so that their longest side is `imgsz`, loaded without decoding;
+    - videos as Motion JPEG proxies at the same resolution, decoded much faster than full resolution sources.
+
+Each derivative records the original (height, width) of its source, so that boxes predicted on it are mapped back
+to original coordinates, and the size and modification time of its source, so that it is rebuilt if the source
+changes. Files that are not larger than `imgsz` are used as is.
+
+Derivatives are used for inference only: annotated outputs are drawn on the original images and frames, with the
+boxes mapped back to original coordinates, unless Config.ANNOTATE_AT_INFERENCE_SIZE is set.
+
+Classes:
+    FrameReader: Reads the frames of a video by increasing frame number.
+
+Functions:
+    - get_image(file_path, imgsz): Returns an image resized to an inference size and its original shape.
+    - get_video(file_path, imgsz): Returns the path of a video proxy at an inference size and its original shape.
+    - get_annotation_image(file_path, im, orig_shape): Returns the image to draw the annotated image on.
+    - get_annotation_frames(file_path, orig_shape): Returns the reader of the frames to draw an annotated video on.
+"""
+
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+from ultralytics.data.utils import imread_reduced
+from ultralytics.utils.video import VideoWriter
+from config import Config, logger
+
+# Codec of video proxies, fast to decode
+PROXY_CODEC = 'MJPG'
+
+
+def _derivative_path(file_path, imgsz, suffix):
+    """Returns the path of the derivative of an original file at an inference size, creating its directory."""
+    dataset_dir = os.path.dirname(os.path.dirname(os.path.abspath(file_path)))
+    directory = os.path.join(dataset_dir, 'derivatives', str(imgsz))
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, os.path.basename(file_path) + suffix)
+
+
+def _source_stat(file_path):
+    """Returns the size and modification time of a source file, recorded in its derivatives."""
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _temporary_path(path):
+    """Returns a temporary path next to `path`, unique to the calling thread, replaced atomically once written."""
+    root, suffix = os.path.splitext(path)
+    return f'{root}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}'
+
+
+def get_image(file_path, imgsz):
+    """
+    Returns an image resized so that its longest side is at most `imgsz`, from the derivative cache if enabled.
+
+    Args:
+        file_path (str): Path to the original image file.
+        imgsz (int): Inference size.
+
+    Returns:
+        im (np.ndarray): The BGR image, None if the file could not be read.
+        orig_shape (tuple): The original (height, width) of a resized image, None if the image is not resized.
+    """
+    if not Config.DERIVATIVE_CACHE:
+        return _resize_image(file_path, imgsz)
+
+    path = _derivative_path(file_path, imgsz, '.npz')
+    stat = _source_stat(file_path)
+    if os.path.exists(path):
+        try:
+            with np.load(path) as derivative:
+                if derivative['source'].tolist() == stat:
+                    orig_shape = tuple(derivative['orig_shape'].tolist())
+                    return derivative['im'], orig_shape or None
+        except Exception as e:
+            logger.warning("Invalid image derivative %s rebuilt: %s", path, str(e))
+
+    im, orig_shape = _resize_image(file_path, imgsz)
+    if im is not None:
+        tmp = _temporary_path(path)
+        np.savez(tmp, im=im, orig_shape=np.array(orig_shape or (), dtype=np.int64), source=np.array(stat))
+        os.replace(tmp, path)
+        logger.debug("Image derivative saved: %s", path)
+    return im, orig_shape
+
+
+def _resize_image(file_path, imgsz):
+    """Decodes an image at reduced native scale if possible, then resizes it so its longest side is `imgsz`."""
+    im, shape = imread_reduced(file_path, imgsz)
+    if im is None:
+        return None, None
+    h, w = im.shape[:2]
+    r = imgsz / max(h, w)
+    if r < 1:
+        im = cv2.resize(im, (max(round(w * r), 1), max(round(h * r), 1)), interpolation=cv2.INTER_AREA)
+    return im, shape if shape != im.shape[:2] else None
+
+
+def get_video(file_path, imgsz):
+    """
+    Returns a video proxy whose longest side is `imgsz`, from the derivative cache if enabled.
+
+    Args:
+        file_path (str): Path to the original video file.
+        imgsz (int): Inference size.
+
+    Returns:
+        proxy_path (str): Path of the video proxy, the original path if the cache is disabled or the video is not
+            larger than `imgsz`.
+        orig_shape (tuple): The original (height, width) of a proxy video, None if the original video is returned.
+    """
+    if not Config.DERIVATIVE_CACHE:
+        return file_path, None
+
+    metadata_path = _derivative_path(file_path, imgsz, '.json')
+    stat = _source_stat(file_path)
+    if os.path.exists(metadata_path):
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            if metadata['source'] == stat and (metadata['proxy'] is None or os.path.exists(metadata['proxy'])):
+                orig_shape = metadata['orig_shape']
+                return (metadata['proxy'], tuple(orig_shape)) if metadata['proxy'] else (file_path, None)
+        except Exception as e:
+            logger.warning("Invalid video derivative %s rebuilt: %s", metadata_path, str(e))
+
+    video = cv2.VideoCapture(file_path)
+    if not video.isOpened():
+        return file_path, None
+    try:
+        fps = video.get(cv2.CAP_PROP_FPS)
+        w, h = int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        proxy = None
+        if max(w, h) > imgsz:
+            path = _derivative_path(file_path, imgsz, '.proxy')
+            with VideoWriter(_temporary_path(path), fps=fps, size=(w, h), codec=PROXY_CODEC, max_size=imgsz) as writer:
+                while True:
+                    success, frame = video.read()
+                    if not success:
+                        break
+                    writer.write(frame)
+            proxy = path + writer.path.suffix
+            os.replace(writer.path, proxy)
+            logger.debug("Video proxy saved: %s", proxy)
+    finally:
+        video.release()
+
+    tmp = _temporary_path(metadata_path)
+    with open(tmp, 'w') as f:
+        json.dump({'proxy': proxy, 'orig_shape': [h, w], 'source': stat}, f)
+    os.replace(tmp, metadata_path)
+    return (proxy, (h, w)) if proxy else (file_path, None)
+
+
+class FrameReader:
+    """
+    Reads the frames of a video by increasing frame number, e.g. the original frames of the predicted frames of a
+    video proxy. Frames close after the last frame read are reached by grabbing the frames in between, other frames by
+    seeking.
+
+    Attributes:
+        file_path (str): Path to the video file.
+        max_gap (int): Maximum number of frames grabbed to reach a frame instead of seeking.
+    """
+
+    def __init__(self, file_path, max_gap=30):
+        """Open a video to read its frames, raising IOError if it can not be opened."""
+        self.file_path = file_path
+        self.max_gap = max_gap
+        self.video = cv2.VideoCapture(file_path)
+        if not self.video.isOpened():
+            raise IOError(f'Failed to open video file {file_path}')
+        self.position = 0  # number of the next frame of the capture
+
+    def read(self, frame_number):
+        """
+        Returns a frame of the video.
+
+        Args:
+            frame_number (int): Number of the frame in the video.
+
+        Returns:
+            np.ndarray: The BGR frame.
+
+        Raises:
+            IOError: If the frame can not be read.
+        """
+        if frame_number < self.position or frame_number - self.position > self.max_gap:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            self.position = frame_number
+        while self.position < frame_number:
+            self.video.grab()
+            self.position += 1
+        success, frame = self.video.read()
+        if not success:
+            raise IOError(f'Failed to read frame {frame_number} of video file {self.file_path}')
+        self.position += 1
+        return frame
+
+    def release(self):
+        """Releases the video."""
+        self.video.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+def get_annotation_image(file_path, im, orig_shape):
+    """
+    Returns the image to draw the annotated image on, the original image unless Config.ANNOTATE_AT_INFERENCE_SIZE
+    is set.
+
+    Args:
+        file_path (str): Path to the original image file.
+        im (np.ndarray): The image predicted, from `get_image`.
+        orig_shape (tuple): The original (height, width) of a resized image, None if the image is not resized.
+
+    Returns:
+        np.ndarray: The BGR image, `im` if it is the original image or annotated at the inference size.
+    """
+    if orig_shape is None or Config.ANNOTATE_AT_INFERENCE_SIZE:
+        return im
+    original = cv2.imread(file_path)
+    if original is None:
+        raise FileNotFoundError(f'Image Not Found {file_path}')
+    return original
+
+
+def get_annotation_frames(file_path, orig_shape):
+    """
+    Returns the reader of the frames to draw an annotated video on, the original frames unless
+    Config.ANNOTATE_AT_INFERENCE_SIZE is set.
+
+    Args:
+        file_path (str): Path to the original video file.
+        orig_shape (tuple): The original (height, width) of a video proxy, None if the original video is predicted.
+
+    Returns:
+        FrameReader: The reader of the original frames, None if the predicted frames are drawn on.
+    """
+    if orig_shape is None or Config.ANNOTATE_AT_INFERENCE_SIZE:
+        return None
+    return FrameReader(file_path)
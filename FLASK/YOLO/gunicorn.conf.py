@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration of the production serving mode, sizing model replicas to the machine.
+
+Run from the application directory instead of the Flask development server:
+    gunicorn -c YOLO/gunicorn.conf.py
+
+Replicas are sized with the environment variables documented in `config.Config`:
+    SERVING_REPLICAS, SERVING_THREADS_PER_REPLICA, SERVING_REQUEST_THREADS, SERVING_OPENCV_THREADS
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config  # noqa: E402
+from serving import configure_replica, get_replica_count, share_models  # noqa: E402
+
+wsgi_app = 'app:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Load the models once in the master process, replicas are forked with the weights shared read-only
+preload_app = True
+workers = get_replica_count()
+
+# Request threads of a replica share its micro-batching predictors
+worker_class = 'gthread'
+threads = Config.SERVING_REQUEST_THREADS
+
+# A request processes a whole dataset
+timeout = 0
+graceful_timeout = 60
+
+
+def when_ready(server):
+    """Fuse and freeze the preloaded models before the replicas are forked."""
+    share_models()
+
+
+def pre_fork(server, worker):
+    """Assign the worker the lowest replica index not used by a running worker, so restarts keep their cores."""
+    used = {getattr(w, 'replica', None) for w in server.WORKERS.values()}
+    worker.replica = next(i for i in range(len(used) + 1) if i not in used)
+
+
+def post_fork(server, worker):
+    """Pin the replica to its cores and set its thread budgets."""
+    configure_replica(worker.replica)
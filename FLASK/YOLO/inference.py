@@ -0,0 +1,227 @@
+"""
+This module provides a micro-batching inference service shared by all the requests that use the same model.
+
+A YOLO model caches its predictor, which holds per-call state (dataset, batch, results), so calling
+`model.predict` concurrently from several request threads is not safe. Each model is instead owned by a single
+inference thread: request threads submit decoded frames to its queue and wait on futures, while the inference thread
+collects frames from every in-flight job into micro-batches and runs each micro-batch through one forward pass, with
+the lean `infer` API of the model: no inference source is loaded and no callback runs per micro-batch. Frames are
+queued under the current job of the submitting thread and collected in weighted fair share order across users and
+jobs, see `scheduler.FairQueue`.
+
+Classes:
+    BatchPredictor: Inference thread of a model, batching frames submitted by concurrent requests.
+
+Functions:
+    get_batch_predictor(model): Returns the batch predictor of a model, started on first use.
+    result_or_error(future): Returns the results of a frame, or the exception raised by its prediction.
+    map_models(predictors, frames): Predicts each frame of an iterable with several models, decoding it once.
+
+Usage:
+    predictor = get_batch_predictor(model)
+    result = predictor.predict(frame)                  # single frame, blocks until its micro-batch is processed
+    for result in predictor.map(frames):               # frame iterable, results in order
+        ...                                            # or the exception raised by the prediction of a frame
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from queue import Empty
+
+from ultralytics.cfg import get_cfg
+from ultralytics.engine.results import Results
+from config import Config, logger
+from scheduler import FairQueue
+
+
+class BatchPredictor:
+    """
+    Inference thread of a model, collecting frames from concurrent requests into micro-batches.
+
+    A micro-batch is run as soon as it holds `max_batch` frames or `max_wait` seconds after its first frame was
+    queued, whichever comes first, with one forward pass per inference size in the micro-batch. Each result is routed
+    back to the future returned when its frame was submitted.
+
+    Attributes:
+        model (YOLO): Model owned by the inference thread, never called from other threads.
+        max_batch (int): Maximum number of frames in a micro-batch.
+        max_wait (float): Maximum time in seconds a frame waits for its micro-batch to fill.
+        overrides (dict): Prediction arguments used for every micro-batch.
+        imgsz (int): Default inference size of the model.
+        frame_latency (float): Moving average of the inference time in seconds per frame at the default inference
+            size, None until a micro-batch has been processed.
+    """
+
+    def __init__(self, model, max_batch=8, max_wait=0.01, **overrides):
+        """
+        Start the inference thread of a model.
+
+        Args:
+            model (YOLO): Model used for predictions.
+            max_batch (int): Maximum number of frames in a micro-batch.
+            max_wait (float): Maximum time in seconds a frame waits for its micro-batch to fill.
+            **overrides: Prediction arguments used for every micro-batch, e.g. conf or imgsz.
+        """
+        self.model = model
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait
+        self.overrides = {'verbose': False, **overrides}
+        self.args = get_cfg(overrides={**model.overrides, **overrides})
+        self.imgsz = max(self.args.imgsz) if isinstance(self.args.imgsz, (list, tuple)) else self.args.imgsz
+        self.frame_latency = None
+        self.queue = FairQueue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, im, orig_shape=None, imgsz=None):
+        """
+        Queue a frame for prediction, under the current job of the thread.
+
+        Args:
+            im (np.ndarray): BGR frame.
+            orig_shape (tuple, optional): Original (height, width) the results are rescaled to, for frames decoded
+                at reduced scale.
+            imgsz (int, optional): Inference size of the frame, the default inference size if None.
+
+        Returns:
+            (Future): Future of the frame Results.
+        """
+        future = Future()
+        self.queue.put((im, orig_shape, imgsz or self.imgsz, future))
+        return future
+
+    def predict(self, im, orig_shape=None, imgsz=None):
+        """Predict a single frame, blocking until its micro-batch has been processed."""
+        return self.submit(im, orig_shape, imgsz).result()
+
+    def map(self, frames, window=None, imgsz=None, orig_shape=None):
+        """
+        Predict an iterable of frames, yielding their results in order.
+
+        Up to `window` frames are kept in flight so the frames of a single job can fill micro-batches, while frames
+        are only decoded as fast as they are predicted.
+
+        Args:
+            frames (Iterable[np.ndarray]): BGR frames, e.g. decoded from a video.
+            window (int, optional): Maximum number of frames in flight, `max_batch` if None.
+            imgsz (int, optional): Inference size of the frames, the default inference size if None.
+            orig_shape (tuple, optional): Original (height, width) the results are rescaled to, for frames of a
+                video proxy.
+
+        Yields:
+            (Results | Exception): Results of each frame, or the exception raised by its prediction, so that a failed
+                frame does not end the map.
+        """
+        window = max(window or self.max_batch, 1)
+        pending = deque()
+        for im in frames:
+            pending.append(self.submit(im, orig_shape, imgsz))
+            if len(pending) >= window:
+                yield result_or_error(pending.popleft())
+        while pending:
+            yield result_or_error(pending.popleft())
+
+    def _collect(self):
+        """Wait for a frame, then collect frames until the micro-batch is full or its wait time has elapsed."""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except Empty:
+                break
+        return batch
+
+    @property
+    def backlog(self):
+        """Number of frames queued and not yet collected into a micro-batch."""
+        return self.queue.qsize()
+
+    def _run(self):
+        """Run micro-batches until the process exits, routing results and errors back to the submitting requests."""
+        overrides = self.overrides  # merged into the predictor arguments by the first micro-batch only
+        while True:
+            groups = {}  # frames grouped by inference size, one forward pass each
+            for item in self._collect():
+                if item[3].set_running_or_notify_cancel():
+                    groups.setdefault(item[2], []).append(item)
+            for imgsz, batch in groups.items():
+                try:
+                    t = time.perf_counter()
+                    detections = self.model.infer([im for im, _, _, _ in batch], imgsz, **overrides)
+                    overrides = {}
+                    latency = (time.perf_counter() - t) / len(batch) * (self.imgsz / imgsz) ** 2
+                    self.frame_latency = latency if self.frame_latency is None else \
+                        0.8 * self.frame_latency + 0.2 * latency
+                    for (im, shape, _, future), boxes in zip(batch, detections):
+                        r = Results(im, path=None, names=self.model.names, boxes=boxes)
+                        if shape is not None:  # decoded at reduced scale, map back to original pixels
+                            r.rescale(shape)
+                        future.set_result(r)
+                except Exception as e:
+                    logger.error("Micro-batch of %d frames failed: %s", len(batch), str(e))
+                    for _, _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+
+
+# Batch predictors by model, started on first use
+_predictors = {}
+_predictors_lock = threading.Lock()
+
+
+def result_or_error(future):
+    """Returns the results of a frame future, or the exception raised by its prediction."""
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+
+def get_batch_predictor(model):
+    """
+    Returns the batch predictor of a model, started on first use with the micro-batch limits set in Config.
+
+    Args:
+        model (YOLO): Model used for predictions, e.g. from `model_dict`.
+
+    Returns:
+        BatchPredictor: The batch predictor shared by all the requests using this model.
+    """
+    with _predictors_lock:
+        if model not in _predictors:
+            _predictors[model] = BatchPredictor(model, max_batch=Config.INFERENCE_MAX_BATCH,
+                                                max_wait=Config.INFERENCE_MAX_WAIT_MS / 1000)
+        return _predictors[model]
+
+
+def map_models(predictors, frames, window=None, imgsz=None, orig_shape=None):
+    """
+    Predicts each frame of an iterable with several models, yielding the results of all models frame by frame.
+
+    Each frame is decoded once and submitted to the batch predictor of every model, which predict it concurrently.
+
+    Args:
+        predictors (list[BatchPredictor]): Batch predictors of the models.
+        frames (Iterable[np.ndarray]): BGR frames, e.g. decoded from a video.
+        window (int, optional): Maximum number of frames in flight, the smallest `max_batch` if None.
+        imgsz (int, optional): Inference size of the frames, the default inference size of each model if None.
+        orig_shape (tuple, optional): Original (height, width) the results are rescaled to, for frames of a
+            video proxy.
+
+    Yields:
+        (list[Results]): Results of each frame, one per model.
+    """
+    window = max(window or min(p.max_batch for p in predictors), 1)
+    pending = deque()
+    for im in frames:
+        pending.append([p.submit(im, orig_shape, imgsz) for p in predictors])
+        if len(pending) >= window:
+            yield [future.result() for future in pending.popleft()]
+    while pending:
+        yield [future.result() for future in pending.popleft()]
@@ -0,0 +1,275 @@
+"""
+This module microbenchmarks the hot paths run for every request, and fails when one regresses against its baseline.
+
+Each case times one function on a realistic small-object workload, on CPU only and with a fixed number of torch
+threads: thousands of candidate boxes for non-maximum suppression and hundreds of detections downstream of it. The
+best time of several repeats is kept, as the least disturbed by other processes. Baselines are stored in a JSON file
+with `--save`, on the machine the suite then runs on, and a case regresses when its time exceeds its baseline by more
+than the tolerance.
+
+The cold import of the detection inference path is timed the same way, in fresh interpreters, and fails regardless
+of baselines if it loads any of the modules that are only loaded on first use by other tasks, e.g. plotting,
+training integrations and other model families.
+
+Usage:
+    Run from the FLASK directory, e.g. `python YOLO/microbenchmark.py --save` on the base commit, then
+    `python YOLO/microbenchmark.py` after a change, which exits with status 1 if any case regressed.
+
+Constants:
+    CASES (dict): Setup function of each case, returning the function to time.
+    IMPORT_MODULE (str): Module imported by the detection inference path, timed in fresh interpreters.
+    LAZY_MODULES (tuple): Modules the import of IMPORT_MODULE must not load.
+
+Functions:
+    - run_cases(names, repeats, number): Times the cases and returns their best time per call.
+    - run_import(repeats): Times the cold import of the detection inference path and lists the lazy modules loaded.
+    - check_regressions(times, baseline, tolerance): Returns the cases slower than their baseline beyond tolerance.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.data.augment import LetterBox
+from ultralytics.data.utils import polygon2mask
+from ultralytics.engine.results import Results
+from ultralytics.trackers.utils.matching import iou_distance
+from ultralytics.utils import ops
+from ultralytics.utils.plotting import Annotator
+from ultralytics.utils.tal import make_anchors
+
+# Workload sizes, at the default inference size with small objects
+IMGSZ = 640
+ANCHORS = 8400  # anchors of the 3 detection levels at IMGSZ
+CLASSES = 80
+CANDIDATES = 3000  # anchors above the confidence threshold
+DETECTIONS = 300  # max_det of predictions
+SOURCE_SHAPE = (1080, 1920)
+
+# Module imported by the detection inference path, and modules it must not load, loaded on first use by other tasks
+IMPORT_MODULE = 'ultralytics.models.yolo.model'
+LAZY_MODULES = ('matplotlib', 'IPython', 'pandas', 'seaborn', 'scipy', 'ultralytics.trackers',
+                'ultralytics.models.rtdetr', 'ultralytics.models.sam', 'ultralytics.models.fastsam',
+                'ultralytics.models.nas')
+
+
+def _boxes(rng, n, size=IMGSZ, min_side=4, max_side=32):
+    """Returns n random small xyxy boxes within a square image."""
+    xy = rng.uniform(0, size - max_side, (n, 2))
+    wh = rng.uniform(min_side, max_side, (n, 2))
+    return np.concatenate((xy, xy + wh), 1).astype(np.float32)
+
+
+def _detections(rng, n=DETECTIONS):
+    """Returns n random detections (x1, y1, x2, y2, conf, class) in the source image."""
+    boxes = _boxes(rng, n) * (SOURCE_SHAPE[1] / IMGSZ)
+    conf = rng.uniform(0.25, 1, (n, 1))
+    cls = rng.integers(0, CLASSES, (n, 1))
+    return torch.from_numpy(np.concatenate((boxes, conf, cls), 1).astype(np.float32))
+
+
+def _nms(batch):
+    """Non-maximum suppression of raw Detect outputs with CANDIDATES anchors above the confidence threshold."""
+    rng = np.random.default_rng(0)
+    prediction = np.zeros((batch, 4 + CLASSES, ANCHORS), dtype=np.float32)
+    for p in prediction:
+        # Candidates clustered around objects, several anchors per object as predicted by the Detect head
+        centers = _boxes(rng, CANDIDATES // 5).repeat(5, 0) + rng.normal(0, 2, (CANDIDATES // 5 * 5, 4))
+        i = rng.choice(ANCHORS, len(centers), replace=False)
+        p[:4, i] = ops.xyxy2xywh(centers).T
+        p[4 + rng.integers(0, CLASSES, len(i)), i] = rng.uniform(0.3, 0.9, len(i))
+        p[4:, :] += rng.uniform(0, 0.05, (CLASSES, ANCHORS))
+    prediction = torch.from_numpy(prediction)
+    return lambda: ops.non_max_suppression(prediction, 0.25, 0.7, max_det=DETECTIONS)
+
+
+def _scale_boxes():
+    """Rescaling of the detections of a letterboxed frame to the source frame."""
+    boxes = _detections(np.random.default_rng(0))[:, :4] * (IMGSZ / SOURCE_SHAPE[1])
+    return lambda: ops.scale_boxes((384, IMGSZ), boxes.clone(), SOURCE_SHAPE)
+
+
+def _letterbox():
+    """Letterboxing of a full HD frame to the inference size."""
+    im = np.random.default_rng(0).integers(0, 255, (*SOURCE_SHAPE, 3), dtype=np.uint8)
+    letterbox = LetterBox(IMGSZ, auto=True)
+    return lambda: letterbox(image=im)
+
+
+def _make_anchors():
+    """Anchor points and strides of the 3 detection levels at the inference size."""
+    feats = [torch.zeros(1, 64, IMGSZ // s, IMGSZ // s) for s in (8, 16, 32)]
+    return lambda: make_anchors(feats, torch.tensor([8., 16., 32.]), 0.5)
+
+
+def _tojson():
+    """JSON serialization of the results of a frame."""
+    im = np.zeros((*SOURCE_SHAPE, 3), dtype=np.uint8)
+    results = Results(im, path=None, names={i: f'class{i}' for i in range(CLASSES)},
+                      boxes=_detections(np.random.default_rng(0)))
+    return results.tojson
+
+
+def _box_label():
+    """Drawing of the boxes and labels of a frame."""
+    im = np.zeros((*SOURCE_SHAPE, 3), dtype=np.uint8)
+    boxes = _detections(np.random.default_rng(0))[:, :4].tolist()
+
+    def box_label():
+        annotator = Annotator(im.copy(), pil=False)
+        for box in boxes:
+            annotator.box_label(box, 'class 0.50', color=(255, 0, 0))
+
+    return box_label
+
+
+def _polygon2mask():
+    """Rasterization of the polygons of the segments of a frame."""
+    rng = np.random.default_rng(0)
+    angles = np.linspace(0, 2 * np.pi, 32, endpoint=False)
+    centers = rng.uniform(32, IMGSZ - 32, (DETECTIONS, 1, 2))
+    radii = rng.uniform(4, 16, (DETECTIONS, 32, 1))
+    polygons = (centers + radii * np.stack((np.cos(angles), np.sin(angles)), 1)).reshape(DETECTIONS, -1)
+    return lambda: polygon2mask((IMGSZ, IMGSZ), polygons, downsample_ratio=4)
+
+
+def _iou_distance():
+    """IoU cost matrix between the tracks and detections of a frame."""
+    rng = np.random.default_rng(0)
+    tracks, detections = list(_boxes(rng, DETECTIONS)), list(_boxes(rng, DETECTIONS))
+    return lambda: iou_distance(tracks, detections)
+
+
+# Setup function of each case, returning the function to time
+CASES = {
+    'non_max_suppression': lambda: _nms(1),
+    'non_max_suppression_batch8': lambda: _nms(8),
+    'scale_boxes': _scale_boxes,
+    'LetterBox': _letterbox,
+    'make_anchors': _make_anchors,
+    'Results.tojson': _tojson,
+    'Annotator.box_label': _box_label,
+    'polygon2mask': _polygon2mask,
+    'iou_distance': _iou_distance,
+}
+
+
+def run_cases(names=None, repeats=5, number=None):
+    """
+    Times the cases on CPU, keeping the best of several repeats.
+
+    Args:
+        names (Iterable[str], optional): Names of the cases to run, all cases if None.
+        repeats (int): Number of timed repeats of each case.
+        number (int, optional): Number of calls per repeat, chosen so that a repeat lasts at least 0.2 s if None.
+
+    Returns:
+        dict: Best time in milliseconds per call of each case.
+    """
+    times = {}
+    with torch.inference_mode():
+        for name in names or CASES:
+            fn = CASES[name]()
+            fn()  # warm-up, e.g. lazy initializations and caches
+            timer = timeit.Timer(fn)
+            n = number or timer.autorange()[0]
+            times[name] = min(timer.repeat(repeats, n)) / n * 1000
+    return times
+
+
+def run_import(repeats=5):
+    """
+    Times the cold import of the detection inference path in fresh interpreters, keeping the best of several repeats.
+
+    Args:
+        repeats (int): Number of interpreters started.
+
+    Returns:
+        time (float): Best import time in milliseconds.
+        loaded (list): Modules of LAZY_MODULES loaded by the import, which should be empty.
+    """
+    script = (f'import json, sys, time\n'
+              f't = time.perf_counter()\n'
+              f'import {IMPORT_MODULE}\n'
+              f't = time.perf_counter() - t\n'
+              f'print(json.dumps([t, [m for m in {LAZY_MODULES!r} if m in sys.modules]]))')
+    times, loaded = [], []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                check=True, capture_output=True, text=True).stdout
+        t, loaded = json.loads(output.strip().splitlines()[-1])
+        times.append(t * 1000)
+    return min(times), loaded
+
+
+def check_regressions(times, baseline, tolerance=0.2):
+    """
+    Returns the cases slower than their baseline beyond tolerance.
+
+    Args:
+        times (dict): Time in milliseconds of each case.
+        baseline (dict): Baseline time in milliseconds of each case, with optional per-case tolerances under
+            'tolerances'.
+        tolerance (float): Default relative slowdown tolerated, e.g. 0.2 for 20%.
+
+    Returns:
+        dict: Relative slowdown of each regressed case.
+    """
+    tolerances = baseline.get('tolerances', {})
+    regressions = {}
+    for name, t in times.items():
+        reference = baseline['times'].get(name)
+        if reference and t > reference * (1 + tolerances.get(name, tolerance)):
+            regressions[name] = round(t / reference - 1, 4)
+    return regressions
+
+
+def parse_args(argv=None):
+    """Parses the command line arguments of the suite."""
+    parser = argparse.ArgumentParser(description='Microbenchmarks of the inference hot paths.')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), help='cases to run, all cases if not set')
+    parser.add_argument('--skip-import', action='store_true', help='do not time the import of the inference path')
+    parser.add_argument('--repeats', type=int, default=5, help='timed repeats of each case')
+    parser.add_argument('--threads', type=int, default=1, help='torch and OpenCV threads')
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           'microbenchmark_baseline.json'),
+                        help='path of the baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='save the times as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative slowdown tolerated by default')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    torch.set_num_threads(args.threads)
+    cv2.setNumThreads(args.threads)
+    times = run_cases(args.cases, args.repeats)
+    loaded = []
+    if not args.skip_import:
+        times[f'import {IMPORT_MODULE}'], loaded = run_import(args.repeats)
+    for name, t in times.items():
+        print(f'{name:<40}{t:>10.3f} ms')
+
+    baseline = {'times': {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.save:
+        baseline['times'].update(times)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+        sys.exit(0)
+
+    regressions = check_regressions(times, baseline, args.tolerance)
+    for name, slowdown in regressions.items():
+        print(f'REGRESSION {name}: {slowdown:+.1%} over baseline')
+    if loaded:
+        print(f'REGRESSION import {IMPORT_MODULE} loads modules only needed on first use: {", ".join(loaded)}')
+    sys.exit(1 if regressions or loaded else 0)
@@ -0,0 +1,160 @@
+"""
+This module gates video inference on motion, for fixed-camera footage that is mostly unchanged between frames.
+
+Each frame is compared with the last frame the detector ran on, at low resolution. When almost no pixel changed, the
+previous detections are reused. When the change is localized, the detector only runs on the changed region and its
+detections replace the previous ones in that region. Otherwise the detector runs on the whole frame.
+
+Constants:
+    GATE_REUSED, GATE_REGION, GATE_FULL: Gate decisions, reported for each frame.
+
+Classes:
+    MotionGate: Decides for each frame whether its detections can be reused or must be predicted, and where.
+
+Functions:
+    map_gated(predictor, frames): Predicts the frames of a video through a motion gate, yielding results in order.
+"""
+
+from collections import deque
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+from config import Config
+from inference import result_or_error
+
+# Gate decisions
+GATE_REUSED = 'reused'  # previous detections reused, the detector did not run
+GATE_REGION = 'region'  # the detector ran on the changed region only
+GATE_FULL = 'full'  # the detector ran on the whole frame
+
+
+class MotionGate:
+    """
+    Decides for each frame whether its detections can be reused or must be predicted, from the pixels changed since
+    the last frame the detector ran on.
+
+    Attributes:
+        pixel_threshold (int): Minimum difference of a low resolution grayscale pixel, 0-255, to count as changed.
+        static_fraction (float): Fraction of changed pixels under which the previous detections are reused.
+        region_fraction (float): Area fraction of the changed region under which only the region is predicted.
+        max_reused (int): Maximum number of consecutive frames reusing all or part of the previous detections, to
+            bound drift.
+        since_full (int): Number of frames since the last frame predicted in full.
+        size (int): Width in pixels of the low resolution frames compared.
+    """
+
+    def __init__(self, pixel_threshold=25, static_fraction=0.002, region_fraction=0.25, max_reused=30, size=160):
+        """Initialize the gate thresholds, the first frame is always predicted in full."""
+        self.pixel_threshold = pixel_threshold
+        self.static_fraction = static_fraction
+        self.region_fraction = region_fraction
+        self.max_reused = max_reused
+        self.size = size
+        self.reference = None
+        self.since_full = 0
+
+    def _thumbnail(self, im):
+        """Returns the blurred low resolution grayscale version of a BGR frame."""
+        h, w = im.shape[:2]
+        thumbnail = cv2.resize(im, (self.size, max(round(h * self.size / w), 1)), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+    def update(self, im):
+        """
+        Decides how a frame is predicted, and updates the reference frame if the detector runs on it.
+
+        Args:
+            im (np.ndarray): BGR frame.
+
+        Returns:
+            decision (str): GATE_REUSED, GATE_REGION or GATE_FULL.
+            region (tuple): Changed region (x1, y1, x2, y2) in frame pixels for GATE_REGION, None otherwise.
+        """
+        thumbnail = self._thumbnail(im)
+        # Region predictions keep the detections outside of the region, so they count towards max_reused too
+        if self.reference is None or self.reference.shape != thumbnail.shape or self.since_full >= self.max_reused:
+            decision, region = GATE_FULL, None
+        else:
+            mask = (cv2.absdiff(thumbnail, self.reference) > self.pixel_threshold).astype(np.uint8)
+            if mask.mean() < self.static_fraction:
+                self.since_full += 1
+                return GATE_REUSED, None
+            x, y, w, h = cv2.boundingRect(mask)
+            if w * h >= self.region_fraction * mask.size:
+                decision, region = GATE_FULL, None
+            else:  # changed region in frame pixels, with a margin for objects partly outside of it
+                gain = im.shape[1] / thumbnail.shape[1]
+                m = max(w, h) // 4 + 2
+                region = (max(int((x - m) * gain), 0), max(int((y - m) * gain), 0),
+                          min(int((x + w + m) * gain), im.shape[1]), min(int((y + h + m) * gain), im.shape[0]))
+                decision = GATE_REGION
+        self.reference = thumbnail
+        self.since_full = 0 if decision == GATE_FULL else self.since_full + 1
+        return decision, region
+
+
+def map_gated(predictor, frames, gate=None, window=None, imgsz=None, orig_shape=None):
+    """
+    Predicts the frames of a video through a motion gate, yielding their results in order.
+
+    Args:
+        predictor (BatchPredictor): Batch predictor of the model.
+        frames (Iterable[np.ndarray]): BGR frames, e.g. decoded from a video.
+        gate (MotionGate, optional): Motion gate, created with the thresholds set in Config if None.
+        window (int, optional): Maximum number of frames in flight, `max_batch` of the predictor if None.
+        imgsz (int, optional): Inference size of the frames, the default inference size if None.
+        orig_shape (tuple, optional): Original (height, width) the results are rescaled to, for frames of a
+            video proxy.
+
+    Yields:
+        result (Results | Exception): Results of each frame, or the exception raised by its prediction, after which
+            the detections of the frame are empty for the following frames.
+        decision (str): Gate decision of the frame, GATE_REUSED, GATE_REGION or GATE_FULL.
+    """
+    gate = gate or MotionGate(Config.MOTION_PIXEL_THRESHOLD, Config.MOTION_STATIC_FRACTION,
+                              Config.MOTION_REGION_FRACTION, Config.MOTION_MAX_REUSED)
+    window = max(window or predictor.max_batch, 1)
+    previous = None  # detections of the previous frame in frame pixels, (n, 6) xyxy, conf, class
+
+    def resolve(im, decision, region, future):
+        """Builds the results of a frame from its prediction and the detections of the previous frame."""
+        nonlocal previous
+        result = result_or_error(future) if future is not None else None
+        if isinstance(result, Exception):
+            previous = previous[:0] if previous is not None else torch.zeros((0, 6))
+            return result, decision
+        if decision == GATE_FULL:
+            data = result.boxes.data
+        elif decision == GATE_REGION:
+            x1, y1, x2, y2 = region
+            crop = result.boxes.data.clone()
+            crop[:, [0, 2]] += x1
+            crop[:, [1, 3]] += y1
+            cx, cy = (previous[:, 0] + previous[:, 2]) / 2, (previous[:, 1] + previous[:, 3]) / 2
+            outside = (cx < x1) | (cx >= x2) | (cy < y1) | (cy >= y2)
+            data = torch.cat((previous[outside], crop))
+        else:
+            data = previous
+        previous = data
+        r = Results(im, path=None, names=predictor.model.names, boxes=data)
+        if orig_shape is not None:
+            r.rescale(orig_shape)
+        return r, decision
+
+    pending = deque()
+    for im in frames:
+        decision, region = gate.update(im)
+        if decision == GATE_FULL:
+            future = predictor.submit(im, None, imgsz)
+        elif decision == GATE_REGION:
+            x1, y1, x2, y2 = region
+            future = predictor.submit(np.ascontiguousarray(im[y1:y2, x1:x2]), None, imgsz)
+        else:
+            future = None
+        pending.append((im, decision, region, future))
+        if len(pending) >= window:
+            yield resolve(*pending.popleft())
+    while pending:
+        yield resolve(*pending.popleft())
@@ -12,31 +12,102 @@ Functions:
       specified directory.
     - get_annotated_image: Generates an annotated image using the provided model and saves it to a 
       specified directory.
+    - get_multi_model_result: Processes an image or video file with several models in one pass, saving
+      the annotated file of each model and returning the results of each model.
+
+    If Config.MOTION_GATE is set, the frames of single model videos are gated on motion: static frames reuse the
+    detections of the previous frame and are marked with `'motion_gate': 'reused'` in the video results.
+
+    If a cascade is given, images and frames are predicted by the smaller model version first, and only the
+    uncertain ones by the requested version, see `cascade.Cascade`. Each image and frame is marked with its
+    `'cascade'` decision in the results, and cascaded videos are not gated on motion.
+
+    With `annotation_mode='clips'`, single model videos are annotated as clips around their frames with detections
+    instead of a full annotated video, see `clips.ClipWriter`.
+
+    If job aggregates are given, they are updated with the detections of each image and frame as it is predicted,
+    see `aggregates.JobAggregates`.
 
 Usage:
     Import the functions from this module and provide an appropriate object detection model and 
-    media files to process and annotate images or videos as needed.
+    media files to process and annotate images or videos as needed. Frames are decoded on the calling
+    thread, from the derivatives of the files at the inference size, and predicted by the model batch
+    predictor, shared with the other requests using the model. Annotated files are drawn on the original images and
+    frames, see `derivatives.get_annotation_image` and `derivatives.get_annotation_frames`.
 """
 
 import os
 import logging
-from PIL import Image
+from contextlib import ExitStack
 import cv2
-from ultralytics.engine.results import Results
-from config import logger
+from ultralytics.utils.plotting import BoxRenderer
+from ultralytics.utils.video import VideoWriter
+from config import Config, logger
+from clips import ClipWriter
+from derivatives import get_annotation_frames, get_annotation_image, get_image, get_video
+from inference import get_batch_predictor, map_models
+from motion import map_gated
+from tracks import TrackCompressor
 import json
 
 logger = logging.getLogger(__name__)
 
 
+def _read_frames(video, vid_stride=1):
+    """
+    Yields the frames of an opened video capture until the end of the video, then releases it.
+
+    Args:
+        video (cv2.VideoCapture): Opened video capture.
+        vid_stride (int): Yield one frame out of `vid_stride`, the others are skipped without being retrieved.
+
+    Yields:
+        np.ndarray: BGR frames.
+    """
+    try:
+        while True:
+            success, frame = video.read()
+            if not success:
+                break
+            yield frame
+            for _ in range(vid_stride - 1):
+                video.grab()
+    finally:
+        video.release()
+
 
-def get_image_text_result(file_path, model):
+def _predict_video(predictor, video, imgsz=None, vid_stride=1, orig_shape=None, cascade=None, counted=True):
+    """
+    Predicts the frames of a video in order, through the cascade if given, otherwise through the motion gate if
+    Config.MOTION_GATE is set.
+
+    Yields:
+        result (Results | Exception): Results of each frame, or the exception raised by its prediction.
+        fields (dict): Decision of the frame added to its results, `cascade` or `motion_gate`, empty if frames are
+            neither cascaded nor gated.
+    """
+    frames = _read_frames(video, vid_stride)
+    if cascade is not None:
+        for r, decision in cascade.map(frames, imgsz=imgsz, orig_shape=orig_shape, counted=counted):
+            yield r, {'cascade': decision}
+    elif Config.MOTION_GATE:
+        for r, decision in map_gated(predictor, frames, imgsz=imgsz, orig_shape=orig_shape):
+            yield r, {'motion_gate': decision}
+    else:
+        for r in predictor.map(frames, imgsz=imgsz, orig_shape=orig_shape):
+            yield r, {}
+
+
+def get_image_text_result(file_path, model, imgsz=None, cascade=None, aggregates=None):
     """
     Processes an image file and returns a list of results with detected objects.
 
     Args:
         file_path (str): Path to the image file.
         model (object): Model used for predictions.
+        imgsz (int, optional): Inference size, the model default if None.
+        cascade (Cascade, optional): Cascade predicting the image with the smaller model version first.
+        aggregates (JobAggregates, optional): Aggregates of the job, updated with the detections of the image.
 
     Returns:
         str: A JSON formatted string containing results for the image.
@@ -45,12 +116,18 @@ def get_image_text_result(file_path, model):
     results_list = []
 
     try:
-        # Open the image file
-        image = Image.open(file_path)
-        logger.debug("Image opened successfully: %s", file_path)
-
-        # Perform prediction using the model
-        results: Results = model.predict(image)
+        # The image is loaded resized to the inference size, detections are mapped back to the original image size
+        predictor = get_batch_predictor(model)
+        im, orig_shape = get_image(file_path, imgsz or predictor.imgsz)
+        if im is None:
+            raise FileNotFoundError(f'Image Not Found {file_path}')
+        if cascade is not None:
+            r, decision = cascade.predict(im, orig_shape, imgsz)
+        else:
+            r, decision = predictor.predict(im, orig_shape, imgsz), None
+        if aggregates is not None:
+            aggregates.update(file_path.split('/')[-1], r)
+        results = [r.slim()]
         logger.debug("Image prediction results: %s", results)
 
         # Check if any objects were detected in the image
@@ -71,6 +148,8 @@ def get_image_text_result(file_path, model):
                     continue
 
             results_list.append({'type': 'image', 'filename': file_path.split('/')[-1], 'objects': res})
+        if decision is not None:
+            results_list[-1]['cascade'] = decision
     except Exception as e:
         results_list.append({'type': 'image', 'filename': file_path.split('/')[-1], 'error': f'Failed to process image: {str(e)}'})
 
@@ -78,7 +157,8 @@ def get_image_text_result(file_path, model):
 
 
 
-def get_video_text_result(file_path, model):
+def get_video_text_result(file_path, model, imgsz=None, vid_stride=1, result_format='frames', cascade=None,
+                          aggregates=None):
     """
     Processes a video file and returns a dictionary with video results,
     where each video is an object containing all frames and detected objects.
@@ -86,9 +166,15 @@ def get_video_text_result(file_path, model):
     Args:
         file_path (str): Path to the video file.
         model (object): Model used for predictions.
+        imgsz (int, optional): Inference size, the model default if None.
+        vid_stride (int): Predict one frame out of `vid_stride`, frame numbers and times refer to the source video.
+        result_format (str): 'frames' to return the objects of each frame, 'tracks' to return the tracked objects
+            of the video with their keyframed trajectories instead, see `tracks.TrackCompressor`.
+        cascade (Cascade, optional): Cascade predicting the frames with the smaller model version first.
+        aggregates (JobAggregates, optional): Aggregates of the job, updated with the detections of each frame.
 
     Returns:
-        dict: A dictionary containing results for the video with all frames included.
+        dict: A dictionary containing results for the video with all frames included, or all tracks.
     """
     video_results = {
         'type': 'video',
@@ -96,9 +182,12 @@ def get_video_text_result(file_path, model):
         'frames': []
     }
 
+    video = None
     try:
-        # Open the video file
-        video = cv2.VideoCapture(file_path)
+        # Open the video proxy at the inference size, detections are mapped back to the original video size
+        predictor = get_batch_predictor(model)
+        source, orig_shape = get_video(file_path, imgsz or predictor.imgsz)
+        video = cv2.VideoCapture(source)
 
         if not video.isOpened():
             logger.error(f"Failed to open video file {file_path}")
@@ -112,80 +201,91 @@ def get_video_text_result(file_path, model):
             logger.error(f"Invalid FPS value: {fps} for video file {file_path}")
             return [{'error': f'Invalid FPS value for video file {file_path}'}]  
 
-        frame_number = 0
-
-        while True:
-            ret, frame = video.read()
-            if not ret:
-                break
-
+        # Frames are decoded here and predicted in micro-batches, each result is released once converted
+        compressor = TrackCompressor(model.names, fps, vid_stride) if result_format == 'tracks' else None
+        results = _predict_video(predictor, video, imgsz, vid_stride, orig_shape, cascade)
+        for i, (r, fields) in enumerate(results):
+            frame_number = i * vid_stride
             time_in_seconds = round(frame_number / fps, 2) if fps > 0 else 0
-
-            # Perform the frame prediction using the model
-            try:
-                results: Results = model.predict(frame)
-                logger.debug("Frame %d prediction results: %s", frame_number, results)
-            except Exception as predict_error:
-                logger.error(f"Prediction failed for frame {frame_number} of video {file_path}: {str(predict_error)}")
-                frame_data = {
-                    'frame_number': frame_number,
-                    'time': time_in_seconds,
-                    'objects': []  
-                }
-                video_results['frames'].append(frame_data)
-                frame_number += 1
-                # Skip to the next frame if prediction fails
-                continue  
+            if isinstance(r, Exception):
+                # Skip to the next frame if prediction fails, the frame has no objects
+                logger.error(f"Prediction failed for frame {frame_number} of video {file_path}: {str(r)}")
+                if compressor is None:
+                    video_results['frames'].append({'frame_number': frame_number, 'time': time_in_seconds,
+                                                    'objects': []})
+                continue
+            if aggregates is not None:
+                aggregates.update(video_results['filename'], r, frame_number, time_in_seconds)
+            if compressor is not None:
+                compressor.update(frame_number, r)
+                continue
+            logger.debug("Frame %d prediction results: %s", frame_number, r)
 
             # Check if any objects were detected in the frame
             frame_objects = []
-            for r in results:
-                try:
-                    objects = json.loads(r.tojson())
-                    if isinstance(objects, list):
-                        frame_objects.extend(objects)
-                    else:
-                        frame_objects.append(objects)
-                except json.JSONDecodeError as json_error:
-                    logger.error(f"JSON decoding failed for frame {frame_number} of video {file_path}: {str(json_error)}")
-                    continue
+            try:
+                objects = json.loads(r.tojson())
+                if isinstance(objects, list):
+                    frame_objects.extend(objects)
+                else:
+                    frame_objects.append(objects)
+            except json.JSONDecodeError as json_error:
+                logger.error(f"JSON decoding failed for frame {frame_number} of video {file_path}: {str(json_error)}")
 
             frame_data = {
                 'frame_number': frame_number,
                 'time': time_in_seconds,
-                'objects': frame_objects
+                'objects': frame_objects,
+                **fields
             }
 
             video_results['frames'].append(frame_data)
-            frame_number += 1
+
+        if compressor is not None:
+            video_results = compressor.result(video_results['filename'])
 
     except Exception as e:
         logger.error(f"Failed to process video {file_path}: {str(e)}")
         return [{'error': f'Failed to process video {file_path}: {str(e)}'}]  
 
     finally:
-        video.release()
+        if video is not None:
+            video.release()
 
     return [video_results]  
 
 
 
-def get_annotated_video(file_path, model, dataset_id, job_id):
+def get_annotated_video(file_path, model, dataset_id, job_id, imgsz=None, vid_stride=1, cascade=None,
+                        annotation_mode='video', clip_classes=None):
     """
     Generates an annotated video using the provided model and saves it to the specified directory.
 
+    Frames are predicted on the video proxy and plotted on the original frames on the inference thread, in bulk with
+    BoxRenderer if Config.FAST_ANNOTATION is set, and encoded by a background writer using the codec, quality and resolution set in Config. The video is written to
+    `annotated_files/<job_id>/annotated_<video name>` with the suffix of the codec container, or as clips around its
+    frames with detections, `annotated_<video name>_clip<n>`, indexed in `annotated_<video name>_clips.json`.
+
     Args:
         file_path (str): Path to the video file.
         model (object): Model used for predictions.
         dataset_id (str): ID of the dataset.
         job_id (str): ID of the job.
+        imgsz (int, optional): Inference size, the model default if None.
+        vid_stride (int): Predict and annotate one frame out of `vid_stride`, at a frame rate divided accordingly.
+        cascade (Cascade, optional): Cascade predicting the frames with the smaller model version first, the frames
+            are not counted again in its report.
+        annotation_mode (str): 'video' to save the full annotated video, 'clips' to save only annotated clips around
+            the frames with detections.
+        clip_classes (list, optional): Classes of the detections starting clips, any class if None.
 
     Returns:
         None
     """
+    frames = None
     try:  
         # # Define desired output directory for annotated video
-        annotated_video_dir = os.path.join('/user/uploads', str(dataset_id), 'annotated_files', str(job_id))
+        annotated_video_dir = os.path.join(Config.UPLOADS_BASE_DIR, str(dataset_id), 'annotated_files', str(job_id))
         logger.debug("Desired output directory for annotated video: %s", annotated_video_dir)
 
         # Create the directory if it doesn't exist
@@ -195,14 +295,48 @@ def get_annotated_video(file_path, model, dataset_id, job_id):
         # Create output filename and path for the annotated video
         output_filename = f"annotated_{os.path.basename(file_path)}"
         output_path = os.path.join(annotated_video_dir, output_filename)
-        logger.debug("Expected path for the annotated video (output_path): %s", output_path)
 
-        # Perform inference using Ultralytics YOLO and specify the save directory
-        model.predict(file_path, save=True, project=annotated_video_dir, name="annotated_video")
+        # Read the frame rate of the video proxy at the inference size, and the original frames the annotated video is
+        # drawn on, read only for the frames written
+        predictor = get_batch_predictor(model)
+        source, orig_shape = get_video(file_path, imgsz or predictor.imgsz)
+        video = cv2.VideoCapture(source)
+        if not video.isOpened():
+            raise IOError(f'Failed to open video file {file_path}')
+        fps = video.get(cv2.CAP_PROP_FPS)
+        size = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        frames = get_annotation_frames(file_path, orig_shape)
+        if frames is not None:
+            size = (orig_shape[1], orig_shape[0])
+
+        # Renderer reused across frames, so colors and label glyphs are computed once per video
+        renderer = BoxRenderer(model.names, Config.ANNOTATION_LINE_WIDTH, Config.ANNOTATION_LABELS) \
+            if Config.FAST_ANNOTATION else None
+
+        # Predict frames in micro-batches and queue each plotted frame to the background encoder, of the full video
+        # or of the clip the frame is in
+        clips = ClipWriter(output_path, fps / vid_stride, size, renderer, clip_classes,
+                           frames=frames.read if frames is not None else None) \
+            if annotation_mode == 'clips' else None
+        with clips or VideoWriter(output_path, fps=fps / vid_stride, size=size,
+                                  codec=Config.ANNOTATED_VIDEO_CODEC,
+                                  quality=Config.ANNOTATED_VIDEO_QUALITY,
+                                  max_size=Config.ANNOTATED_VIDEO_MAX_SIZE,
+                                  queue_size=Config.ANNOTATED_VIDEO_QUEUE_SIZE) as writer:
+            logger.debug("Expected path for the annotated video (output_path): %s", writer.path)
+            results = _predict_video(predictor, video, imgsz, vid_stride, orig_shape, cascade, counted=False)
+            for i, (r, _) in enumerate(results):
+                if isinstance(r, Exception):
+                    raise r
+                if clips is not None:
+                    clips.write(r, i * vid_stride, round(i * vid_stride / fps, 2))
+                    continue
+                if frames is not None:
+                    r.orig_img = frames.read(i * vid_stride)
+                writer.write(r.plot(line_width=Config.ANNOTATION_LINE_WIDTH, labels=Config.ANNOTATION_LABELS,
+                                    renderer=renderer))
 
-        # Check if the annotated video file was saved successfully 
-        if os.path.exists(output_path):
-            logger.debug("Annotated video saved at: %s", output_path)
+        logger.debug("Annotated video saved at: %s", writer.path)
         
         return None
 
@@ -210,9 +344,13 @@ def get_annotated_video(file_path, model, dataset_id, job_id):
         logger.error("Failed to process video %s: %s", file_path, str(e))
         return None
 
+    finally:
+        if frames is not None:
+            frames.release()
+
 
 
-def get_annotated_image(file_path, model, dataset_id, job_id):  
+def get_annotated_image(file_path, model, dataset_id, job_id, imgsz=None, cascade=None):
     """
     Generates an annotated image using the provided model and saves it to the specified directory.
 
@@ -221,13 +359,16 @@ def get_annotated_image(file_path, model, dataset_id, job_id):
         model (object): Model used for predictions.
         dataset_id (str): ID of the dataset.
         job_id (str): ID of the job.
+        imgsz (int, optional): Inference size, the model default if None.
+        cascade (Cascade, optional): Cascade predicting the image with the smaller model version first, the image
+            is not counted again in its report.
 
     Returns:
         None
     """
     try:
         # Define desired output directory for annotated image
-        annotated_image_dir = os.path.join('/user/uploads', str(dataset_id), 'annotated_files', str(job_id))
+        annotated_image_dir = os.path.join(Config.UPLOADS_BASE_DIR, str(dataset_id), 'annotated_files', str(job_id))
         logger.debug("Desired output directory for annotated image: %s", annotated_image_dir)
 
         # Creates the directory if it doesn't exist
@@ -239,8 +380,19 @@ def get_annotated_image(file_path, model, dataset_id, job_id):
         output_path = os.path.join(annotated_image_dir, annotated_filename)
         logger.debug("Expected path for the annotated image (output_path): %s", output_path)
         
-        # Perform inference using Ultralytics YOLO and specify the save directory
-        model.predict(file_path, save=True, project=annotated_image_dir, name=annotated_filename)
+        # Perform inference with the model batch predictor, then plot on the original image and save the annotated
+        # image
+        predictor = get_batch_predictor(model)
+        im, orig_shape = get_image(file_path, imgsz or predictor.imgsz)
+        if im is None:
+            raise FileNotFoundError(f'Image Not Found {file_path}')
+        renderer = BoxRenderer(model.names, Config.ANNOTATION_LINE_WIDTH, Config.ANNOTATION_LABELS) \
+            if Config.FAST_ANNOTATION else None
+        r = cascade.predict(im, orig_shape, imgsz, counted=False)[0] if cascade else \
+            predictor.predict(im, orig_shape, imgsz)
+        r.orig_img = get_annotation_image(file_path, im, orig_shape)
+        cv2.imwrite(output_path, r.plot(line_width=Config.ANNOTATION_LINE_WIDTH, labels=Config.ANNOTATION_LABELS,
+                                        renderer=renderer))
 
         # Check if the annotated image file was saved successfully
         if os.path.exists(output_path):
@@ -250,4 +402,101 @@ def get_annotated_image(file_path, model, dataset_id, job_id):
 
     except Exception as e:
         logger.error("Failed to process image: %s", str(e))
-        return None
\ No newline at end of file
+        return None
+
+
+def get_multi_model_result(file_path, category, models, imgsz=None, vid_stride=1, aggregates=None):
+    """
+    Processes an image or video file with several models in one pass, returning the results of each model.
+
+    The file is decoded once and each image or frame is fed to the batch predictor of every model. The annotated
+    file of each model is drawn on the original image or frames and saved as `annotated_<file name>` in the directory
+    given with the model.
+
+    Args:
+        file_path (str): Path to the image or video file.
+        category (str): The category of the file ('image', 'video').
+        models (list): (model, annotated directory) pairs.
+        imgsz (int, optional): Inference size, the default of each model if None.
+        vid_stride (int): Predict and annotate one video frame out of `vid_stride`.
+        aggregates (list, optional): Aggregates of the job of each model, in the order of `models`, updated with the
+            detections of each image and frame of the model.
+
+    Returns:
+        list: The results of the file for each model, in the order of `models`, each in the format of
+        `get_image_text_result` or `get_video_text_result`.
+    """
+    filename = os.path.basename(file_path)
+    predictors = [get_batch_predictor(model) for model, _ in models]
+    renderers = [BoxRenderer(model.names, Config.ANNOTATION_LINE_WIDTH, Config.ANNOTATION_LABELS)
+                 if Config.FAST_ANNOTATION else None for model, _ in models]
+    plot_args = {'line_width': Config.ANNOTATION_LINE_WIDTH, 'labels': Config.ANNOTATION_LABELS}
+    for _, annotated_dir in models:
+        os.makedirs(annotated_dir, exist_ok=True)
+    aggregates = aggregates or [None] * len(models)
+
+    try:
+        if category == 'image':
+            # Load the image once, then predict it with every model concurrently
+            im, orig_shape = get_image(file_path, imgsz or predictors[0].imgsz)
+            if im is None:
+                raise FileNotFoundError(f'Image Not Found {file_path}')
+            futures = [predictor.submit(im, orig_shape, imgsz) for predictor in predictors]
+            original = get_annotation_image(file_path, im, orig_shape)
+            results_lists = []
+            for (_, annotated_dir), renderer, future, model_aggregates in zip(models, renderers, futures, aggregates):
+                r = future.result()
+                if model_aggregates is not None:
+                    model_aggregates.update(filename, r)
+                r.orig_img = original
+                results_lists.append([{'type': 'image', 'filename': filename, 'objects': json.loads(r.tojson())}])
+                annotated_path = os.path.join(annotated_dir, f"annotated_{filename}")
+                cv2.imwrite(annotated_path, r.plot(renderer=renderer, **plot_args))
+            return results_lists
+
+        # Decode the video proxy once, each frame is predicted by every model and annotated in the same pass
+        source, orig_shape = get_video(file_path, imgsz or predictors[0].imgsz)
+        video = cv2.VideoCapture(source)
+        if not video.isOpened():
+            raise IOError(f'Failed to open video file {file_path}')
+        fps = video.get(cv2.CAP_PROP_FPS)
+        if fps <= 0:
+            video.release()
+            raise ValueError(f'Invalid FPS value for video file {file_path}')
+        size = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        video_results = [{'type': 'video', 'filename': filename, 'frames': []} for _ in models]
+        with ExitStack() as stack:
+            originals = get_annotation_frames(file_path, orig_shape)
+            if originals is not None:
+                stack.enter_context(originals)
+                size = (orig_shape[1], orig_shape[0])
+            writers = [stack.enter_context(VideoWriter(os.path.join(annotated_dir, f"annotated_{filename}"),
+                                                       fps=fps / vid_stride, size=size,
+                                                       codec=Config.ANNOTATED_VIDEO_CODEC,
+                                                       quality=Config.ANNOTATED_VIDEO_QUALITY,
+                                                       max_size=Config.ANNOTATED_VIDEO_MAX_SIZE,
+                                                       queue_size=Config.ANNOTATED_VIDEO_QUEUE_SIZE))
+                       for _, annotated_dir in models]
+            frames = _read_frames(video, vid_stride)
+            for i, results in enumerate(map_models(predictors, frames, imgsz=imgsz, orig_shape=orig_shape)):
+                frame_number = i * vid_stride
+                original = originals.read(frame_number) if originals is not None else None
+                for video_result, writer, renderer, r, model_aggregates in zip(video_results, writers, renderers,
+                                                                               results, aggregates):
+                    if model_aggregates is not None:
+                        model_aggregates.update(filename, r, frame_number, round(frame_number / fps, 2))
+                    if original is not None:
+                        r.orig_img = original
+                    video_result['frames'].append({
+                        'frame_number': frame_number,
+                        'time': round(frame_number / fps, 2),
+                        'objects': json.loads(r.tojson())
+                    })
+                    writer.write(r.plot(renderer=renderer, **plot_args))
+        return [[video_result] for video_result in video_results]
+
+    except Exception as e:
+        logger.error("Failed to process %s %s with %d models: %s", category, file_path, len(models), str(e))
+        return [[{'type': category, 'filename': filename, 'error': f'Failed to process {category}: {str(e)}'}]
+                for _ in models]
@@ -0,0 +1,188 @@
+"""
+This module stores the results of each job in an indexed result file, so that a file or frame range of the results
+is read without loading and parsing the whole result of the job.
+
+The results of a job are written when the job completes, to `/user/uploads/<dataset_id>/results/<job_id>/`:
+    - `detections.npy`: the detections of every image and predicted frame, in file then frame order, as fixed size
+      records of box, confidence, class and track id (-1 if not tracked);
+    - `frames.npy`: one record per image and predicted frame, with the index of its file, its frame number and time,
+      and the offset and number of its detections;
+    - `index.json`: the class names, and for each file its name, type, frame rate, error if any and range of frame
+      records.
+The results of each compared model of a job are stored the same way in the subdirectory
+`<job_id>/<model_id>_<model_version>/`, named like its annotated files. Detections are stored as float32, the
+precision they are predicted in, so the values read back are the values of the JSON result. Track-compressed video
+results are stored expanded to their frames.
+
+The arrays are memory-mapped when read: the frame records of a frame range are found by binary search over the frame
+numbers of the file, and its detections are a contiguous slice of `detections.npy`, so only these pages are read.
+
+Constants:
+    DETECTION_DTYPE (np.dtype): Record of a detection.
+    FRAME_DTYPE (np.dtype): Record of an image or predicted frame.
+
+Functions:
+    - get_results_dir(dataset_id, job_id, model): Returns the directory of the result file of a job or compared model.
+    - save_results(directory, inference_results, names): Writes the indexed result file of a job.
+    - read_results(directory, filename, start_frame, end_frame, classes, min_confidence): Reads a slice of the
+      result file of a job.
+"""
+
+import json
+import os
+
+import numpy as np
+from config import Config, logger
+from tracks import expand_tracks
+
+# Records of detections, and of images and predicted frames with the range of their detections
+DETECTION_DTYPE = np.dtype([('x1', '<f4'), ('y1', '<f4'), ('x2', '<f4'), ('y2', '<f4'), ('confidence', '<f4'),
+                            ('class', '<i4'), ('track_id', '<i4')])
+FRAME_DTYPE = np.dtype([('file', '<i4'), ('frame_number', '<i8'), ('time', '<f8'), ('offset', '<i8'),
+                        ('count', '<i4')])
+
+
+def get_results_dir(dataset_id, job_id, model=None):
+    """Returns the directory of the result file of a job, or of its compared model `<model_id>_<model_version>`."""
+    directory = os.path.join(Config.UPLOADS_BASE_DIR, str(dataset_id), 'results', str(job_id))
+    return os.path.join(directory, model) if model is not None else directory
+
+
+def _detections(objects):
+    """Returns the detection records of the objects of an image or frame, in the format of `Results.tojson`."""
+    return np.array([(o['box']['x1'], o['box']['y1'], o['box']['x2'], o['box']['y2'], o['confidence'], o['class'],
+                      o.get('track_id', -1)) for o in objects], dtype=DETECTION_DTYPE)
+
+
+def _save(path, array):
+    """Saves an array atomically, so that readers never load a partially written file."""
+    tmp = f'{path}.{os.getpid()}.tmp.npy'
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def save_results(directory, inference_results, names):
+    """
+    Writes the indexed result file of a job, replacing any previous one.
+
+    Args:
+        directory (str): Directory of the result file, from `get_results_dir`.
+        inference_results (list): Results of each file of the job, in the format of `get_image_text_result`,
+            `get_video_text_result` or `TrackCompressor.result`.
+        names (dict): Class names of the model.
+
+    Returns:
+        None
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        files, frames, detections, offset = [], [], [], 0
+        for i, result in enumerate(inference_results):
+            entry = {'filename': result.get('filename'), 'type': result.get('type'), 'rows': [len(frames)] * 2}
+            if 'error' in result:
+                entry['error'] = result['error']
+            if result.get('fps') is not None:
+                entry['fps'] = result['fps']
+            if 'tracks' in result:
+                result = expand_tracks(result)
+            if 'frames' in result:
+                items = [(f['frame_number'], f['time'], f['objects']) for f in result['frames']]
+            else:
+                items = [(0, 0.0, result.get('objects') or [])] if 'error' not in result else []
+            for frame_number, time, objects in items:
+                records = _detections(objects)
+                frames.append((i, frame_number, time, offset, len(records)))
+                detections.append(records)
+                offset += len(records)
+            entry['rows'][1] = len(frames)
+            files.append(entry)
+
+        _save(os.path.join(directory, 'detections.npy'),
+              np.concatenate(detections) if detections else np.zeros(0, DETECTION_DTYPE))
+        _save(os.path.join(directory, 'frames.npy'), np.array(frames, dtype=FRAME_DTYPE))
+        tmp = os.path.join(directory, f'index.{os.getpid()}.tmp.json')
+        with open(tmp, 'w') as f:
+            json.dump({'names': {int(k): v for k, v in names.items()}, 'files': files}, f)
+        os.replace(tmp, os.path.join(directory, 'index.json'))  # written last, the result file is complete
+        logger.debug("Result file of %d frames and %d detections saved in %s", len(frames), offset, directory)
+
+    except Exception as e:
+        logger.error("Failed to save the result file in %s: %s", directory, str(e))
+
+
+def read_results(directory, filename=None, start_frame=None, end_frame=None, classes=None, min_confidence=None):
+    """
+    Reads a slice of the result file of a job, from its memory-mapped arrays.
+
+    Args:
+        directory (str): Directory of the result file, from `get_results_dir`.
+        filename (str, optional): Name of the file to read the results of, all files if None.
+        start_frame (int, optional): First frame number of the slice, from the first frame if None.
+        end_frame (int, optional): Last frame number of the slice, included, to the last frame if None.
+        classes (Iterable[int], optional): Classes of the detections returned, all classes if None.
+        min_confidence (float, optional): Minimum confidence of the detections returned.
+
+    Returns:
+        list: The results of each file of the slice, in the format of `get_image_text_result` for images and of
+        `get_video_text_result` for videos, with the frame rate of track-compressed videos and the track id of
+        tracked objects. Images count as frame 0.
+
+    Raises:
+        FileNotFoundError: If the job has no result file, or no file of that name.
+    """
+    with open(os.path.join(directory, 'index.json')) as f:
+        index = json.load(f)
+    names = {int(k): v for k, v in index['names'].items()}
+    files = [entry for entry in index['files'] if filename is None or entry['filename'] == filename]
+    if not files:
+        raise FileNotFoundError(f'No results for file {filename}')
+
+    frames = np.load(os.path.join(directory, 'frames.npy'), mmap_mode='r')
+    detections = np.load(os.path.join(directory, 'detections.npy'), mmap_mode='r')
+    classes = None if classes is None else np.array(list(classes), dtype=np.int32)
+    results = []
+    for entry in files:
+        result = {'type': entry['type'], 'filename': entry['filename']}
+        if 'error' in entry:
+            results.append({**result, 'error': entry['error']})
+            continue
+
+        # Frame records of the range, found by binary search over the frame numbers of the file
+        first, last = entry['rows']
+        frame_numbers = frames['frame_number'][first:last]
+        if end_frame is not None:
+            last = first + int(np.searchsorted(frame_numbers, end_frame, 'right'))
+        if start_frame is not None:
+            first += int(np.searchsorted(frame_numbers, start_frame, 'left'))
+        records = np.array(frames[first:max(first, last)])
+
+        # Detections of the range, a contiguous slice filtered once loaded
+        begin, end = (int(records['offset'][0]), int(records['offset'][-1] + records['count'][-1])) if len(records) \
+            else (0, 0)
+        data = np.array(detections[begin:end])
+        frame_index = np.repeat(np.arange(len(records)), records['count'])
+        keep = np.ones(len(data), dtype=bool)
+        if classes is not None:
+            keep &= np.isin(data['class'], classes)
+        if min_confidence is not None:
+            keep &= data['confidence'] >= min_confidence
+        data, frame_index = data[keep], frame_index[keep]
+        splits = np.searchsorted(frame_index, np.arange(1, len(records)))
+
+        objects = []
+        for frame_data in np.split(data, splits):
+            objects.append([{'name': names[int(d['class'])], 'class': int(d['class']),
+                             'confidence': float(d['confidence']),
+                             'box': {'x1': float(d['x1']), 'y1': float(d['y1']), 'x2': float(d['x2']),
+                                     'y2': float(d['y2'])},
+                             **({'track_id': int(d['track_id'])} if d['track_id'] >= 0 else {})}
+                            for d in frame_data])
+        if entry['type'] == 'image':
+            result['objects'] = objects[0] if objects else []
+        else:
+            if 'fps' in entry:
+                result['fps'] = entry['fps']
+            result['frames'] = [{'frame_number': int(r['frame_number']), 'time': float(r['time']), 'objects': o}
+                                for r, o in zip(records, objects)]
+        results.append(result)
+    return results
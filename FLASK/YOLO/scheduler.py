@@ -0,0 +1,252 @@
+"""
+This module schedules the inference work of concurrent jobs in weighted fair share order, so that a long job does not
+starve the jobs of other users.
+
+The work of a job is split into work units, the frames it submits to the batch predictor of a model and the segments
+of its long videos submitted to the video workers, and each unit is queued under the job set as the current job of
+the request thread. Units are served by stride scheduling in two levels: users in proportion to their weight in
+Config.SCHEDULER_USER_WEIGHTS, 1 by default, then the jobs of a user in proportion to the weight of their priority
+class. The priority class of a job is set by its token cost, so that small jobs get a larger share and complete
+quickly even while large jobs are running, while large jobs still progress. A user or job that becomes active again
+starts at the current virtual time, without credit for the time it was idle.
+
+Constants:
+    PRIORITY_CLASSES (tuple): Priority classes, from the highest.
+
+Classes:
+    Job: Job under which work units are scheduled, with its user and priority class.
+    FairQueue: Queue of the work units of concurrent jobs, served in weighted fair share order.
+    FairExecutor: Runs the work units of concurrent jobs on an executor in weighted fair share order.
+
+Functions:
+    - priority_class(token_cost): Returns the priority class of a job from its token cost.
+    - job_context(job): Context manager setting the current job of the thread.
+    - current_job(): Returns the current job of the thread.
+"""
+
+import contextlib
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextvars import ContextVar
+from queue import Empty
+
+from config import Config
+
+# Priority classes, from the highest, weighted by Config.SCHEDULER_PRIORITY_WEIGHTS
+PRIORITY_CLASSES = ('high', 'normal', 'low')
+
+
+class Job:
+    """
+    Job under which work units are scheduled.
+
+    Attributes:
+        job_id (str): ID of the job.
+        user (str): User of the job, e.g. the email of the dataset owner, None for work outside of jobs.
+        priority (str): Priority class of the job, one of PRIORITY_CLASSES.
+        weight (float): Share of the job among the jobs of its user, from its priority class.
+    """
+
+    def __init__(self, job_id=None, user=None, priority='normal'):
+        """Initialize a job of a user in a priority class."""
+        self.job_id = job_id
+        self.user = user
+        self.priority = priority
+        self.weight = Config.SCHEDULER_PRIORITY_WEIGHTS[PRIORITY_CLASSES.index(priority)]
+
+
+def priority_class(token_cost):
+    """
+    Returns the priority class of a job from its token cost.
+
+    Args:
+        token_cost (float): Token cost of the job, None if unknown.
+
+    Returns:
+        str: The first class of PRIORITY_CLASSES whose Config.SCHEDULER_PRIORITY_TOKENS bound is above the cost,
+        the lowest class above all bounds, 'normal' if the cost is unknown.
+    """
+    if token_cost is None:
+        return 'normal'
+    for priority, bound in zip(PRIORITY_CLASSES, Config.SCHEDULER_PRIORITY_TOKENS):
+        if float(token_cost) < bound:
+            return priority
+    return PRIORITY_CLASSES[-1]
+
+
+# Current job of each thread, work units submitted outside of a job are scheduled under a shared anonymous job
+_current_job = ContextVar('current_job', default=None)
+_anonymous_job = None
+
+
+@contextlib.contextmanager
+def job_context(job):
+    """Context manager setting the current job of the thread, under which its work units are scheduled."""
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
+
+
+def current_job():
+    """Returns the current job of the thread, a shared anonymous job outside of job contexts."""
+    global _anonymous_job
+    job = _current_job.get()
+    if job is None:
+        job = _anonymous_job = _anonymous_job or Job()
+    return job
+
+
+class _Flow:
+    """Work units of a user or job waiting to be served, with the virtual time of its next unit."""
+
+    def __init__(self, start):
+        """Start an empty flow at a virtual time."""
+        self.vtime = start
+        self.children = {}  # jobs of a user flow
+        self.items = deque()  # units of a job flow
+
+
+class FairQueue:
+    """
+    Queue of the work units of concurrent jobs, served in weighted fair share order.
+
+    Each unit is queued under the current job of the submitting thread. `get` serves the active user with the lowest
+    virtual time, then its active job with the lowest virtual time, and advances them by the inverse of their weight,
+    so that units are served in proportion to the weights of users, then of the jobs of each user.
+
+    Attributes:
+        user_weights (dict): Weight of each user, 1 for users not listed.
+    """
+
+    def __init__(self, user_weights=None):
+        """
+        Initialize an empty queue.
+
+        Args:
+            user_weights (dict, optional): Weight of each user, Config.SCHEDULER_USER_WEIGHTS if None.
+        """
+        self.user_weights = Config.SCHEDULER_USER_WEIGHTS if user_weights is None else user_weights
+        self.users = {}
+        self.time = 0.0  # virtual time of the last user served
+        self.size = 0
+        self.lock = threading.Condition()
+
+    def put(self, item, job=None):
+        """
+        Queue a work unit.
+
+        Args:
+            item (object): Work unit.
+            job (Job, optional): Job of the unit, the current job of the thread if None.
+        """
+        job = job or current_job()
+        with self.lock:
+            user = self.users.get(job.user)
+            if user is None:
+                user = self.users[job.user] = _Flow(self.time)
+            flow = user.children.get(job)
+            if flow is None:  # a job starts at the lowest virtual time of the active jobs of its user
+                flow = user.children[job] = _Flow(min((f.vtime for f in user.children.values()), default=0.0))
+            flow.items.append(item)
+            self.size += 1
+            self.lock.notify()
+
+    def get(self, block=True, timeout=None):
+        """
+        Remove and return the next work unit in weighted fair share order.
+
+        Args:
+            block (bool): Whether to wait for a unit if the queue is empty.
+            timeout (float, optional): Maximum time in seconds to wait, forever if None.
+
+        Returns:
+            (object): The work unit.
+
+        Raises:
+            Empty: If no unit was queued in time.
+        """
+        with self.lock:
+            if not self.lock.wait_for(lambda: self.size, timeout if block else 0):
+                raise Empty
+            name, user = min(self.users.items(), key=lambda u: u[1].vtime)
+            job, flow = min(user.children.items(), key=lambda j: j[1].vtime)
+            item = flow.items.popleft()
+            self.size -= 1
+            self.time = user.vtime
+            user.vtime += 1 / self.user_weights.get(name, 1.0)
+            flow.vtime += 1 / job.weight
+            if not flow.items:
+                del user.children[job]
+                if not user.children:
+                    del self.users[name]
+            return item
+
+    def qsize(self):
+        """Returns the number of work units queued."""
+        return self.size
+
+
+class FairExecutor:
+    """
+    Runs the work units of concurrent jobs on an executor in weighted fair share order, with at most `slots` units
+    submitted to the executor at a time, so that units queued later by other jobs are not run after all the units
+    queued before them.
+
+    Attributes:
+        executor (Executor): Executor running the units, e.g. a pool of worker processes.
+        queue (FairQueue): Units waiting for a slot.
+    """
+
+    def __init__(self, executor, slots, user_weights=None):
+        """
+        Start the dispatcher thread of an executor.
+
+        Args:
+            executor (Executor): Executor running the units.
+            slots (int): Maximum number of units submitted to the executor at a time, e.g. its number of workers.
+            user_weights (dict, optional): Weight of each user, Config.SCHEDULER_USER_WEIGHTS if None.
+        """
+        self.executor = executor
+        self.queue = FairQueue(user_weights)
+        self.slots = threading.Semaphore(max(slots, 1))
+        self.thread = threading.Thread(target=self._dispatch, daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue a call under the current job of the thread.
+
+        Returns:
+            (Future): Future of the result of the call, which can be cancelled until it is submitted to the executor.
+        """
+        future = Future()
+        self.queue.put((future, fn, args, kwargs))
+        return future
+
+    def _release(self, future, inner):
+        """Releases the slot of a finished unit and routes its result to the future returned by `submit`."""
+        self.slots.release()
+        if inner.cancelled():
+            future.cancel()
+        elif inner.exception() is not None:
+            future.set_exception(inner.exception())
+        else:
+            future.set_result(inner.result())
+
+    def _dispatch(self):
+        """Submit units to the executor in fair share order as slots free up, until the process exits."""
+        while True:
+            self.slots.acquire()
+            future, fn, args, kwargs = self.queue.get()
+            if not future.set_running_or_notify_cancel():
+                self.slots.release()
+                continue
+            try:
+                self.executor.submit(fn, *args, **kwargs).add_done_callback(
+                    lambda inner, future=future: self._release(future, inner))
+            except Exception as e:
+                self.slots.release()
+                future.set_exception(e)
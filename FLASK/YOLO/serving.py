@@ -0,0 +1,75 @@
+"""
+This module prepares the model replicas of the production serving mode, run by gunicorn with `gunicorn.conf.py`.
+
+The application is loaded once in the gunicorn master process, where the models of `model_dict` are fused and frozen
+before the replicas are forked, so their weights stay in pages shared read-only by all replicas. Each replica is
+pinned to its own set of cores, with torch and OpenCV thread budgets matching it, and serves requests on several
+threads that share the micro-batching predictor of each model.
+
+Functions:
+    - get_replica_count(): Returns the number of replicas to serve with, sized to the cores available.
+    - share_models(): Fuses and freezes the models before the replicas are forked.
+    - configure_replica(index): Pins a replica to its cores and sets its thread budgets.
+"""
+
+import contextlib
+import os
+
+import cv2
+import torch
+from config import Config, logger
+
+
+def _available_cores():
+    """Returns the sorted list of cores the process may run on."""
+    with contextlib.suppress(AttributeError):  # sched_getaffinity is Linux only
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def get_replica_count():
+    """
+    Returns the number of replicas to serve with.
+
+    Returns:
+        int: Config.SERVING_REPLICAS if set, otherwise one replica per Config.SERVING_THREADS_PER_REPLICA available
+        cores.
+    """
+    if Config.SERVING_REPLICAS:
+        return Config.SERVING_REPLICAS
+    return max(len(_available_cores()) // max(Config.SERVING_THREADS_PER_REPLICA, 1), 1)
+
+
+def share_models():
+    """
+    Fuses and freezes the models of `model_dict` in the master process, before the replicas are forked.
+
+    The predictor of each replica would otherwise fuse its own copy of the Conv and BatchNorm layers on first use,
+    writing new weights in every replica. Models loaded from inference artifacts are already fused, with weights
+    mapped from their artifact file.
+    """
+    from utils import model_dict
+
+    for versions in model_dict.values():
+        for model in versions.values():
+            model.model.fuse(verbose=False).eval()
+    logger.debug("Models fused and shared with replicas: %s", {k: list(v) for k, v in model_dict.items()})
+
+
+def configure_replica(index):
+    """
+    Pins a replica to its share of the available cores and sets its torch and OpenCV thread budgets.
+
+    Args:
+        index (int): Index of the replica, from 0 to `get_replica_count() - 1`.
+    """
+    cores = _available_cores()
+    per_replica = max(len(cores) // get_replica_count(), 1)
+    replica_cores = cores[index * per_replica:(index + 1) * per_replica] or [cores[index % len(cores)]]
+    with contextlib.suppress(AttributeError):  # sched_setaffinity is Linux only
+        os.sched_setaffinity(0, replica_cores)
+    torch.set_num_threads(len(replica_cores))
+    with contextlib.suppress(RuntimeError):  # can only be set before the first parallel work of the process
+        torch.set_num_interop_threads(1)
+    cv2.setNumThreads(Config.SERVING_OPENCV_THREADS)
+    logger.info("Replica %d pinned to cores %s", index, replica_cores)
@@ -0,0 +1,202 @@
+"""
+This module provides the track-compressed representation of video results, requested with `result_format: tracks`.
+
+Instead of repeating every detected object in every frame, detections are associated across frames by a ByteTrack
+tracker and each track is stored once, with its class, mean confidence, start and end frames and a keyframed box
+trajectory. Keyframes are only kept where linear interpolation between them would be off by more than
+Config.TRACK_KEYFRAME_TOLERANCE pixels, and a track lost for some frames is split into several segments, so that
+the per-frame view is reconstructed exactly as interpolated between keyframes.
+
+Classes:
+    TrackCompressor: Tracks the results of the frames of a video and compresses them into keyframed tracks.
+
+Functions:
+    expand_tracks(video_result): Reconstructs the per-frame view of a track-compressed video result.
+"""
+
+import numpy as np
+from ultralytics.engine.results import Boxes
+from ultralytics.utils import IterableSimpleNamespace, yaml_load
+from ultralytics.utils.checks import check_yaml
+from config import Config
+
+# Number of decimals of keyframe coordinates and confidences
+DECIMALS = 2
+
+
+class _Track:
+    """Keyframed trajectory of a track, built online as its boxes are observed."""
+
+    def __init__(self, track_id, class_id):
+        """Start an empty track."""
+        self.track_id = track_id
+        self.class_id = class_id
+        self.confidence = 0.0
+        self.observations = 0
+        self.segments = []
+        self.pending = []  # last keyframe then the observations (frame_number, x1, y1, x2, y2) following it
+
+    def _interpolates(self, start, end, tolerance):
+        """Returns whether the pending observations are interpolated between two keyframes within tolerance."""
+        if len(self.pending) < 2:
+            return True
+        points = np.array(self.pending[1:])
+        t = ((points[:, 0] - start[0]) / (end[0] - start[0]))[:, None]
+        interpolated = np.array(start[1:]) + t * (np.array(end[1:]) - np.array(start[1:]))
+        return bool(np.abs(points[:, 1:] - interpolated).max() <= tolerance)
+
+    def add(self, frame_number, box, confidence, vid_stride, tolerance):
+        """Adds the box of the track in a frame, as a keyframe if it is not interpolated within tolerance."""
+        observation = (frame_number, *box)
+        self.confidence += confidence
+        self.observations += 1
+        if not self.segments or frame_number - self.pending[-1][0] > vid_stride:  # new track or track found again
+            self.close()
+            self.segments.append([observation])
+            self.pending = [observation]
+        elif self._interpolates(self.segments[-1][-1], observation, tolerance):
+            self.pending.append(observation)
+        else:  # the last observation is the last one interpolated from the previous keyframe
+            self.segments[-1].append(self.pending[-1])
+            self.pending = [self.pending[-1], observation]
+
+    def close(self):
+        """Ends the current segment of the track on its last observation."""
+        if self.segments and self.segments[-1][-1] is not self.pending[-1]:
+            self.segments[-1].append(self.pending[-1])
+        self.pending = [self.pending[-1]] if self.pending else []
+
+    def todict(self, names):
+        """Returns the track as a JSON serializable dict."""
+        self.close()
+        return {
+            'track_id': self.track_id,
+            'name': names[self.class_id],
+            'class': self.class_id,
+            'confidence': round(self.confidence / self.observations, DECIMALS + 2),
+            'start_frame': self.segments[0][0][0],
+            'end_frame': self.segments[-1][-1][0],
+            'segments': [[[f, *(round(v, DECIMALS) for v in box)] for f, *box in segment]
+                         for segment in self.segments],
+        }
+
+
+class TrackCompressor:
+    """
+    Tracks the results of the frames of a video with ByteTrack and compresses them into keyframed tracks.
+
+    Attributes:
+        names (dict): Class names of the model.
+        fps (float): Frame rate of the video.
+        vid_stride (int): Number of source frames between predicted frames.
+        tolerance (float): Maximum interpolation error in pixels of boxes between keyframes.
+        tracker (BYTETracker): Tracker associating the detections of consecutive predicted frames.
+        uses_frames (bool): Whether the tracker uses the frames of the results, for the global motion compensation
+            of BoT-SORT.
+        predicted_frames (int): Number of frames added so far.
+    """
+
+    def __init__(self, names, fps, vid_stride=1, tolerance=None, tracker=None):
+        """
+        Initialize the tracker of a video.
+
+        Args:
+            names (dict): Class names of the model.
+            fps (float): Frame rate of the video.
+            vid_stride (int): Number of source frames between predicted frames.
+            tolerance (float, optional): Maximum interpolation error in pixels, Config.TRACK_KEYFRAME_TOLERANCE if None.
+            tracker (str, optional): Tracker configuration file, Config.TRACKER if None.
+        """
+        from ultralytics.trackers.track import TRACKER_MAP  # imported on first use, trackers load scipy and lap
+
+        cfg = IterableSimpleNamespace(**yaml_load(check_yaml(tracker or Config.TRACKER)))
+        self.names = names
+        self.fps = fps
+        self.vid_stride = vid_stride
+        self.tolerance = Config.TRACK_KEYFRAME_TOLERANCE if tolerance is None else tolerance
+        self.tracker = TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=max(round(fps / vid_stride), 1))
+        self.uses_frames = cfg.tracker_type == 'botsort'
+        self.predicted_frames = 0
+        self.tracks = {}
+
+    def update(self, frame_number, result):
+        """
+        Tracks the detections of a frame, frames must be added in order.
+
+        Trackers using the frames track the boxes in the pixels of the frame, which is smaller than the original
+        video if the results were rescaled from a video proxy, and the tracks are rescaled to the original pixels.
+
+        Args:
+            frame_number (int): Number of the frame in the source video.
+            result (Results): Results of the frame.
+        """
+        self.predicted_frames += 1
+        boxes = result.boxes.cpu().numpy()
+        h, w = result.orig_img.shape[:2]
+        gain = np.array([w / result.orig_shape[1], h / result.orig_shape[0]] * 2)
+        if self.uses_frames and (gain != 1).any():
+            data = boxes.data.copy()
+            data[:, :4] *= gain
+            tracks = self.tracker.update(Boxes(data, (h, w)), result.orig_img)
+            if len(tracks):
+                tracks[:, :4] /= gain
+        else:
+            tracks = self.tracker.update(boxes, result.orig_img)
+        for x1, y1, x2, y2, tracker_id, confidence, class_id, _ in tracks:
+            # Tracker ids are shared by the trackers of all videos, tracks are numbered per video
+            track = self.tracks.get(tracker_id)
+            if track is None:
+                track = self.tracks[tracker_id] = _Track(len(self.tracks) + 1, int(class_id))
+            track.add(frame_number, (float(x1), float(y1), float(x2), float(y2)), float(confidence),
+                      self.vid_stride, self.tolerance)
+
+    def result(self, filename):
+        """
+        Returns the track-compressed result of the video.
+
+        Args:
+            filename (str): Name of the video file.
+
+        Returns:
+            dict: The video result with its tracks, ordered by track id.
+        """
+        return {
+            'type': 'video',
+            'filename': filename,
+            'fps': self.fps,
+            'vid_stride': self.vid_stride,
+            'predicted_frames': self.predicted_frames,
+            'tracks': [track.todict(self.names) for track in self.tracks.values()],
+        }
+
+
+def expand_tracks(video_result):
+    """
+    Reconstructs the per-frame view of a track-compressed video result, in the format of `get_video_text_result`.
+
+    Args:
+        video_result (dict): Video result returned by `TrackCompressor.result`.
+
+    Returns:
+        dict: The video result with all predicted frames and the objects of each frame, with their track id.
+    """
+    fps, vid_stride = video_result['fps'], video_result['vid_stride']
+    frame_numbers = [i * vid_stride for i in range(video_result['predicted_frames'])]
+    objects = {frame_number: [] for frame_number in frame_numbers}
+    for track in video_result['tracks']:
+        for segment in track['segments']:
+            keyframes = np.array(segment, dtype=float)
+            for frame_number in range(int(keyframes[0, 0]), int(keyframes[-1, 0]) + 1, vid_stride):
+                box = [float(np.interp(frame_number, keyframes[:, 0], keyframes[:, i])) for i in range(1, 5)]
+                objects[frame_number].append({
+                    'name': track['name'],
+                    'class': track['class'],
+                    'confidence': track['confidence'],
+                    'box': dict(zip(('x1', 'y1', 'x2', 'y2'), box)),
+                    'track_id': track['track_id'],
+                })
+    return {
+        'type': 'video',
+        'filename': video_result['filename'],
+        'frames': [{'frame_number': n, 'time': round(n / fps, 2), 'objects': objects[n]} for n in frame_numbers],
+    }
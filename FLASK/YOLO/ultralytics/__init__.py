@@ -2,11 +2,34 @@
 
 __version__ = '8.0.192'
 
-from ultralytics.models import RTDETR, SAM, YOLO
-from ultralytics.models.fastsam import FastSAM
-from ultralytics.models.nas import NAS
-from ultralytics.utils import SETTINGS as settings
-from ultralytics.utils.checks import check_yolo as checks
-from ultralytics.utils.downloads import download
+import importlib
+
+# Public attributes loaded on first access, so that importing a submodule such as ultralytics.models.yolo only loads
+# what it needs, as (module, attribute)
+_LAZY_ATTRIBUTES = {
+    'YOLO': ('ultralytics.models', 'YOLO'),
+    'RTDETR': ('ultralytics.models', 'RTDETR'),
+    'SAM': ('ultralytics.models', 'SAM'),
+    'FastSAM': ('ultralytics.models.fastsam', 'FastSAM'),
+    'NAS': ('ultralytics.models.nas', 'NAS'),
+    'settings': ('ultralytics.utils', 'SETTINGS'),
+    'checks': ('ultralytics.utils.checks', 'check_yolo'),
+    'download': ('ultralytics.utils.downloads', 'download')}
+
+
+def __getattr__(name):
+    """Imports a public attribute on first access and caches it in the module."""
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    module, attribute = _LAZY_ATTRIBUTES[name]
+    value = getattr(importlib.import_module(module), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Lists the public attributes, including the ones not loaded yet."""
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __all__ = '__version__', 'YOLO', 'NAS', 'SAM', 'FastSAM', 'RTDETR', 'checks', 'download', 'settings'
@@ -549,6 +549,38 @@ class LetterBox:
         img = labels.get('img') if image is None else image
         shape = img.shape[:2]  # current shape [height, width]
         new_shape = labels.pop('rect_shape', self.new_shape)
+        new_unpad, (top, bottom, left, right), ratio, (dw, dh) = self.get_params(shape, new_shape)
+
+        if shape[::-1] != new_unpad:  # resize
+            img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT,
+                                 value=(114, 114, 114))  # add border
+        if labels.get('ratio_pad'):
+            labels['ratio_pad'] = (labels['ratio_pad'], (left, top))  # for evaluation
+
+        if len(labels):
+            labels = self._update_labels(labels, ratio, dw, dh)
+            labels['img'] = img
+            labels['resized_shape'] = new_shape
+            return labels
+        else:
+            return img
+
+    def get_params(self, shape, new_shape=None):
+        """
+        Returns the letterbox geometry of an image.
+
+        Args:
+            shape (tuple): Shape (height, width) of the image.
+            new_shape (int | tuple, optional): Target shape, `new_shape` of the LetterBox if None.
+
+        Returns:
+            new_unpad (tuple): Size (width, height) the image is resized to.
+            border (tuple): Border (top, bottom, left, right) in pixels.
+            ratio (tuple): Width and height scale ratios.
+            pad (tuple): Width and height padding, of each side if centered.
+        """
+        new_shape = self.new_shape if new_shape is None else new_shape
         if isinstance(new_shape, int):
             new_shape = (new_shape, new_shape)
 
@@ -571,23 +603,9 @@ class LetterBox:
         if self.center:
             dw /= 2  # divide padding into 2 sides
             dh /= 2
-
-        if shape[::-1] != new_unpad:  # resize
-            img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
         top, bottom = int(round(dh - 0.1)) if self.center else 0, int(round(dh + 0.1))
         left, right = int(round(dw - 0.1)) if self.center else 0, int(round(dw + 0.1))
-        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT,
-                                 value=(114, 114, 114))  # add border
-        if labels.get('ratio_pad'):
-            labels['ratio_pad'] = (labels['ratio_pad'], (left, top))  # for evaluation
-
-        if len(labels):
-            labels = self._update_labels(labels, ratio, dw, dh)
-            labels['img'] = img
-            labels['resized_shape'] = new_shape
-            return labels
-        else:
-            return img
+        return new_unpad, (top, bottom, left, right), ratio, (dw, dh)
 
     def _update_labels(self, labels, ratio, padw, padh):
         """Update labels."""
@@ -598,6 +616,55 @@ class LetterBox:
         return labels
 
 
+class LetterBoxBuffer:
+    """
+    Letterboxes batches of images into reusable uint8 buffers, so that steady-state preprocessing allocates no
+    frame-sized memory.
+
+    Each image is resized directly into its slot of an (n, h, w, 3) buffer, kept per letterboxed shape and grown to the
+    largest batch seen, and the constant border of a slot is only filled again when the geometry of its image changes.
+
+    Attributes:
+        buffers (dict): Buffers by letterboxed (height, width).
+        shapes (dict): Geometry (top, left, width, height) of the image last letterboxed in each slot of each buffer.
+    """
+
+    def __init__(self):
+        """Initialize empty buffers, allocated on first use."""
+        self.buffers = {}
+        self.shapes = {}
+
+    def __call__(self, letterbox, ims):
+        """
+        Letterboxes a batch of images, which must have the same letterboxed shape, i.e. the same shape if `auto`.
+
+        Args:
+            letterbox (LetterBox): Letterbox transform giving the geometry of each image.
+            ims (List[np.ndarray]): HWC uint8 images with 3 channels.
+
+        Returns:
+            (np.ndarray): (n, h, w, 3) view of the buffer holding the letterboxed images, overwritten by the next batch
+                of the same letterboxed shape.
+        """
+        params = [letterbox.get_params(im.shape[:2]) for im in ims]
+        (w, h), (top, bottom, left, right) = params[0][:2]
+        key = h + top + bottom, w + left + right
+        if key not in self.buffers or len(self.buffers[key]) < len(ims):
+            self.buffers[key] = np.empty((len(ims), *key, 3), dtype=np.uint8)
+            self.shapes[key] = [None] * len(ims)
+        buffer, shapes = self.buffers[key], self.shapes[key]
+        for i, (im, ((w, h), (top, _, left, _), _, _)) in enumerate(zip(ims, params)):
+            if shapes[i] != (top, left, w, h):  # new geometry, border filled again
+                buffer[i] = 114
+                shapes[i] = top, left, w, h
+            region = buffer[i, top:top + h, left:left + w]
+            if im.shape[:2] == (h, w):
+                region[:] = im
+            else:
+                cv2.resize(im, (w, h), dst=region, interpolation=cv2.INTER_LINEAR)
+        return buffer[:len(ims)]
+
+
 class CopyPaste:
 
     def __init__(self, p=0.5) -> None:
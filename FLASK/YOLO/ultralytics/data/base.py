@@ -16,7 +16,7 @@ from torch.utils.data import Dataset
 
 from ultralytics.utils import DEFAULT_CFG, LOCAL_RANK, LOGGER, NUM_THREADS, TQDM
 
-from .utils import HELP_URL, IMG_FORMATS
+from .utils import HELP_URL, IMG_FORMATS, imread_reduced
 
 
 class BaseDataset(Dataset):
@@ -76,6 +76,7 @@ class BaseDataset(Dataset):
         self.batch_size = batch_size
         self.stride = stride
         self.pad = pad
+        self.reduced_decode = getattr(hyp, 'reduced_decode', False)  # decode large JPEGs at reduced scale
         if self.rect:
             assert self.batch_size is not None
             self.set_rectangle()
@@ -144,16 +145,19 @@ class BaseDataset(Dataset):
         """Loads 1 image from dataset index 'i', returns (im, resized hw)."""
         im, f, fn = self.ims[i], self.im_files[i], self.npy_files[i]
         if im is None:  # not cached in RAM
+            shape0 = None
             if fn.exists():  # load npy
                 im = np.load(fn)
+            elif self.reduced_decode and rect_mode:  # read image at reduced scale, keep original hw
+                im, shape0 = imread_reduced(f, self.imgsz)  # BGR
             else:  # read image
                 im = cv2.imread(f)  # BGR
-                if im is None:
-                    raise FileNotFoundError(f'Image Not Found {f}')
-            h0, w0 = im.shape[:2]  # orig hw
+            if im is None:
+                raise FileNotFoundError(f'Image Not Found {f}')
+            h0, w0 = shape0 or im.shape[:2]  # orig hw
             if rect_mode:  # resize long side to imgsz while maintaining aspect ratio
                 r = self.imgsz / max(h0, w0)  # ratio
-                if r != 1:  # if sizes are not equal
+                if r != 1 or im.shape[:2] != (h0, w0):  # if sizes are not equal
                     w, h = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
                     im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
             elif not (h0 == w0 == self.imgsz):  # resize by stretching image to square imgsz
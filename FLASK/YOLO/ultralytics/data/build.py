@@ -135,7 +135,7 @@ def check_source(source):
     return source, webcam, screenshot, from_img, in_memory, tensor
 
 
-def load_inference_source(source=None, imgsz=640, vid_stride=1, buffer=False):
+def load_inference_source(source=None, imgsz=640, vid_stride=1, buffer=False, reduced_decode=False):
     """
     Loads an inference source for object detection and applies necessary transformations.
 
@@ -144,6 +144,7 @@ def load_inference_source(source=None, imgsz=640, vid_stride=1, buffer=False):
         imgsz (int, optional): The size of the image for inference. Default is 640.
         vid_stride (int, optional): The frame interval for video sources. Default is 1.
         buffer (bool, optional): Determined whether stream frames will be buffered. Default is False.
+        reduced_decode (bool, optional): Decode large JPEG files at reduced scale when imgsz allows. Default is False.
 
     Returns:
         dataset (Dataset): A dataset object for the specified input source.
@@ -163,7 +164,7 @@ def load_inference_source(source=None, imgsz=640, vid_stride=1, buffer=False):
     elif from_img:
         dataset = LoadPilAndNumpy(source, imgsz=imgsz)
     else:
-        dataset = LoadImages(source, imgsz=imgsz, vid_stride=vid_stride)
+        dataset = LoadImages(source, imgsz=imgsz, vid_stride=vid_stride, reduced_decode=reduced_decode)
 
     # Attach source types to the dataset
     setattr(dataset, 'source_type', source_type)
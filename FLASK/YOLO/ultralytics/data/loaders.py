@@ -15,7 +15,7 @@ import requests
 import torch
 from PIL import Image
 
-from ultralytics.data.utils import IMG_FORMATS, VID_FORMATS
+from ultralytics.data.utils import IMG_FORMATS, VID_FORMATS, imread_reduced
 from ultralytics.utils import LOGGER, is_colab, is_kaggle, ops
 from ultralytics.utils.checks import check_requirements
 
@@ -194,7 +194,7 @@ class LoadScreenshots:
 class LoadImages:
     """YOLOv8 image/video dataloader, i.e. `yolo predict source=image.jpg/vid.mp4`."""
 
-    def __init__(self, path, imgsz=640, vid_stride=1):
+    def __init__(self, path, imgsz=640, vid_stride=1, reduced_decode=False):
         """Initialize the Dataloader and raise FileNotFoundError if file not found."""
         parent = None
         if isinstance(path, str) and Path(path).suffix == '.txt':  # *.txt file with img/vid/dir on each line
@@ -224,6 +224,8 @@ class LoadImages:
         self.video_flag = [False] * ni + [True] * nv
         self.mode = 'image'
         self.vid_stride = vid_stride  # video frame-rate stride
+        self.reduced_decode = reduced_decode  # decode large JPEGs at reduced scale
+        self.orig_shapes = [None]  # original hw of the current batch if decoded at reduced scale, else None
         self.bs = 1
         if any(videos):
             self._new_video(videos[0])  # new video
@@ -260,15 +262,20 @@ class LoadImages:
                 success, im0 = self.cap.read()
 
             self.frame += 1
+            self.orig_shapes = [None]
             # im0 = self._cv2_rotate(im0)  # for use if cv2 autorotation is False
             s = f'video {self.count + 1}/{self.nf} ({self.frame}/{self.frames}) {path}: '
 
         else:
             # Read image
             self.count += 1
-            im0 = cv2.imread(path)  # BGR
+            if self.reduced_decode:
+                im0, shape0 = imread_reduced(path, self.imgsz)  # BGR
+            else:
+                im0 = cv2.imread(path)  # BGR
             if im0 is None:
                 raise FileNotFoundError(f'Image Not Found {path}')
+            self.orig_shapes = [shape0 if self.reduced_decode and shape0 != im0.shape[:2] else None]
             s = f'image {self.count}/{self.nf} {path}: '
 
         return [path], [im0], self.cap, s
@@ -56,6 +56,36 @@ def exif_size(img: Image.Image):
     return s
 
 
+def imread_reduced(path, imgsz):
+    """
+    Read a JPEG at the coarsest native decoder scale (1/2, 1/4 or 1/8) that still covers the letterbox size `imgsz`.
+
+    Scaled decoding skips most of the IDCT work and memory of large camera images that would be downscaled right away.
+    Non-JPEG files and images that are not large enough are read at full resolution.
+
+    Args:
+        path (str): Path to the image file.
+        imgsz (int | tuple): Target letterbox size as int or (h, w).
+
+    Returns:
+        im (np.ndarray): The BGR image, possibly at reduced resolution.
+        shape (tuple): The original (exif-corrected) image shape in (height, width) format.
+    """
+    if Path(path).suffix[1:].lower() in ('jpg', 'jpeg'):
+        with contextlib.suppress(Exception):
+            with Image.open(path) as img:
+                w0, h0 = exif_size(img)  # header only, no decode
+            th, tw = (imgsz, imgsz) if isinstance(imgsz, int) else imgsz[:2]
+            r = min(th / h0, tw / w0)  # letterbox ratio
+            for f, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                            (2, cv2.IMREAD_REDUCED_COLOR_2)):
+                if f * r <= 1:
+                    im = cv2.imread(path, flag)  # BGR
+                    return im, (h0, w0)
+    im = cv2.imread(path)  # BGR
+    return im, None if im is None else im.shape[:2]
+
+
 def verify_image(args):
     """Verify one image."""
     (im_file, cls), prefix = args
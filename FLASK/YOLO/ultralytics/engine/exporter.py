@@ -184,8 +184,9 @@ class Exporter:
         if edgetpu and not LINUX:
             raise SystemError('Edge TPU export only supported on Linux. See https://coral.ai/docs/edgetpu/compiler/')
 
-        # Input
-        im = torch.zeros(self.args.batch, 3, *self.imgsz).to(self.device)
+        # Input, uint8 BGR images for TorchScript and ONNX models with folded input normalization
+        uint8_input = getattr(model, 'uint8_input', False) and (jit or onnx)
+        im = torch.zeros(self.args.batch, 3, *self.imgsz, dtype=torch.uint8 if uint8_input else None).to(self.device)
         file = Path(
             getattr(model, 'pt_path', None) or getattr(model, 'yaml_file', None) or model.yaml.get('yaml_file', ''))
         if file.suffix in {'.yaml', '.yml'}:
@@ -211,7 +212,7 @@ class Exporter:
         for _ in range(2):
             y = model(im)  # dry runs
         if self.args.half and (engine or onnx) and self.device.type != 'cpu':
-            im, model = im.half(), model.half()  # to FP16
+            im, model = im if uint8_input else im.half(), model.half()  # to FP16
 
         # Filter warnings
         warnings.filterwarnings('ignore', category=torch.jit.TracerWarning)  # suppress TracerWarning
@@ -240,6 +241,8 @@ class Exporter:
             'names': model.names}  # model metadata
         if model.task == 'pose':
             self.metadata['kpt_shape'] = model.model[-1].kpt_shape
+        if uint8_input:
+            self.metadata['uint8_input'] = True
 
         LOGGER.info(f"\n{colorstr('PyTorch:')} starting from '{file}' with input shape {tuple(im.shape)} BCHW and "
                     f'output shape(s) {self.output_shape} ({file_size(file):.1f} MB)')
@@ -7,7 +7,7 @@ from typing import Union
 
 from ultralytics.cfg import TASK2DATA, get_cfg, get_save_dir
 from ultralytics.hub.utils import HUB_WEB_ROOT
-from ultralytics.nn.tasks import attempt_load_one_weight, guess_model_task, nn, yaml_model_load
+from ultralytics.nn.tasks import attempt_load_artifact, attempt_load_one_weight, guess_model_task, nn, yaml_model_load
 from ultralytics.utils import ASSETS, DEFAULT_CFG_DICT, LOGGER, RANK, callbacks, checks, emojis, yaml_load
 from ultralytics.utils.downloads import GITHUB_ASSETS_STEMS
 
@@ -137,6 +137,11 @@ class Model(nn.Module):
             self.task = self.model.args['task']
             self.overrides = self.model.args = self._reset_ckpt_args(self.model.args)
             self.ckpt_path = self.model.pt_path
+        elif suffix == '.safetensors':  # fused inference artifact
+            self.model, self.ckpt = attempt_load_artifact(weights), None
+            self.task = self.model.args['task']
+            self.overrides = self.model.args = self._reset_ckpt_args(self.model.args)
+            self.ckpt_path = self.model.pt_path
         else:
             weights = checks.check_file(weights)
             self.model, self.ckpt = weights, None
@@ -220,7 +225,8 @@ class Model(nn.Module):
             x in sys.argv for x in ('predict', 'track', 'mode=predict', 'mode=track'))
 
         custom = {'conf': 0.25, 'save': is_cli}  # method defaults
-        args = {**self.overrides, **custom, **kwargs, 'mode': 'predict'}  # highest priority args on the right
+        # highest priority args on the right, reduced JPEG decode is a predict default below the model overrides
+        args = {'reduced_decode': True, **self.overrides, **custom, **kwargs, 'mode': 'predict'}
         prompts = args.pop('prompts', None)  # for SAM-type models
 
         if not self.predictor:
@@ -234,6 +240,31 @@ class Model(nn.Module):
             self.predictor.set_prompts(prompts)
         return self.predictor.predict_cli(source=source) if is_cli else self.predictor(source=source, stream=stream)
 
+    def infer(self, frames, imgsz=None, **kwargs):
+        """
+        Lean inference on a batch of decoded frames, running only preprocessing, forward pass and NMS.
+
+        The predictor is set up on the first call, and reused as is by later calls: unlike `predict`, arguments are
+        only merged when given and no inference source is loaded. Only detection models are supported.
+
+        Args:
+            frames (List[np.ndarray] | np.ndarray): BGR frames, as a list of (h, w, 3) arrays or an (n, h, w, 3) array.
+            imgsz (int | List[int], optional): Inference size, the predictor `imgsz` if None.
+            **kwargs: Prediction arguments, e.g. conf or iou, kept for later calls.
+
+        Returns:
+            (List[torch.Tensor]): Detections of each frame, as an (n, 6) tensor of xyxy, conf, class in frame pixels.
+        """
+        if self.task != 'detect':
+            raise NotImplementedError(f"infer() only supports detection models, use predict() for task '{self.task}'.")
+        if not self.predictor:
+            args = {**self.overrides, 'conf': 0.25, **kwargs, 'mode': 'predict'}  # as predict() defaults
+            self.predictor = self._smart_load('predictor')(overrides=args, _callbacks=self.callbacks)
+            self.predictor.setup_model(model=self.model, verbose=False)
+        elif kwargs:
+            self.predictor.args = get_cfg(self.predictor.args, kwargs)
+        return self.predictor.infer(frames, imgsz)
+
     def track(self, source=None, stream=False, persist=False, **kwargs):
         """
         Perform object tracking on the input source using the registered trackers.
@@ -36,12 +36,14 @@ import torch
 
 from ultralytics.cfg import get_cfg, get_save_dir
 from ultralytics.data import load_inference_source
-from ultralytics.data.augment import LetterBox, classify_transforms
+from ultralytics.data.augment import LetterBox, LetterBoxBuffer, classify_transforms
 from ultralytics.nn.autobackend import AutoBackend
-from ultralytics.utils import DEFAULT_CFG, LOGGER, MACOS, WINDOWS, callbacks, colorstr, ops
+from ultralytics.utils import DEFAULT_CFG, LOGGER, callbacks, colorstr, ops
 from ultralytics.utils.checks import check_imgsz, check_imshow
 from ultralytics.utils.files import increment_path
+from ultralytics.utils.plotting import BoxRenderer
 from ultralytics.utils.torch_utils import select_device, smart_inference_mode
+from ultralytics.utils.video import VideoWriter
 
 STREAM_WARNING = """
 WARNING ⚠️ inference results will accumulate in RAM unless `stream=True` is passed, causing potential out-of-memory
@@ -71,7 +73,7 @@ class BasePredictor:
         device (torch.device): Device used for prediction.
         dataset (Dataset): Dataset used for prediction.
         vid_path (str): Path to video file.
-        vid_writer (cv2.VideoWriter): Video writer for saving video output.
+        vid_writer (VideoWriter): Background video writer for saving video output.
         data_path (str): Path to data.
     """
 
@@ -99,11 +101,14 @@ class BasePredictor:
         self.dataset = None
         self.vid_path, self.vid_writer = None, None
         self.plotted_img = None
+        self.renderer = None
         self.data_path = None
         self.source_type = None
         self.batch = None
         self.results = None
         self.transforms = None
+        self.staging = LetterBoxBuffer()  # reusable letterboxed uint8 images
+        self.inputs = {}  # reusable input tensors, by letterboxed shape
         self.callbacks = _callbacks or callbacks.get_default_callbacks()
         self.txt_path = None
         callbacks.add_integration_callbacks(self)
@@ -115,11 +120,18 @@ class BasePredictor:
             im (torch.Tensor | List(np.ndarray)): BCHW for tensor, [(HWC) x B] for list.
         """
         not_tensor = not isinstance(im, torch.Tensor)
+        if not_tensor and type(self).pre_transform is BasePredictor.pre_transform and \
+                all(x.ndim == 3 and x.shape[2] == 3 and x.dtype == np.uint8 for x in im):
+            return self.stage(im)  # unless a subclass transforms images differently, e.g. RT-DETR
         if not_tensor:
             im = np.stack(self.pre_transform(im))
-            im = im[..., ::-1].transpose((0, 3, 1, 2))  # BGR to RGB, BHWC to BCHW, (n, 3, h, w)
+            im = im.transpose((0, 3, 1, 2)) if self.uint8_input else im[..., ::-1].transpose((0, 3, 1, 2))  # to BCHW
             im = np.ascontiguousarray(im)  # contiguous
             im = torch.from_numpy(im)
+            if self.uint8_input:  # BGR uint8, normalized by the first convolution
+                return im.to(self.device)
+        elif self.uint8_input:  # RGB 0.0 - 1.0 tensors to the BGR 0 - 255 range of the folded model
+            im = im.flip(1) * 255
 
         im = im.to(self.device)
         im = im.half() if self.model.fp16 else im.float()  # uint8 to fp16/32
@@ -127,6 +139,39 @@ class BasePredictor:
             im /= 255  # 0 - 255 to 0.0 - 1.0
         return im
 
+    def stage(self, im):
+        """
+        Letterboxes BGR images into the reusable staging buffers and converts them into a reusable input tensor.
+
+        Images are resized directly into a uint8 buffer, then copied channel by channel, BGR to RGB and HWC to CHW,
+        into the input tensor and scaled in place, so steady-state batches allocate no frame-sized memory on CPU.
+        Models with folded input normalization take a copy of the staging buffer, as a channels-last uint8 tensor, so
+        that the input does not change if the next batch is staged while it is still in use.
+
+        Args:
+            im (List(np.ndarray)): [(HWC) x B] BGR uint8 images.
+
+        Returns:
+            (torch.Tensor): BCHW input tensor, overwritten by the next batch of the same letterboxed shape unless uint8.
+        """
+        same_shapes = all(x.shape == im[0].shape for x in im)
+        letterbox = LetterBox(self.imgsz, auto=same_shapes and self.model.pt, stride=self.model.stride)
+        staged = torch.from_numpy(self.staging(letterbox, im))  # BHWC BGR, shares the staging buffer
+        if self.uint8_input:  # BCHW in channels-last memory format, contiguous for exported models
+            staged = staged.permute(0, 3, 1, 2)
+            if not self.model.pt:
+                return staged.contiguous().to(self.device)
+            return staged.to(self.device, copy=True)  # copied out of the staging buffer on CPU too
+        n, h, w, _ = staged.shape
+        dtype = torch.half if self.model.fp16 else torch.float
+        x = self.inputs.get((h, w))
+        if x is None or len(x) < n or x.dtype != dtype:
+            x = self.inputs[(h, w)] = torch.empty((n, 3, h, w), dtype=dtype, device=self.device)
+        x = x[:n]
+        for c in range(3):
+            x[:, c].copy_(staged[..., 2 - c])  # BGR to RGB, uint8 to fp16/32
+        return x.div_(255)  # 0 - 255 to 0.0 - 1.0
+
     def inference(self, im, *args, **kwargs):
         visualize = increment_path(self.save_dir / Path(self.batch[0][0]).stem,
                                    mkdir=True) if self.args.visualize and (not self.source_type.tensor) else False
@@ -171,6 +216,12 @@ class BasePredictor:
                 'labels': self.args.show_labels}
             if not self.args.retina_masks:
                 plot_args['im_gpu'] = im[idx]
+            if self.args.fast_plot:
+                options = self.args.line_width, self.args.show_labels, self.args.show_conf
+                r = self.renderer
+                if r is None or (r.line_width, r.labels, r.conf) != options:  # (re)build on first use or new args
+                    self.renderer = BoxRenderer(self.model.names, *options)
+                plot_args['renderer'] = self.renderer
             self.plotted_img = result.plot(**plot_args)
         # Write
         if self.args.save_txt:
@@ -207,7 +258,8 @@ class BasePredictor:
         self.dataset = load_inference_source(source=source,
                                              imgsz=self.imgsz,
                                              vid_stride=self.args.vid_stride,
-                                             buffer=self.args.stream_buffer)
+                                             buffer=self.args.stream_buffer,
+                                             reduced_decode=self.args.reduced_decode)
         self.source_type = self.dataset.source_type
         if not getattr(self, 'stream', True) and (self.dataset.mode == 'stream' or  # streams
                                                   len(self.dataset) > 1000 or  # images
@@ -255,6 +307,9 @@ class BasePredictor:
             # Postprocess
             with profilers[2]:
                 self.results = self.postprocess(preds, im, im0s)
+                for r, shape in zip(self.results, getattr(self.dataset, 'orig_shapes', ())):
+                    if shape is not None:  # decoded at reduced scale, map back to original pixels
+                        r.rescale(shape)
             self.run_callbacks('on_predict_postprocess_end')
 
             # Visualize, save, write results
@@ -278,15 +333,16 @@ class BasePredictor:
                     self.save_preds(vid_cap, i, str(self.save_dir / p.name))
 
             self.run_callbacks('on_predict_batch_end')
-            yield from self.results
+            yield from (r.slim() for r in self.results) if self.args.slim else self.results
 
             # Print time (inference-only)
             if self.args.verbose:
                 LOGGER.info(f'{s}{profilers[1].dt * 1E3:.1f}ms')
 
         # Release assets
-        if isinstance(self.vid_writer[-1], cv2.VideoWriter):
-            self.vid_writer[-1].release()  # release final video writer
+        for writer in self.vid_writer:
+            if isinstance(writer, VideoWriter):
+                writer.release()  # flush and release video writers
 
         # Print results
         if self.args.verbose and self.seen:
@@ -313,6 +369,15 @@ class BasePredictor:
         self.device = self.model.device  # update device
         self.args.half = self.model.fp16  # update half
         self.model.eval()
+        if self.args.uint8_input and hasattr(self.model.model, 'fold_input_normalization'):
+            self.model.model.fold_input_normalization()
+
+    @property
+    def uint8_input(self):
+        """Whether the model takes uint8 BGR images, read on every batch as a PyTorch model can be folded after setup."""
+        if self.model is None:
+            return False
+        return getattr(self.model.model if self.model.pt else self.model, 'uint8_input', False)
 
     def show(self, p):
         """Display an image in a window using OpenCV imshow()."""
@@ -325,7 +390,7 @@ class BasePredictor:
         cv2.waitKey(500 if self.batch[3].startswith('image') else 1)  # 1 millisecond
 
     def save_preds(self, vid_cap, idx, save_path):
-        """Save video predictions as mp4 at specified path."""
+        """Save image predictions, or queue video frames for background encoding with the configured codec."""
         im0 = self.plotted_img
         # Save imgs
         if self.dataset.mode == 'image':
@@ -333,17 +398,19 @@ class BasePredictor:
         else:  # 'video' or 'stream'
             if self.vid_path[idx] != save_path:  # new video
                 self.vid_path[idx] = save_path
-                if isinstance(self.vid_writer[idx], cv2.VideoWriter):
+                if isinstance(self.vid_writer[idx], VideoWriter):
                     self.vid_writer[idx].release()  # release previous video writer
                 if vid_cap:  # video
                     fps = int(vid_cap.get(cv2.CAP_PROP_FPS))  # integer required, floats produce error in MP4 codec
-                    w = int(vid_cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    h = int(vid_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
                 else:  # stream
-                    fps, w, h = 30, im0.shape[1], im0.shape[0]
-                suffix, fourcc = ('.mp4', 'avc1') if MACOS else ('.avi', 'WMV2') if WINDOWS else ('.avi', 'MJPG')
-                save_path = str(Path(save_path).with_suffix(suffix))
-                self.vid_writer[idx] = cv2.VideoWriter(save_path, cv2.VideoWriter_fourcc(*fourcc), fps, (w, h))
+                    fps = 30
+                self.vid_writer[idx] = VideoWriter(save_path,
+                                                   fps=fps,
+                                                   size=(im0.shape[1], im0.shape[0]),
+                                                   codec=self.args.vid_codec,
+                                                   quality=self.args.vid_quality,
+                                                   max_size=self.args.vid_size,
+                                                   queue_size=self.args.vid_queue)
             self.vid_writer[idx].write(im0)
 
     def run_callbacks(self, event: str):
@@ -124,6 +124,28 @@ class Results(SimpleClass):
         if probs is not None:
             self.probs = probs
 
+    def rescale(self, orig_shape):
+        """
+        Map results predicted on a reduced-resolution decode of the source back to its original pixels.
+
+        Args:
+            orig_shape (tuple): The original image shape in (height, width) format.
+        """
+        gh, gw = orig_shape[0] / self.orig_shape[0], orig_shape[1] / self.orig_shape[1]
+        self.orig_shape = tuple(orig_shape)
+        if self.boxes is not None:
+            boxes = self.boxes.data.clone() if isinstance(self.boxes.data, torch.Tensor) else np.copy(self.boxes.data)
+            boxes[:, [0, 2]] *= gw
+            boxes[:, [1, 3]] *= gh
+            self.boxes = Boxes(boxes, self.orig_shape)
+        if self.masks is not None:
+            self.masks = Masks(self.masks.data, self.orig_shape)
+        if self.keypoints is not None:
+            kpts = self.keypoints.data.clone()
+            kpts[..., 0] *= gw
+            kpts[..., 1] *= gh
+            self.keypoints = Keypoints(kpts, self.orig_shape)
+
     def _apply(self, fn, *args, **kwargs):
         r = self.new()
         for k in self._keys:
@@ -148,9 +170,17 @@ class Results(SimpleClass):
         """Return a copy of the Results object with tensors on the specified device and dtype."""
         return self._apply('to', *args, **kwargs)
 
+    def slim(self):
+        """Return a SlimResults copy holding only the boxes on CPU, shape and path, without the original image."""
+        r = SlimResults(self.orig_shape, self.path, self.names, None if self.boxes is None else self.boxes.data.cpu())
+        r.speed, r.save_dir = self.speed, self.save_dir
+        return r
+
     def new(self):
         """Return a new Results object with the same image, path, and names."""
-        return Results(orig_img=self.orig_img, path=self.path, names=self.names)
+        r = Results(orig_img=self.orig_img, path=self.path, names=self.names)
+        r.orig_shape = self.orig_shape  # may differ from orig_img if decoded at reduced scale
+        return r
 
     def plot(
         self,
@@ -167,6 +197,7 @@ class Results(SimpleClass):
         boxes=True,
         masks=True,
         probs=True,
+        renderer=None,
     ):
         """
         Plots the detection results on an input RGB image. Accepts a numpy array (cv2) or a PIL Image.
@@ -185,6 +216,8 @@ class Results(SimpleClass):
             boxes (bool): Whether to plot the bounding boxes.
             masks (bool): Whether to plot the masks.
             probs (bool): Whether to plot classification probability
+            renderer (BoxRenderer, optional): Draw detection-only results in bulk with this renderer instead of
+                Annotator. Its own label and line width settings are used.
 
         Returns:
             (numpy.ndarray): A numpy array of the annotated image.
@@ -210,6 +243,21 @@ class Results(SimpleClass):
         pred_boxes, show_boxes = self.boxes, boxes
         pred_masks, show_masks = self.masks, masks
         pred_probs, show_probs = self.probs, probs
+
+        # Boxes are in orig_shape pixels, the image is smaller if it was decoded at reduced scale
+        h, w = self.orig_img.shape[:2] if img is None else self.orig_shape
+        gain = (w / self.orig_shape[1], h / self.orig_shape[0]) * 2
+
+        # Fast path for detection results
+        if renderer is not None and not pil and pred_masks is None and pred_probs is None and self.keypoints is None:
+            im = self.orig_img if img is None else img
+            if not (pred_boxes and show_boxes):
+                return np.array(im)
+            xyxy = pred_boxes.xyxy
+            if gain != (1.0, ) * 4:
+                xyxy = xyxy * (xyxy.new_tensor(gain) if isinstance(xyxy, torch.Tensor) else np.array(gain))
+            return renderer(im, xyxy, pred_boxes.conf, pred_boxes.cls, ids=pred_boxes.id)
+
         annotator = Annotator(
             deepcopy(self.orig_img if img is None else img),
             line_width,
@@ -233,7 +281,10 @@ class Results(SimpleClass):
                 c, conf, id = int(d.cls), float(d.conf) if conf else None, None if d.id is None else int(d.id.item())
                 name = ('' if id is None else f'id:{id} ') + names[c]
                 label = (f'{name} {conf:.2f}' if conf else name) if labels else None
-                annotator.box_label(d.xyxy.squeeze(), label, color=colors(c, True))
+                box = d.xyxy.squeeze()
+                if gain != (1.0, ) * 4:
+                    box = [float(x) * g for x, g in zip(box, gain)]
+                annotator.box_label(box, label, color=colors(c, True))
 
         # Plot Classify results
         if pred_probs is not None and show_probs:
@@ -311,8 +362,12 @@ class Results(SimpleClass):
         if self.probs is not None:
             LOGGER.warning('WARNING ⚠️ Classify task do not support `save_crop`.')
             return
+        # Boxes are in orig_shape pixels, the image is smaller if it was decoded at reduced scale
+        h, w = self.orig_img.shape[:2]
+        gain = (w / self.orig_shape[1], h / self.orig_shape[0]) * 2
         for d in self.boxes:
-            save_one_box(d.xyxy,
+            xyxy = d.xyxy * (d.xyxy.new_tensor(gain) if isinstance(d.xyxy, torch.Tensor) else np.array(gain))
+            save_one_box(xyxy,
                          self.orig_img.copy(),
                          file=Path(save_dir) / self.names[int(d.cls)] / f'{Path(file_name).stem}.jpg',
                          BGR=True)
@@ -349,6 +404,47 @@ class Results(SimpleClass):
         return json.dumps(results, indent=2)
 
 
+class SlimResults(Results):
+    """
+    A lightweight detection Results that does not retain the original image.
+
+    Yielded by predictors with `slim=True` once a frame has been plotted and saved, so memory stays constant when
+    streaming long videos. Only boxes are kept, masks, probs and keypoints are dropped.
+
+    Args:
+        orig_shape (tuple): The original image shape in (height, width) format.
+        path (str): The path to the image file.
+        names (dict): A dictionary of class names.
+        boxes (torch.tensor, optional): A 2D tensor of bounding box coordinates for each detection.
+    """
+
+    def __init__(self, orig_shape, path, names, boxes=None) -> None:
+        """Initialize the SlimResults class."""
+        self.orig_img = None
+        self.orig_shape = tuple(orig_shape)
+        self.boxes = Boxes(boxes, self.orig_shape) if boxes is not None else None
+        self.masks, self.probs, self.keypoints = None, None, None
+        self.speed = {'preprocess': None, 'inference': None, 'postprocess': None}  # milliseconds per image
+        self.names = names
+        self.path = path
+        self.save_dir = None
+        self._keys = ('boxes', )
+
+    def new(self):
+        """Return a new SlimResults object with the same shape, path, and names."""
+        return SlimResults(self.orig_shape, self.path, self.names)
+
+    def plot(self, *args, img=None, **kwargs):
+        """Plot the detections on `img`, which is required as the original image is not retained."""
+        if img is None:
+            raise ValueError('SlimResults do not retain the original image, pass `img` to plot on.')
+        return super().plot(*args, img=img, **kwargs)
+
+    def save_crop(self, save_dir, file_name=Path('im.jpg')):
+        """Not supported, the original image is not retained."""
+        LOGGER.warning('WARNING ⚠️ SlimResults do not retain the original image, `save_crop` is not supported.')
+
+
 class Boxes(BaseTensor):
     """
     A class for storing and manipulating detection boxes.
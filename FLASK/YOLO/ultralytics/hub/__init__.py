@@ -2,7 +2,6 @@
 
 import requests
 
-from ultralytics.data.utils import HUBDatasetStats
 from ultralytics.hub.auth import Auth
 from ultralytics.hub.utils import HUB_API_ROOT, HUB_WEB_ROOT, PREFIX
 from ultralytics.utils import LOGGER, SETTINGS
@@ -96,5 +95,7 @@ def check_dataset(path='', task='detect'):
         check_dataset('path/to/coco8-pose.zip', task='pose')  # pose dataset
         ```
     """
+    from ultralytics.data.utils import HUBDatasetStats  # imported on first use, loads the dataset utilities
+
     HUBDatasetStats(path=path, task=task).get_json()
     LOGGER.info(f'Checks completed correctly ✅. Upload this dataset to {HUB_WEB_ROOT}/datasets/.')
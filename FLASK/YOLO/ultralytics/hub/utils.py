@@ -10,8 +10,8 @@ from pathlib import Path
 
 import requests
 
-from ultralytics.utils import (ENVIRONMENT, LOGGER, ONLINE, RANK, SETTINGS, TESTS_RUNNING, TQDM, TryExcept, __version__,
-                               colorstr, get_git_origin_url, is_colab, is_git_dir, is_pip_package)
+from ultralytics.utils import (ENVIRONMENT, LOGGER, RANK, SETTINGS, TESTS_RUNNING, TQDM, TryExcept, __version__,
+                               colorstr, get_git_origin_url, is_colab, is_git_dir, is_online, is_pip_package)
 from ultralytics.utils.downloads import GITHUB_ASSETS_NAMES
 
 PREFIX = colorstr('Ultralytics HUB: ')
@@ -179,8 +179,8 @@ class Events:
             SETTINGS['sync'] and \
             RANK in (-1, 0) and \
             not TESTS_RUNNING and \
-            ONLINE and \
-            (is_pip_package() or get_git_origin_url() == 'https://github.com/ultralytics/ultralytics.git')
+            (is_pip_package() or get_git_origin_url() == 'https://github.com/ultralytics/ultralytics.git') and \
+            is_online()
 
     def __call__(self, cfg):
         """
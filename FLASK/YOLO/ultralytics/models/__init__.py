@@ -1,7 +1,18 @@
 # Ultralytics YOLO 🚀, AGPL-3.0 license
 
-from .rtdetr import RTDETR
-from .sam import SAM
-from .yolo import YOLO
+import importlib
+
+# Models loaded on first access, so that importing ultralytics.models.yolo does not load RT-DETR and SAM
+_LAZY_MODELS = {'RTDETR': '.rtdetr', 'SAM': '.sam', 'YOLO': '.yolo'}
+
+
+def __getattr__(name):
+    """Imports a model on first access and caches it in the module."""
+    if name not in _LAZY_MODELS:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_LAZY_MODELS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = 'YOLO', 'RTDETR', 'SAM'  # allow simpler import
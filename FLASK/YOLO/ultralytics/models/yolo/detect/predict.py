@@ -2,7 +2,10 @@
 
 from ultralytics.engine.predictor import BasePredictor
 from ultralytics.engine.results import Results
-from ultralytics.utils import ops
+from ultralytics.nn.modules import Detect
+from ultralytics.utils import DEFAULT_CFG, ops
+from ultralytics.utils.checks import check_imgsz
+from ultralytics.utils.torch_utils import smart_inference_mode
 
 
 class DetectionPredictor(BasePredictor):
@@ -20,14 +23,34 @@ class DetectionPredictor(BasePredictor):
         ```
     """
 
+    def __init__(self, cfg=DEFAULT_CFG, overrides=None, _callbacks=None):
+        """Initializes the DetectionPredictor, with the inference sizes checked by infer() cached by requested size."""
+        super().__init__(cfg, overrides, _callbacks)
+        self.infer_sizes = {}
+
+    def inference(self, im, *args, **kwargs):
+        """Runs inference, with the Detect head of PyTorch models decoding only the anchors above `conf` if `prefilter`."""
+        head = self.model.model.model[-1] if self.model.pt else None
+        if not self.args.prefilter or type(head) is not Detect:  # Segment and Pose extra outputs are not filtered
+            return super().inference(im, *args, **kwargs)
+        head.conf = self.args.conf
+        try:
+            return super().inference(im, *args, **kwargs)
+        finally:
+            head.conf = None  # the model may be shared with a validator
+
+    def non_max_suppression(self, preds):
+        """Runs non-maximum suppression on the raw predictions of a batch with the predictor arguments."""
+        return ops.non_max_suppression(preds,
+                                       self.args.conf,
+                                       self.args.iou,
+                                       agnostic=self.args.agnostic_nms,
+                                       max_det=self.args.max_det,
+                                       classes=self.args.classes)
+
     def postprocess(self, preds, img, orig_imgs):
         """Post-processes predictions and returns a list of Results objects."""
-        preds = ops.non_max_suppression(preds,
-                                        self.args.conf,
-                                        self.args.iou,
-                                        agnostic=self.args.agnostic_nms,
-                                        max_det=self.args.max_det,
-                                        classes=self.args.classes)
+        preds = self.non_max_suppression(preds)
 
         if not isinstance(orig_imgs, list):  # input images are a torch.Tensor, not a list
             orig_imgs = ops.convert_torch2numpy_batch(orig_imgs)
@@ -39,3 +62,35 @@ class DetectionPredictor(BasePredictor):
             img_path = self.batch[0][i]
             results.append(Results(orig_img, path=img_path, names=self.model.names, boxes=pred))
         return results
+
+    @smart_inference_mode()
+    def infer(self, ims, imgsz=None):
+        """
+        Predicts a batch of decoded frames with only preprocessing, forward pass and non-maximum suppression.
+
+        Unlike `__call__`, no inference source is loaded and no callback, logging or saving runs, so the per-call
+        overhead stays small for callers predicting frames one micro-batch at a time. The model is set up and warmed
+        up on the first call, and each inference size is checked once.
+
+        Args:
+            ims (List[np.ndarray] | np.ndarray): BGR frames, as a list of (h, w, 3) arrays or an (n, h, w, 3) array.
+            imgsz (int | List[int], optional): Inference size, `args.imgsz` if None.
+
+        Returns:
+            (List[torch.Tensor]): Detections of each frame, as an (n, 6) tensor of xyxy, conf, class in frame pixels.
+        """
+        if not self.model:
+            self.setup_model(None, verbose=False)
+        key = tuple(imgsz) if isinstance(imgsz, list) else imgsz
+        if key not in self.infer_sizes:
+            self.infer_sizes[key] = check_imgsz(imgsz or self.args.imgsz, stride=self.model.stride, min_dim=2)
+        self.imgsz = self.infer_sizes[key]
+        if not self.done_warmup:
+            self.model.warmup(imgsz=(1, 3, *self.imgsz))
+            self.done_warmup = True
+
+        im = self.preprocess(ims)
+        preds = self.non_max_suppression(self.inference(im))
+        for pred, orig_img in zip(preds, ims):
+            pred[:, :4] = ops.scale_boxes(im.shape[2:], pred[:, :4], orig_img.shape)
+        return preds
@@ -5,7 +5,6 @@ from copy import copy
 import numpy as np
 import torch
 import torch.nn as nn  # Fixme: added for downsampling HR imgs
-import matplotlib.pyplot as plt
 
 from ultralytics.data import build_dataloader, build_yolo_dataset
 from ultralytics.engine.trainer import BaseTrainer
@@ -85,6 +85,7 @@ class AutoBackend(nn.Module):
         fp16 &= pt or jit or onnx or xml or engine or nn_module or triton  # FP16
         nhwc = coreml or saved_model or pb or tflite or edgetpu  # BHWC formats (vs torch BCWH)
         stride = 32  # default stride
+        uint8_input = False  # exported with folded input normalization, PyTorch models are flagged themselves
         model, metadata = None, None
 
         # Set device
@@ -302,6 +303,7 @@ class AutoBackend(nn.Module):
             imgsz = metadata['imgsz']
             names = metadata['names']
             kpt_shape = metadata.get('kpt_shape')
+            uint8_input = str(metadata.get('uint8_input')) == 'True'
         elif not (pt or triton or nn_module):
             LOGGER.warning(f"WARNING ⚠️ Metadata not found for 'model={weights}'")
 
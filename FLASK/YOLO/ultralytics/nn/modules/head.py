@@ -26,6 +26,7 @@ class Detect(nn.Module):
     shape = None
     anchors = torch.empty(0)  # init
     strides = torch.empty(0)  # init
+    conf = None  # inference confidence threshold, decode only anchors above it if set
 
     def __init__(self, nc=80, ch=()):  # detection layer
         super().__init__()
@@ -58,7 +59,13 @@ class Detect(nn.Module):
             cls = x_cat[:, self.reg_max * 4:]
         else:
             box, cls = x_cat.split((self.reg_max * 4, self.nc), 1)
-        dbox = dist2bbox(self.dfl(box), self.anchors.unsqueeze(0), xywh=True, dim=1) * self.strides
+        anchors, strides = self.anchors, self.strides
+        if self.conf is not None and not self.export:  # decode only anchors above conf in any image of the batch
+            t = math.log(self.conf / (1 - self.conf)) if 0 < self.conf < 1 else -math.inf  # sigmoid(x) > conf logit
+            i = (cls.amax(1) > t).any(0).nonzero().squeeze(1)
+            i = i if len(i) else i.new_zeros(1)  # keep one anchor below conf, discarded by NMS, if none is above
+            box, cls, anchors, strides = box[..., i], cls[..., i], anchors[:, i], strides[:, i]
+        dbox = dist2bbox(self.dfl(box), anchors.unsqueeze(0), xywh=True, dim=1) * strides
 
         if self.export and self.format in ('tflite', 'edgetpu'):
             # Normalize xywh with image size to mitigate quantization error of TFLite integer models as done in YOLOv5:
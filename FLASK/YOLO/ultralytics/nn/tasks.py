@@ -1,6 +1,9 @@
 # Ultralytics YOLO 🚀, AGPL-3.0 license
 
 import contextlib
+import json
+import os
+import struct
 from copy import deepcopy
 from pathlib import Path
 
@@ -11,7 +14,7 @@ from ultralytics.nn.modules import (AIFI, C1, C2, C3, C3TR, SPP, SPPF, Bottlenec
                                     Classify, Concat, Conv, Conv2, ConvTranspose, Detect, DWConv, DWConvTranspose2d,
                                     Focus, GhostBottleneck, GhostConv, HGBlock, HGStem, Pose, RepC3, RepConv,
                                     RTDETRDecoder, Segment)
-from ultralytics.utils import DEFAULT_CFG_DICT, DEFAULT_CFG_KEYS, LOGGER, colorstr, emojis, yaml_load
+from ultralytics.utils import DEFAULT_CFG_DICT, DEFAULT_CFG_KEYS, LOGGER, colorstr, emojis, yaml_load, yaml_save
 from ultralytics.utils.checks import check_requirements, check_suffix, check_yaml
 from ultralytics.utils.loss import v8ClassificationLoss, v8DetectionLoss, v8PoseLoss, v8SegmentationLoss
 from ultralytics.utils.plotting import feature_visualization
@@ -57,6 +60,8 @@ class BaseModel(nn.Module):
         Returns:
             (torch.Tensor): The last output of the model.
         """
+        if x.dtype == torch.uint8:  # BGR images of a model with folded input normalization
+            x = x.to(next(self.parameters()).dtype)
         if augment:
             return self._predict_augment(x)
         return self._predict_once(x, profile, visualize)
@@ -149,6 +154,27 @@ class BaseModel(nn.Module):
 
         return self
 
+    def fold_input_normalization(self):
+        """
+        Fold the 1/255 input scale and the RGB channel order into the weights of the first convolution, so that the
+        model takes BCHW uint8 BGR images, converted to float on its device, instead of RGB images scaled to 0.0 - 1.0.
+
+        The convolution is linear and zero-pads its input, so its output is unchanged up to rounding. Only inference
+        models should be folded, training pipelines still feed normalized RGB images.
+
+        Returns:
+            (nn.Module): The folded model is returned.
+        """
+        m = self.model[0]
+        if getattr(self, 'uint8_input', False):
+            return self
+        if not isinstance(m, Conv) or m.conv.in_channels != 3:
+            LOGGER.warning(f'WARNING ⚠️ {m.type} input layer can not fold input normalization, inputs are unchanged.')
+            return self
+        m.conv.weight = nn.Parameter(m.conv.weight.detach().flip(1) / 255, requires_grad=False)  # BGR, 0 - 255
+        self.uint8_input = True
+        return self
+
     def is_fused(self, thresh=10):
         """
         Check if the model has less than a certain threshold of BatchNorm layers.
@@ -293,7 +319,10 @@ class DetectionModel(BaseModel):
             s = 256  # 2x min stride
             m.inplace = self.inplace
             forward = lambda x: self.forward(x)[0] if isinstance(m, (Segment, Pose)) else self.forward(x)
-            m.stride = torch.tensor([s / x.shape[-2] for x in forward(torch.zeros(1, ch, s, s))])  # forward
+            # Strides are kept on CPU also when the model is built on the meta device, e.g. by attempt_load_artifact(),
+            # which gives them in the cfg instead of running a forward pass
+            stride = self.yaml.get('stride') or [s / x.shape[-2] for x in forward(torch.zeros(1, ch, s, s))]
+            m.stride = torch.tensor(stride, device='cpu', dtype=torch.float32)
             self.stride = m.stride
             m.bias_init()  # only run once
         else:
@@ -664,6 +693,115 @@ def attempt_load_one_weight(weight, device=None, inplace=True, fuse=False):
     return model, ckpt
 
 
+# Tensor data types of inference artifacts, by their name in the safetensors layout
+ARTIFACT_DTYPES = {
+    'F64': torch.float64, 'F32': torch.float32, 'F16': torch.float16, 'BF16': torch.bfloat16, 'I64': torch.int64,
+    'I32': torch.int32, 'I16': torch.int16, 'I8': torch.int8, 'U8': torch.uint8, 'BOOL': torch.bool}
+
+
+def save_inference_artifact(weight, file=None):
+    """
+    Saves the fused FP32 inference weights of a checkpoint as an inference artifact, loaded by attempt_load_artifact().
+
+    The artifact is a flat tensor file in the safetensors layout, i.e. a JSON header with the dtype, shape and offsets
+    of each tensor followed by their raw data, and a small YAML descriptor next to it with the architecture, class
+    names, strides, DFL channels and arguments needed to rebuild the fused model around the tensors. Tensors of the
+    super-resolution branch, which only runs in training, are not saved.
+
+    Args:
+        weight (str | Path): Path of the *.pt checkpoint.
+        file (str | Path, optional): Path of the tensor file, the checkpoint path with a .safetensors suffix if None.
+            The descriptor is saved with the same path and a .yaml suffix.
+
+    Returns:
+        (Path): Path of the tensor file.
+    """
+    model, _ = attempt_load_one_weight(weight, fuse=True)
+    file = Path(file or Path(weight).with_suffix('.safetensors'))
+    state = {k: v.detach().cpu().contiguous() for k, v in model.state_dict().items() if not k.startswith('model_up.')}
+    names = sorted(state, key=lambda k: -state[k].element_size())  # largest items first, keeps every tensor aligned
+    dtypes = {v: k for k, v in ARTIFACT_DTYPES.items()}
+    header, offset = {}, 0
+    for k in names:
+        t = state[k]
+        header[k] = {'dtype': dtypes[t.dtype], 'shape': list(t.shape), 'data_offsets': [offset, offset + t.nbytes]}
+        offset += t.nbytes
+    header = json.dumps(header, separators=(',', ':')).encode()
+    header += b' ' * (-len(header) % 8)  # tensor data aligned on 8 bytes
+
+    m = model.model[-1]  # Detect()
+    yaml_save(file.with_suffix('.yaml'), {
+        'weights': file.name,
+        'task': model.task,
+        'names': model.names,
+        'stride': model.stride.tolist(),
+        'reg_max': getattr(m, 'reg_max', None),
+        'args': {k: v for k, v in model.args.items() if k in ('imgsz', 'data', 'task', 'single_cls')},
+        'yaml': model.yaml})
+
+    # Written then renamed, so that concurrent loaders never map a partial file
+    tmp = file.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(struct.pack('<Q', len(header)) + header)
+        for k in names:
+            f.write(state[k].view(-1).view(torch.uint8).numpy().tobytes())
+    os.replace(tmp, file)
+    return file
+
+
+def attempt_load_artifact(file, inplace=True):
+    """
+    Loads the fused FP32 model of an inference artifact saved by save_inference_artifact().
+
+    The model is built on the meta device, so no weights are allocated nor initialized, and its tensors are then
+    assigned views of the tensor file mapped in memory. The mapping is private: pages are read on first use and shared
+    with every process mapping the same file, and only copied if a process writes to them.
+
+    Args:
+        file (str | Path): Path of the tensor file, with its descriptor next to it.
+        inplace (bool): Run activations and Detect() in place.
+
+    Returns:
+        (nn.Module): The fused model, in eval mode.
+    """
+    file = Path(file)
+    descriptor = yaml_load(file.with_suffix('.yaml'))
+    with open(file, 'rb') as f:
+        n = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(n))
+    header.pop('__metadata__', None)
+    data = torch.from_file(str(file), shared=False, size=file.stat().st_size, dtype=torch.uint8)
+    state = {}
+    for k, v in header.items():
+        start, end = (8 + n + i for i in v['data_offsets'])
+        state[k] = data[start:end].view(ARTIFACT_DTYPES[v['dtype']]).view(v['shape'])
+
+    task = descriptor['task']
+    model_class = {
+        'detect': DetectionModel,
+        'segment': SegmentationModel,
+        'pose': PoseModel,
+        'classify': ClassificationModel}[task]
+    with torch.device('meta'):
+        model = model_class({**descriptor['yaml'], 'stride': descriptor['stride']}, verbose=False).fuse(verbose=False)
+    m = model.model[-1]  # Detect()
+    if getattr(m, 'reg_max', None) != descriptor['reg_max']:
+        raise TypeError(f"Inference artifact '{file}' has reg_max={descriptor['reg_max']} DFL channels but its "
+                        f'architecture builds {m.reg_max}, export it again from its checkpoint.')
+    model.load_state_dict(state, assign=True)
+    model.requires_grad_(False)
+
+    model.yaml.pop('stride')
+    model.names = descriptor['names']
+    model.args = {**DEFAULT_CFG_DICT, **descriptor['args']}
+    model.pt_path = str(file)
+    model.task = task
+    for m in model.modules():
+        if type(m) in (nn.Hardswish, nn.LeakyReLU, nn.ReLU, nn.ReLU6, nn.SiLU, Detect, Segment):
+            m.inplace = inplace
+    return model.eval()
+
+
 def parse_model(d, ch, verbose=True):  # model_dict, input_channels(3)
     """Parse a YOLO model.yaml dictionary into a PyTorch model."""
     import ast
@@ -16,7 +16,6 @@ from types import SimpleNamespace
 from typing import Union
 
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 import torch
 import yaml
@@ -207,6 +206,8 @@ def plt_settings(rcparams=None, backend='Agg'):
 
         def wrapper(*args, **kwargs):
             """Sets rc parameters and backend, calls the original function, and restores the settings."""
+            import matplotlib.pyplot as plt  # imported on first use, not needed for inference
+
             original_backend = plt.get_backend()
             if backend != original_backend:
                 plt.close('all')  # auto-close()ing of figures upon backend switching is deprecated since 3.8
@@ -430,6 +431,8 @@ def is_jupyter():
     Returns:
         (bool): True if running inside a Jupyter Notebook, False otherwise.
     """
+    if 'IPython' not in sys.modules:  # a notebook kernel has already imported IPython, avoid importing it otherwise
+        return False
     with contextlib.suppress(Exception):
         from IPython import get_ipython
         return get_ipython() is not None
@@ -472,7 +475,12 @@ def is_online() -> bool:
     return False
 
 
-ONLINE = is_online()
+def __getattr__(name):
+    """Computes ONLINE on first access, as it probes connectivity with a network round trip."""
+    if name == 'ONLINE':
+        globals()['ONLINE'] = is_online()
+        return globals()['ONLINE']
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 
 def is_pip_package(filepath: str = __name__) -> bool:
@@ -789,9 +797,9 @@ def set_sentry():
             RANK in (-1, 0) and \
             Path(sys.argv[0]).name == 'yolo' and \
             not TESTS_RUNNING and \
-            ONLINE and \
             is_pip_package() and \
-            not is_git_dir():
+            not is_git_dir() and \
+            is_online():
 
         # If sentry_sdk package is not installed then return and do not use Sentry
         try:
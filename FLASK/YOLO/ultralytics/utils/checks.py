@@ -19,9 +19,8 @@ import cv2
 import numpy as np
 import requests
 import torch
-from matplotlib import font_manager
 
-from ultralytics.utils import (ASSETS, AUTOINSTALL, LINUX, LOGGER, ONLINE, ROOT, USER_CONFIG_DIR, SimpleNamespace,
+from ultralytics.utils import (ASSETS, AUTOINSTALL, LINUX, LOGGER, ROOT, USER_CONFIG_DIR, SimpleNamespace,
                                ThreadingLocked, TryExcept, clean_url, colorstr, downloads, emojis, is_colab, is_docker,
                                is_jupyter, is_kaggle, is_online, is_pip_package, url2file)
 
@@ -244,7 +243,7 @@ def check_pip_update_available():
     Returns:
         (bool): True if an update is available, False otherwise.
     """
-    if ONLINE and is_pip_package():
+    if is_pip_package() and is_online():
         with contextlib.suppress(Exception):
             from ultralytics import __version__
             latest = check_latest_pypi_version()
@@ -274,6 +273,8 @@ def check_font(font='Arial.ttf'):
         return file
 
     # Check system fonts
+    from matplotlib import font_manager  # imported on first use, not needed for inference
+
     matches = [s for s in font_manager.findSystemFonts() if font in s]
     if any(matches):
         return matches[0]
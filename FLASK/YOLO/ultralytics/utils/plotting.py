@@ -6,7 +6,6 @@ import warnings
 from pathlib import Path
 
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 import torch
 from PIL import Image, ImageDraw, ImageFont
@@ -259,10 +258,96 @@ class Annotator:
         return np.asarray(self.im)
 
 
+class BoxRenderer:
+    """
+    Fast detection renderer that draws all boxes of a frame in bulk, for dense small-object scenes and video output.
+
+    Box outlines are drawn with one cv2.polylines call per class using precomputed colors, and label glyphs are rendered
+    once with cv2.putText and cached, so the per-box cost of a label is an array copy. Unlike Annotator, boxes are not
+    anti-aliased and only ASCII labels are supported.
+
+    Attributes:
+        names (dict): Class names.
+        line_width (int, optional): Box line width, scaled to the image size if None. Use 1 for thin-line mode.
+        labels (bool): Whether to draw labels, False for label-free mode.
+        conf (bool): Whether to add the confidence score to labels.
+        palette (np.ndarray): Per-class BGR colors of shape (num_classes, 3).
+    """
+
+    def __init__(self, names, line_width=None, labels=True, conf=True):
+        """Initialize the renderer with class names and drawing options."""
+        self.names = names if isinstance(names, dict) else dict(enumerate(names))
+        self.line_width = line_width
+        self.labels = labels
+        self.conf = conf
+        self.palette = np.array([colors(i, True) for i in range(max(self.names, default=0) + 1)], dtype=np.uint8)
+        self.glyphs = {}  # (text, class, line width) -> BGR label patch
+
+    def glyph(self, text, c, lw):
+        """Return the cached label patch for `text` on the color of class `c` at line width `lw`."""
+        key = text, c, lw
+        if key not in self.glyphs:
+            if len(self.glyphs) >= 4096:  # bound the cache, i.e. for labels with track ids
+                self.glyphs.clear()
+            tf, sf = max(lw - 1, 1), lw / 3  # font thickness and scale, as in Annotator
+            (w, h), _ = cv2.getTextSize(text, 0, fontScale=sf, thickness=tf)
+            patch = np.empty((h + 3, w, 3), dtype=np.uint8)
+            patch[:] = self.palette[c]
+            cv2.putText(patch, text, (0, h + 1), 0, sf, (255, 255, 255), thickness=tf, lineType=cv2.LINE_AA)
+            self.glyphs[key] = patch
+        return self.glyphs[key]
+
+    def __call__(self, im, xyxy, conf, cls, ids=None, copy=True):
+        """
+        Draw detections on a BGR image.
+
+        Args:
+            im (np.ndarray): BGR image of shape (h, w, 3).
+            xyxy (np.ndarray | torch.Tensor): Boxes in image pixels of shape (n, 4).
+            conf (np.ndarray | torch.Tensor): Confidence scores of shape (n, ).
+            cls (np.ndarray | torch.Tensor): Class indices of shape (n, ).
+            ids (np.ndarray | torch.Tensor, optional): Track ids of shape (n, ).
+            copy (bool): Draw on a copy of `im` instead of in place.
+
+        Returns:
+            (np.ndarray): The annotated image.
+        """
+        im = np.array(im) if copy or not im.flags.c_contiguous else im  # cv2 draws on contiguous buffers only
+        n = len(xyxy)
+        if not n:
+            return im
+        xyxy, conf, cls = (x.cpu().numpy() if isinstance(x, torch.Tensor) else np.asarray(x) for x in (xyxy, conf, cls))
+        h, w = im.shape[:2]
+        lw = self.line_width or max(round(sum(im.shape) / 2 * 0.003), 2)
+        b = np.empty((n, 4), dtype=np.int32)
+        b[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w - 1)
+        b[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h - 1)
+        c = cls.astype(np.int64)
+
+        # Outlines of all boxes of a class in a single polylines call
+        corners = b[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(n, 4, 2)
+        for k in np.unique(c):
+            cv2.polylines(im, corners[c == k], True, self.palette[k].tolist(), thickness=lw, lineType=cv2.LINE_8)
+
+        # Labels from cached glyphs, above the box if they fit, else inside it
+        if self.labels:
+            ids = None if ids is None else (ids.cpu().numpy() if isinstance(ids, torch.Tensor) else np.asarray(ids))
+            ids = [None] * n if ids is None else ids.astype(np.int64).tolist()
+            for (x1, y1), k, p, d in zip(b[:, :2].tolist(), c.tolist(), conf.tolist(), ids):
+                text = self.names[k] if d is None else f'id:{d} {self.names[k]}'
+                g = self.glyph(f'{text} {p:.2f}' if self.conf else text, k, lw)
+                gh, gw = g.shape[:2]
+                top = y1 - gh if y1 - gh >= 0 else y1
+                gw, gh = min(gw, w - x1), min(gh, h - top)
+                im[top:top + gh, x1:x1 + gw] = g[:gh, :gw]
+        return im
+
+
 @TryExcept()  # known issue https://github.com/ultralytics/yolov5/issues/5395
 @plt_settings()
 def plot_labels(boxes, cls, names=(), save_dir=Path(''), on_plot=None):
     """Plot training labels including class histograms and box statistics."""
+    import matplotlib.pyplot as plt  # scope for faster 'import ultralytics'
     import pandas as pd
     import seaborn as sn
 
@@ -521,6 +606,7 @@ def plot_results(file='path/to/results.csv', dir='', segment=False, pose=False,
         plot_results('path/to/results.csv', segment=True)
         ```
     """
+    import matplotlib.pyplot as plt  # scope for faster 'import ultralytics'
     import pandas as pd
     from scipy.ndimage import gaussian_filter1d
     save_dir = Path(file).parent if file else Path(dir)
@@ -579,6 +665,7 @@ def plt_color_scatter(v, f, bins=20, cmap='viridis', alpha=0.8, edgecolors='none
         >>> f = np.random.rand(100)
         >>> plt_color_scatter(v, f)
     """
+    import matplotlib.pyplot as plt  # scope for faster 'import ultralytics'
 
     # Calculate 2D histogram and corresponding colors
     hist, xedges, yedges = np.histogram2d(v, f, bins=bins)
@@ -601,6 +688,7 @@ def plot_tune_results(csv_file='tune_results.csv'):
     Examples:
         >>> plot_tune_results('path/to/tune_results.csv')
     """
+    import matplotlib.pyplot as plt  # scope for faster 'import ultralytics'
 
     import pandas as pd
     from scipy.ndimage import gaussian_filter1d
@@ -670,6 +758,7 @@ def feature_visualization(x, module_type, stage, n=32, save_dir=Path('runs/detec
         n (int, optional): Maximum number of feature maps to plot. Defaults to 32.
         save_dir (Path, optional): Directory to save results. Defaults to Path('runs/detect/exp').
     """
+    import matplotlib.pyplot as plt  # scope for faster 'import ultralytics'
     for m in ['Detect', 'Pose', 'Segment']:
         if m in module_type:
             return
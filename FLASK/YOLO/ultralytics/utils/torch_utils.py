@@ -165,6 +165,8 @@ def fuse_conv_and_bn(conv, bn):
                           dilation=conv.dilation,
                           groups=conv.groups,
                           bias=True).requires_grad_(False).to(conv.weight.device)
+    if conv.weight.is_meta:  # model built without weights, e.g. to load fused weights from an inference artifact
+        return fusedconv
 
     # Prepare filters
     w_conv = conv.weight.clone().view(conv.out_channels, -1)
@@ -190,6 +192,8 @@ def fuse_deconv_and_bn(deconv, bn):
                                     dilation=deconv.dilation,
                                     groups=deconv.groups,
                                     bias=True).requires_grad_(False).to(deconv.weight.device)
+    if deconv.weight.is_meta:  # model built without weights, e.g. to load fused weights from an inference artifact
+        return fuseddconv
 
     # Prepare filters
     w_deconv = deconv.weight.clone().view(deconv.out_channels, -1)
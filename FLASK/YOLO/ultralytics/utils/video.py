@@ -0,0 +1,120 @@
+# Ultralytics YOLO 🚀, AGPL-3.0 license
+"""
+Background video encoding for annotated prediction outputs.
+
+Usage:
+    from ultralytics.utils.video import VideoWriter
+
+    with VideoWriter('out.mp4', fps=30, size=(1920, 1080), codec='mp4v', max_size=1280) as writer:
+        for frame in frames:
+            writer.write(frame)  # returns immediately unless the frame queue is full
+    # queued frames are flushed and the file closed on exit, or call writer.release()
+"""
+
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+
+import cv2
+
+from ultralytics.utils import LOGGER
+
+# Container suffix for each supported fourcc codec
+CODEC_SUFFIXES = {
+    'mp4v': '.mp4',  # MPEG-4 Part 2, available in every OpenCV FFmpeg build
+    'avc1': '.mp4',  # H.264, requires an OpenCV build with an H.264 encoder
+    'hev1': '.mp4',  # H.265, requires an OpenCV build with an H.265 encoder
+    'VP80': '.webm',
+    'VP90': '.webm',
+    'XVID': '.avi',
+    'MJPG': '.avi',  # Motion JPEG, large files
+    'WMV2': '.avi'}
+FALLBACK_CODEC = 'mp4v'
+
+
+class VideoWriter:
+    """
+    Video writer that encodes frames on a dedicated thread fed by a bounded queue.
+
+    Frames are resized to `max_size` (longest side) on the encoder thread, so the caller only pays for a queue put.
+    When the queue is full `write` blocks, which bounds memory if encoding is slower than inference.
+
+    Attributes:
+        path (Path): Output file path, with the suffix matching the codec container.
+        codec (str): Fourcc codec actually used.
+        fps (float): Output frame rate.
+        size (tuple): Output frame size as (width, height).
+    """
+
+    def __init__(self, path, fps, size, codec=FALLBACK_CODEC, quality=None, max_size=None, queue_size=32):
+        """
+        Open the output file and start the encoder thread.
+
+        Args:
+            path (str | Path): Output file path, its suffix is replaced by the codec container suffix.
+            fps (float): Output frame rate.
+            size (tuple): Source frame size as (width, height).
+            codec (str): Fourcc codec, one of CODEC_SUFFIXES. Falls back to 'mp4v' if unavailable in this build.
+            quality (int, optional): Encoder quality 0-100 for backends that support it.
+            max_size (int, optional): Longest side of the output frames in pixels, source size if None.
+            queue_size (int): Maximum number of frames waiting to be encoded.
+        """
+        w, h = size
+        r = min(max_size / max(w, h), 1.0) if max_size else 1.0
+        self.size = (round(w * r) // 2 * 2, round(h * r) // 2 * 2) if r < 1 else (w, h)  # even sizes for yuv420
+        self.fps = fps if fps and fps > 0 else 30  # 30 FPS fallback
+        self.path, self.codec, self.writer = None, None, None
+        for c in dict.fromkeys((codec, FALLBACK_CODEC)):
+            self.path = Path(path).with_suffix(CODEC_SUFFIXES.get(c, Path(path).suffix))
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.writer = cv2.VideoWriter(str(self.path), cv2.VideoWriter_fourcc(*c), self.fps, self.size)
+            if self.writer.isOpened():
+                self.codec = c
+                break
+            LOGGER.warning(f"WARNING ⚠️ video codec '{c}' is not available in this OpenCV build")
+        else:
+            raise RuntimeError(f'Failed to open video writer for {path}')
+        if quality is not None and not self.writer.set(cv2.VIDEOWRITER_PROP_QUALITY, quality):
+            LOGGER.debug(f"video quality is not configurable for codec '{self.codec}', using encoder default")
+
+        self.queue = Queue(maxsize=max(queue_size, 1))
+        self.error = None
+        self.thread = Thread(target=self._encode, daemon=True)
+        self.thread.start()
+
+    def _encode(self):
+        """Encode queued frames until the `None` sentinel is received."""
+        while True:
+            im = self.queue.get()
+            if im is None:
+                break
+            if self.error is None:
+                try:
+                    if im.shape[1::-1] != self.size:
+                        im = cv2.resize(im, self.size, interpolation=cv2.INTER_AREA)
+                    self.writer.write(im)
+                except Exception as e:
+                    self.error = e  # re-raised on the caller thread by write() or release()
+        self.writer.release()
+
+    def write(self, im):
+        """Queue a BGR frame for encoding, blocking while the queue is full."""
+        if self.error is not None:
+            raise self.error
+        self.queue.put(im)
+
+    def __enter__(self):
+        """Return the writer for use as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Flush queued frames and close the file on context exit."""
+        self.release()
+
+    def release(self):
+        """Encode all queued frames, close the file and stop the encoder thread."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
@@ -3,23 +3,71 @@ This module defines the models and functions used for processing files with YOLO
 
 Constants:
     model_dict (dict): A dictionary of YOLO models and their versions.
+    model_fallbacks (dict): The smaller model version each version falls back to when a job is degraded.
     ACCEPTED_MIME_TYPES (dict): A dictionary of accepted MIME types for images and videos.
 
 Functions:
+    load_model(weights): Loads a YOLO model, from the inference artifact of its checkpoint if enabled.
     get_file_category(file_path): Determines the category of a file based on its MIME type.
+    get_frame_count(file_path, category): Returns the number of frames of an image or video file.
 """
 
 import mimetypes
+import os
+import cv2
 from ultralytics.models.yolo.model import YOLO
+from ultralytics.nn.tasks import save_inference_artifact
+from config import Config, logger
+
+
+def load_model(weights):
+    """
+    Loads a YOLO model, from the inference artifact of its checkpoint if Config.INFERENCE_ARTIFACTS is set.
+
+    The artifact holds the fused weights in a flat tensor file next to the checkpoint, with a small YAML descriptor.
+    It is memory-mapped instead of unpickled and fused, so the model loads in milliseconds and the processes loading
+    it, e.g. video workers, share its pages. It is exported on first load and whenever the checkpoint is newer, and
+    the checkpoint is loaded instead if the artifact cannot be written or read, e.g. on a read-only volume.
+
+    If Config.INFERENCE_UINT8_INPUT is set, the input normalization is folded into the first convolution of the model,
+    and its predictors feed it uint8 BGR frames.
+
+    Args:
+        weights (str): Path to the *.pt checkpoint.
+
+    Returns:
+        YOLO: The loaded model.
+    """
+    model = None
+    if Config.INFERENCE_ARTIFACTS:
+        artifact = os.path.splitext(weights)[0] + '.safetensors'
+        try:
+            if not os.path.exists(artifact) or \
+                    os.path.exists(weights) and os.path.getmtime(artifact) < os.path.getmtime(weights):
+                save_inference_artifact(weights, artifact)
+                logger.info("Inference artifact exported: %s", artifact)
+            model = YOLO(artifact)
+        except (OSError, RuntimeError, TypeError) as e:
+            logger.warning("Inference artifact of %s not loaded, loading the checkpoint: %s", weights, str(e))
+    model = model or YOLO(weights)
+    if Config.INFERENCE_UINT8_INPUT:
+        model.model.fold_input_normalization()
+    return model
+
 
 # Dictionary of YOLO models and their versions
 model_dict = {
     'YOLO8': {
-        'YOLO8s_FSR': YOLO('./YOLO/ultralytics/yolo8s_focalsr.pt'),
-        'YOLO8m_FSR': YOLO('./YOLO/ultralytics/yolo8m_focalsr.pt'),
+        'YOLO8s_FSR': load_model('./YOLO/ultralytics/yolo8s_focalsr.pt'),
+        'YOLO8m_FSR': load_model('./YOLO/ultralytics/yolo8m_focalsr.pt'),
     }    
 }
 
+# Smaller version of each model version, used when a job is degraded to fit its latency budget
+model_fallbacks = {
+    'YOLO8m_FSR': 'YOLO8s_FSR',
+}
+
 ACCEPTED_MIME_TYPES = {
     'image': [
         'image/bmp',                    # .bmp
@@ -71,3 +119,22 @@ def get_file_category(file_path):
     
     # Return None if the MIME type does not match any accepted types
     return None
+
+
+def get_frame_count(file_path, category):
+    """
+    Returns the number of frames of an image or video file.
+
+    Args:
+        file_path (str): The path to the file.
+        category (str): The category of the file ('image', 'video').
+
+    Returns:
+        int: 1 for an image, the frame count of a video (0 if it cannot be read).
+    """
+    if category != 'video':
+        return 1
+    video = cv2.VideoCapture(file_path)
+    frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video.release()
+    return max(frame_count, 0)
@@ -9,11 +9,14 @@ error messages and status codes.
 
 Functions:
     - validate_request_params(request): Validates the request parameters for model prediction.
+    - validate_slice_params(request, job_id): Validates the request parameters for a slice of the results of a job.
+    - validate_aggregate_params(request, job_id): Validates the request parameters for an aggregation query on a job.
 """
 
-from models import Dataset
-from utils import model_dict
-from config import logger
+from aggregates import AGGREGATE_KINDS
+from models import Dataset, Result
+from utils import model_dict, model_fallbacks
+from config import Config, logger
 
 def validate_request_params(request):
     """
@@ -51,6 +54,31 @@ def validate_request_params(request):
         if not dataset_id:
             return {'error': 'dataset_id is required', 'status_code': 400}
 
+        # Retrieve the optional latency budget of the job and check if it's a positive number of seconds
+        latency_budget = data.get('latency_budget_s')
+        if latency_budget is not None and (isinstance(latency_budget, bool) or
+                                           not isinstance(latency_budget, (int, float)) or latency_budget <= 0):
+            return {'error': 'latency_budget_s must be a positive number', 'status_code': 400}
+
+        # Retrieve the optional format of video results, objects per frame or tracks
+        result_format = data.get('result_format') or 'frames'
+        if result_format not in ('frames', 'tracks'):
+            return {'error': "result_format must be 'frames' or 'tracks'", 'status_code': 400}
+
+        # Retrieve the optional cascade flag, predicting with the smaller model version first
+        cascade = data.get('cascade', False)
+        if not isinstance(cascade, bool):
+            return {'error': 'cascade must be a boolean', 'status_code': 400}
+
+        # Retrieve the optional annotated output of videos, full videos or event clips, and the classes of the events
+        annotation_mode = data.get('annotation_mode') or Config.ANNOTATION_MODE
+        if annotation_mode not in ('video', 'clips'):
+            return {'error': "annotation_mode must be 'video' or 'clips'", 'status_code': 400}
+        clip_classes = data.get('clip_classes')
+        if clip_classes is not None and (not isinstance(clip_classes, list) or any(
+                isinstance(c, bool) or not isinstance(c, int) or c < 0 for c in clip_classes)):
+            return {'error': 'clip_classes must be a list of class ids', 'status_code': 400}
+
         # Check if the dataset with the provided dataset_id exists
         dataset = Dataset.query.get(dataset_id)
         if not dataset:
@@ -66,6 +94,34 @@ def validate_request_params(request):
         if model is None:
             return {'error': 'Invalid model_version', 'status_code': 400}
 
+        # Retrieve the optional models to compare with and check if each model_id and model_version is valid
+        compare_models = []
+        for compared in data.get('compare_models') or []:
+            compared_id = compared.get('model_id') if isinstance(compared, dict) else None
+            compared_version = compared.get('model_version') if isinstance(compared, dict) else None
+            compared_model = model_dict.get(compared_id, {}).get(compared_version)
+            if compared_model is None:
+                return {'error': f'Invalid compared model {compared}', 'status_code': 400}
+            if (compared_id, compared_version) != (model_id, model_version) and \
+                    (compared_id, compared_version) not in [(i, v) for i, v, _ in compare_models]:
+                compare_models.append((compared_id, compared_version, compared_model))
+
+        # Check if the cascade can run, with a smaller version of the requested model and a single model
+        if cascade and model_version not in model_fallbacks:
+            return {'error': f'cascade requires a model version with a smaller version, not {model_version}',
+                    'status_code': 400}
+        if cascade and compare_models:
+            return {'error': 'cascade can not be combined with compare_models', 'status_code': 400}
+
+        # Check if the compared models support the requested outputs, they return per-frame results and annotate
+        # full videos
+        if annotation_mode == 'clips' and compare_models:
+            return {'error': 'annotation_mode clips can not be combined with compare_models', 'status_code': 400}
+        if clip_classes is not None and compare_models:
+            return {'error': 'clip_classes can not be combined with compare_models', 'status_code': 400}
+        if result_format == 'tracks' and compare_models:
+            return {'error': 'result_format tracks can not be combined with compare_models', 'status_code': 400}
+
         # Return the validated parameters if all checks pass
         return {
             'error': None,
@@ -73,9 +129,157 @@ def validate_request_params(request):
             'model_id': model_id,
             'model_version': model_version,
             'dataset_id': dataset_id,
-            'model': model
+            'model': model,
+            'model_category': model_category,
+            'latency_budget': latency_budget,
+            'compare_models': compare_models,
+            'result_format': result_format,
+            'cascade': cascade,
+            'annotation_mode': annotation_mode,
+            'clip_classes': clip_classes,
+            'user': dataset.email,
+            'token_cost': dataset.token_cost
     }
 
     except Exception as e:
         logger.error(f"Unexpected error during validation: {str(e)}")
-        return {'error': 'Internal server error', 'status_code': 500}
\ No newline at end of file
+        return {'error': 'Internal server error', 'status_code': 500}
+
+
+def validate_slice_params(request, job_id):
+    """
+    Validates the query parameters of a request for a slice of the results of a job.
+
+    Args:
+        request (Request): The Flask request object, with the optional query parameters `filename`, `start_frame`,
+            `end_frame`, `classes` as comma separated class ids, `min_confidence`, and `model_id` and `model_version`
+            of a compared model.
+        job_id (str): ID of the job.
+
+    Returns:
+        dict: A dictionary containing either validation error details or validated parameters.
+    """
+    try:
+        args = request.args
+
+        # Retrieve the optional frame range and check if it's a range of non-negative frame numbers
+        start_frame, end_frame = args.get('start_frame'), args.get('end_frame')
+        try:
+            start_frame = int(start_frame) if start_frame is not None else None
+            end_frame = int(end_frame) if end_frame is not None else None
+        except ValueError:
+            return {'error': 'start_frame and end_frame must be integers', 'status_code': 400}
+        if (start_frame is not None and start_frame < 0) or (end_frame is not None and end_frame < 0) or \
+                (start_frame is not None and end_frame is not None and end_frame < start_frame):
+            return {'error': 'start_frame and end_frame must be a range of non-negative frame numbers',
+                    'status_code': 400}
+
+        # Retrieve the optional class filter and confidence floor
+        classes = args.get('classes')
+        try:
+            classes = [int(c) for c in classes.split(',') if c.strip()] if classes is not None else None
+        except ValueError:
+            return {'error': 'classes must be comma separated class ids', 'status_code': 400}
+        min_confidence = args.get('min_confidence')
+        try:
+            min_confidence = float(min_confidence) if min_confidence is not None else None
+        except ValueError:
+            return {'error': 'min_confidence must be a number', 'status_code': 400}
+
+        # Retrieve the optional compared model whose results are queried, the model of the job if not provided
+        model_id, model_version = args.get('model_id'), args.get('model_version')
+        if (model_id is None) != (model_version is None) or \
+                (model_id is not None and model_version not in model_dict.get(model_id, {})):
+            return {'error': 'model_id and model_version must both be given and be a valid model', 'status_code': 400}
+
+        # Check if the job exists, its results are stored in the directory of its dataset
+        result = Result.query.get(str(job_id))
+        if not result:
+            return {'error': 'Job not found', 'status_code': 404}
+
+        # Results of the model of the job are stored in the directory of the job, those of compared models in the
+        # subdirectory named after the model
+        model = f'{model_id}_{model_version}' if model_id is not None and \
+            (model_id, model_version) != (result.model_id, result.model_version) else None
+
+        return {
+            'error': None,
+            'dataset_id': result.dataset_id,
+            'filename': args.get('filename'),
+            'model': model,
+            'start_frame': start_frame,
+            'end_frame': end_frame,
+            'classes': classes,
+            'min_confidence': min_confidence
+        }
+
+    except Exception as e:
+        logger.error(f"Unexpected error during validation: {str(e)}")
+        return {'error': 'Internal server error', 'status_code': 500}
+
+
+def validate_aggregate_params(request, job_id):
+    """
+    Validates the query parameters of an aggregation query on a job.
+
+    Args:
+        request (Request): The Flask request object, with the optional query parameters `filename`, `kinds` as comma
+            separated kinds of aggregates, `classes` as comma separated class ids, `interval` in seconds, and
+            `model_id` and `model_version` of a compared model.
+        job_id (str): ID of the job.
+
+    Returns:
+        dict: A dictionary containing either validation error details or validated parameters.
+    """
+    try:
+        args = request.args
+
+        # Retrieve the optional kinds of aggregates and check if they are valid
+        kinds = args.get('kinds')
+        kinds = [k.strip() for k in kinds.split(',') if k.strip()] if kinds is not None else None
+        if kinds is not None and any(k not in AGGREGATE_KINDS for k in kinds):
+            return {'error': f'kinds must be among {", ".join(AGGREGATE_KINDS)}', 'status_code': 400}
+
+        # Retrieve the optional class filter and time series interval
+        classes = args.get('classes')
+        try:
+            classes = [int(c) for c in classes.split(',') if c.strip()] if classes is not None else None
+        except ValueError:
+            return {'error': 'classes must be comma separated class ids', 'status_code': 400}
+        interval = args.get('interval', '1')
+        try:
+            interval = int(interval)
+        except ValueError:
+            return {'error': 'interval must be an integer', 'status_code': 400}
+        if interval < 1:
+            return {'error': 'interval must be at least 1 second', 'status_code': 400}
+
+        # Retrieve the optional compared model whose results are queried, the model of the job if not provided
+        model_id, model_version = args.get('model_id'), args.get('model_version')
+        if (model_id is None) != (model_version is None) or \
+                (model_id is not None and model_version not in model_dict.get(model_id, {})):
+            return {'error': 'model_id and model_version must both be given and be a valid model', 'status_code': 400}
+
+        # Check if the job exists, its aggregates are stored in the directory of its dataset
+        result = Result.query.get(str(job_id))
+        if not result:
+            return {'error': 'Job not found', 'status_code': 404}
+
+        # Results of the model of the job are stored in the directory of the job, those of compared models in the
+        # subdirectory named after the model
+        model = f'{model_id}_{model_version}' if model_id is not None and \
+            (model_id, model_version) != (result.model_id, result.model_version) else None
+
+        return {
+            'error': None,
+            'dataset_id': result.dataset_id,
+            'filename': args.get('filename'),
+            'model': model,
+            'kinds': kinds,
+            'classes': classes,
+            'interval': interval
+        }
+
+    except Exception as e:
+        logger.error(f"Unexpected error during validation: {str(e)}")
+        return {'error': 'Internal server error', 'status_code': 500}
@@ -0,0 +1,351 @@
+"""
+This module processes long videos in parallel, split into frame-range segments predicted by worker processes.
+
+Each worker process runs its own replica of the model and seeks to the first frame of its segment, so decoding and
+inference of the segments run on separate cores instead of a single `cv2.VideoCapture` stream. The detections of each
+segment are returned to the calling process, which merges them in frame order into the per-frame results. Each worker
+also plots and encodes the annotated video of its segment, on the original frames unless
+Config.ANNOTATE_AT_INFERENCE_SIZE is set, and the segments are concatenated into the annotated video, without
+re-encoding if ffmpeg is available, so the calling process does not decode the video again. Annotated clips depend on
+the detections of neighbouring segments and are written by the calling process, decoding only the frames of the clips.
+Segments are read from the video proxy at the inference size, and dispatched to the workers in weighted fair share order across the jobs of all users, so that the
+segments of a long video do not delay those of the videos submitted after it, see `scheduler.FairExecutor`.
+
+Functions:
+    - is_chunked_video(file_path): Checks whether a video is long enough to be split into segments.
+    - get_chunked_video_result(file_path, model, dataset_id, job_id): Predicts a video in parallel segments, saves
+      the annotated video and returns the per-frame results.
+"""
+
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+from ultralytics.utils.plotting import BoxRenderer
+from ultralytics.utils.video import VideoWriter
+from config import Config, logger
+from clips import ClipWriter
+from derivatives import FrameReader, get_annotation_frames, get_video
+from inference import get_batch_predictor
+from scheduler import FairExecutor
+from tracks import TrackCompressor
+
+# Model replica of a worker process, loaded by the pool initializer
+_model = None
+
+# Worker pools by model weights, with their fair share dispatchers, started on first use
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _init_worker(weights, threads):
+    """
+    Loads the model replica of a worker process.
+
+    Args:
+        weights (str): Model weights or configuration file.
+        threads (int): Number of torch threads of the worker, so that workers do not oversubscribe the cores.
+    """
+    global _model
+    torch.set_num_threads(threads)
+    _model = YOLO(weights)
+    if Config.INFERENCE_UINT8_INPUT:
+        _model.model.fold_input_normalization()
+
+
+def _predict_segment(file_path, start, stop, batch_size, imgsz=None, vid_stride=1, segment_path=None,
+                     original_path=None, orig_shape=None, fps=30):
+    """
+    Predicts the frames [start, stop) of a video in a worker process, and saves their annotated video if requested.
+
+    Args:
+        file_path (str): Path to the video file predicted, the video proxy of a resized video.
+        start (int): First frame of the segment, a multiple of `vid_stride`.
+        stop (int): Frame after the last frame of the segment, None to read until the end of the video.
+        batch_size (int): Number of frames per forward pass.
+        imgsz (int, optional): Inference size, the model default if None.
+        vid_stride (int): Predict one frame out of `vid_stride`.
+        segment_path (str, optional): Path of the annotated video of the segment, not annotated if None.
+        original_path (str, optional): Path to the original video of a video proxy, annotated unless
+            Config.ANNOTATE_AT_INFERENCE_SIZE is set.
+        orig_shape (tuple, optional): The original (height, width) of a video proxy, None if the original is predicted.
+        fps (float): Frame rate of the annotated video.
+
+    Returns:
+        detections (list): Detections of each predicted frame as an (n, 6) array of xyxy, conf, class.
+        segment_path (str): Path of the annotated video of the segment, None if not annotated or empty.
+    """
+    video = cv2.VideoCapture(file_path)
+    video.set(cv2.CAP_PROP_POS_FRAMES, start)
+    annotate = segment_path is not None
+    originals = get_annotation_frames(original_path, orig_shape) if annotate else None
+    renderer = BoxRenderer(_model.names, Config.ANNOTATION_LINE_WIDTH, Config.ANNOTATION_LABELS) \
+        if annotate and Config.FAST_ANNOTATION else None
+    detections, batch, writer = [], [], None
+    try:
+        frame_number, end = start, False
+        while not end:
+            end = (stop is not None and frame_number >= stop) or not video.grab()
+            if not end:
+                if frame_number % vid_stride == 0:
+                    batch.append((frame_number, video.retrieve()[1]))
+                frame_number += 1
+            if batch and (end or len(batch) == batch_size):
+                for (n, frame), data in zip(batch, _model.infer([frame for _, frame in batch], imgsz)):
+                    data = data.cpu()
+                    detections.append(data.numpy())
+                    if not annotate:
+                        continue
+                    r = Results(frame, path=file_path, names=_model.names, boxes=data)
+                    if orig_shape is not None:
+                        r.rescale(orig_shape)
+                    if originals is not None:
+                        r.orig_img = originals.read(n)
+                    im = r.plot(line_width=Config.ANNOTATION_LINE_WIDTH, labels=Config.ANNOTATION_LABELS,
+                                renderer=renderer)
+                    if writer is None:
+                        writer = VideoWriter(segment_path, fps=fps, size=im.shape[1::-1],
+                                             codec=Config.ANNOTATED_VIDEO_CODEC,
+                                             quality=Config.ANNOTATED_VIDEO_QUALITY,
+                                             max_size=Config.ANNOTATED_VIDEO_MAX_SIZE,
+                                             queue_size=Config.ANNOTATED_VIDEO_QUEUE_SIZE)
+                    writer.write(im)
+                batch = []
+    finally:
+        video.release()
+        if originals is not None:
+            originals.release()
+        if writer is not None:
+            writer.release()
+    return detections, str(writer.path) if writer is not None else None
+
+
+def _concat_segments(segment_paths, output_path):
+    """
+    Concatenates the annotated videos of the segments of a video into its annotated video.
+
+    Segments are copied without re-encoding if ffmpeg is available, otherwise decoded and encoded again.
+
+    Args:
+        segment_paths (list): Paths of the annotated videos of the segments, in order.
+        output_path (str): Path of the annotated video, its suffix is replaced by the suffix of the segments.
+
+    Returns:
+        Path: Path of the annotated video.
+    """
+    output_path = Path(output_path).with_suffix(Path(segment_paths[0]).suffix)
+    if shutil.which('ffmpeg'):
+        list_path = output_path.with_name(f'{output_path.stem}.{os.getpid()}.segments.txt')
+        with open(list_path, 'w') as f:
+            for segment_path in segment_paths:
+                escaped = os.path.abspath(segment_path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        try:
+            subprocess.run(['ffmpeg', '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', str(list_path),
+                            '-c', 'copy', str(output_path)], check=True, capture_output=True)
+        finally:
+            os.remove(list_path)
+        return output_path
+
+    logger.debug("ffmpeg not found, annotated segments of %s are encoded again", output_path)
+    segment = cv2.VideoCapture(segment_paths[0])
+    fps = segment.get(cv2.CAP_PROP_FPS)
+    size = (int(segment.get(cv2.CAP_PROP_FRAME_WIDTH)), int(segment.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    segment.release()
+    with VideoWriter(output_path, fps=fps, size=size, codec=Config.ANNOTATED_VIDEO_CODEC,
+                     quality=Config.ANNOTATED_VIDEO_QUALITY,
+                     queue_size=Config.ANNOTATED_VIDEO_QUEUE_SIZE) as writer:
+        for segment_path in segment_paths:
+            segment = cv2.VideoCapture(segment_path)
+            try:
+                success, frame = segment.read()
+                while success:
+                    writer.write(frame)
+                    success, frame = segment.read()
+            finally:
+                segment.release()
+    return writer.path
+
+
+def _remove_segment(future):
+    """Removes the annotated video of a segment once its future is done, if it was written."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    segment = future.result()[1]
+    if segment and os.path.exists(segment):
+        os.remove(segment)
+
+
+def _get_pool(model):
+    """Returns the fair share dispatcher of the worker pool running replicas of a model, started on first use."""
+    weights = model.ckpt_path or model.cfg
+    with _pools_lock:
+        if weights not in _pools:
+            threads = max((os.cpu_count() or 1) // Config.VIDEO_WORKERS, 1)
+            pool = ProcessPoolExecutor(Config.VIDEO_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(weights, threads))
+            _pools[weights] = FairExecutor(pool, Config.VIDEO_WORKERS)
+        return _pools[weights]
+
+
+def is_chunked_video(file_path):
+    """
+    Checks whether a video is long enough to be split into segments predicted by worker processes.
+
+    Args:
+        file_path (str): Path to the video file.
+
+    Returns:
+        bool: True if video workers are enabled and the video spans at least two segments.
+    """
+    if Config.VIDEO_WORKERS < 2:
+        return False
+    video = cv2.VideoCapture(file_path)
+    frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video.release()
+    return frame_count >= 2 * Config.VIDEO_CHUNK_FRAMES
+
+
+def get_chunked_video_result(file_path, model, dataset_id, job_id, imgsz=None, vid_stride=1, result_format='frames',
+                             aggregates=None, annotation_mode='video', clip_classes=None):
+    """
+    Predicts a video split into frame-range segments by worker processes, saves the annotated video to
+    `annotated_files/<job_id>/annotated_<video name>`, or its annotated clips around frames with detections, and
+    returns the per-frame results.
+
+    Args:
+        file_path (str): Path to the video file.
+        model (object): Model used for predictions, replicated in each worker process.
+        dataset_id (str): ID of the dataset.
+        job_id (str): ID of the job.
+        imgsz (int, optional): Inference size, the model default if None.
+        vid_stride (int): Predict and annotate one frame out of `vid_stride`, at a frame rate divided accordingly.
+        result_format (str): 'frames' to return the objects of each frame, 'tracks' to return the tracked objects
+            of the video, tracked in order as segments are merged.
+        aggregates (JobAggregates, optional): Aggregates of the job, updated with the detections of each frame as
+            segments are merged.
+        annotation_mode (str): 'video' to save the full annotated video, 'clips' to save only annotated clips around
+            the frames with detections, see `clips.ClipWriter`.
+        clip_classes (list, optional): Classes of the detections starting clips, any class if None.
+
+    Returns:
+        list: A list containing the results for the video with all frames included, or all tracks, in the format of
+        `get_video_text_result`.
+    """
+    video_results = {
+        'type': 'video',
+        'filename': file_path.split('/')[-1],
+        'frames': []
+    }
+
+    video, frames, clips, futures = None, None, None, []
+    try:
+        # Open the video proxy at the inference size, detections are mapped back to the original video size
+        source, orig_shape = get_video(file_path, imgsz or get_batch_predictor(model).imgsz)
+        video = cv2.VideoCapture(source)
+        if not video.isOpened():
+            logger.error(f"Failed to open video file {file_path}")
+            return [{'error': f'Failed to open video file {file_path}'}]
+
+        fps = video.get(cv2.CAP_PROP_FPS)
+        if fps <= 0:
+            logger.error(f"Invalid FPS value: {fps} for video file {file_path}")
+            return [{'error': f'Invalid FPS value for video file {file_path}'}]
+        size = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        annotated_video_dir = os.path.join(Config.UPLOADS_BASE_DIR, str(dataset_id), 'annotated_files', str(job_id))
+        output_path = os.path.join(annotated_video_dir, f"annotated_{os.path.basename(file_path)}")
+        root, suffix = os.path.splitext(output_path)
+
+        # Split the video into segments starting on predicted frames, the last one is read until the end as frame
+        # counts may be approximate. Workers annotate their segment unless clips are requested
+        frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        n = max(math.ceil(frame_count / Config.VIDEO_CHUNK_FRAMES), 1)
+        bounds = [round(i * frame_count / n) // vid_stride * vid_stride for i in range(n)] + [None]
+        pool = _get_pool(model)
+        futures = [pool.submit(_predict_segment, source, start, stop, Config.INFERENCE_MAX_BATCH, imgsz, vid_stride,
+                               f'{root}.segment{i}{suffix}' if annotation_mode == 'video' else None,
+                               file_path, orig_shape, fps / vid_stride)
+                   for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))]
+        logger.debug("Video %s split into %d segments of about %d frames", file_path, n, frame_count // n)
+
+        compressor = TrackCompressor(model.names, fps, vid_stride) if result_format == 'tracks' else None
+        if annotation_mode == 'clips':
+            # Only the frames of the clips are decoded, from the original video unless annotated at inference size
+            frames = get_annotation_frames(file_path, orig_shape)
+            clip_size = size if frames is None else (orig_shape[1], orig_shape[0])
+            if frames is None:
+                frames = FrameReader(source)
+            renderer = BoxRenderer(model.names, Config.ANNOTATION_LINE_WIDTH, Config.ANNOTATION_LABELS) \
+                if Config.FAST_ANNOTATION else None
+            clips = ClipWriter(output_path, fps / vid_stride, clip_size, renderer, clip_classes, frames=frames.read)
+
+        # Merge segments in order, frames are decoded again only for trackers using them, the results of other frames
+        # hold a blank image of the size of the predicted frames
+        decode = compressor is not None and compressor.uses_frames
+        blank = np.broadcast_to(np.zeros((1, 1, 3), dtype=np.uint8), (size[1], size[0], 3))
+        frame_number = 0
+        for data in (data for future in futures for data in future.result()[0]):
+            frame = blank
+            if decode:
+                success, frame = video.read()
+                for _ in range(vid_stride - 1):
+                    video.grab()
+                if not success:
+                    logger.warning("Failed to read frame %d of video file %s", frame_number, source)
+                    break
+            r = Results(frame, path=file_path, names=model.names, boxes=torch.from_numpy(data))
+            if orig_shape is not None:
+                r.rescale(orig_shape)
+            if aggregates is not None:
+                aggregates.update(video_results['filename'], r, frame_number, round(frame_number / fps, 2))
+            if compressor is not None:
+                compressor.update(frame_number, r)
+            else:
+                video_results['frames'].append({
+                    'frame_number': frame_number,
+                    'time': round(frame_number / fps, 2),
+                    'objects': json.loads(r.tojson())
+                })
+            if clips is not None:
+                clips.write(r, frame_number, round(frame_number / fps, 2))
+            frame_number += vid_stride
+
+        if clips is not None:
+            logger.debug("Annotated clips indexed at: %s", clips.path)
+        else:
+            segment_paths = [segment for _, segment in (future.result() for future in futures) if segment]
+            if segment_paths:
+                logger.debug("Annotated video saved at: %s", _concat_segments(segment_paths, output_path))
+        if compressor is not None:
+            video_results = compressor.result(video_results['filename'])
+
+    except Exception as e:
+        logger.error(f"Failed to process video {file_path}: {str(e)}")
+        return [{'error': f'Failed to process video {file_path}: {str(e)}'}]
+
+    finally:
+        if clips is not None:
+            clips.release()
+        if video is not None:
+            video.release()
+        if frames is not None:
+            frames.release()
+        # Annotated segments are removed once concatenated, or once written by the workers of a failed video,
+        # without waiting for the segments still being predicted
+        for future in futures:
+            future.cancel()
+            future.add_done_callback(_remove_segment)
+
+    return [video_results]